@@ -2,20 +2,20 @@
 import os
 import sys
 import shutil
-import chardet
-import re
 import subprocess
 import random
 from google.cloud import texttospeech
-from mutagen.mp3 import MP3
+import jp_segment
+import text_encoding
+from mp3_frames import mp3_duration
+from tts_pool import run_ordered, longest_first
 
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"D:\\central-web-428404-n2-6a98d3a64225.json"
 DESTINATION_FOLDER = r"D:\\ecobiz-youtube-uploader\\google-trans"
 TMP_AUDIO_DIR = "_tts_tmp"
 
 def detect_encoding(file_path):
-    with open(file_path, "rb") as f:
-        return chardet.detect(f.read()).get('encoding', 'utf-8')
+    return text_encoding.detect_file(file_path).encoding
 
 def format_time(seconds):
     millisec = int((seconds % 1) * 1000)
@@ -23,36 +23,28 @@ def format_time(seconds):
     return f"{seconds//3600:02}:{(seconds//60)%60:02}:{seconds%60:02},{millisec:03}"
 
 def split_text_by_sentence(text):
-    sentences = re.split(r'(?<=[。！？])\s*', text)
-    return [s.strip() for s in sentences if s.strip()]
+    return jp_segment.split_sentences(text)
 
 def wrap_text(text, max_length=25):
-    lines = []
-    while len(text) > max_length:
-        idx = max(text.rfind("、", 0, max_length), text.rfind("。", 0, max_length))
-        if idx == -1:
-            idx = max_length
-        lines.append(text[:idx+1].strip())
-        text = text[idx+1:].strip()
-    lines.append(text)
-    return "\n".join(lines)
+    return jp_segment.wrap_text(text, max_length)
 
 JAPANESE_FEMALE_VOICES = [
     "ja-JP-Standard-A",
     "ja-JP-Wavenet-A"
 ]
 
+TTS_WORKERS = 4  # TTS同時リクエスト数（1 で逐次）
+
 def tts_each_sentence(sentences, base_name):
     os.makedirs(TMP_AUDIO_DIR, exist_ok=True)
-    durations = []
-    audio_files = []
 
     client = texttospeech.TextToSpeechClient()
-    for i, sentence in enumerate(sentences):
-        voice_name = random.choice(JAPANESE_FEMALE_VOICES)
+    voices = [random.choice(JAPANESE_FEMALE_VOICES) for _ in sentences]
+    audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+
+    def synth(i, sentence):
         synthesis_input = texttospeech.SynthesisInput(text=sentence)
-        voice = texttospeech.VoiceSelectionParams(language_code="ja-JP", name=voice_name)
-        audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+        voice = texttospeech.VoiceSelectionParams(language_code="ja-JP", name=voices[i])
 
         response = client.synthesize_speech(input=synthesis_input, voice=voice, audio_config=audio_config)
 
@@ -60,9 +52,11 @@ def tts_each_sentence(sentences, base_name):
         with open(part_path, "wb") as out:
             out.write(response.audio_content)
 
-        audio = MP3(part_path)
-        durations.append(audio.info.length)
-        audio_files.append(part_path)
+        return mp3_duration(response.audio_content), part_path
+
+    results = run_ordered(sentences, synth, workers=TTS_WORKERS, order=longest_first(sentences))
+    durations = [d for d, _ in results]
+    audio_files = [p for _, p in results]
 
     return durations, audio_files
 
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+google_txt2tts_srt_mp4_jp.py のバッチ実行（複数 txt → 複数 mp4）
+
+- 1プロセスで1ファイルずつ起動し直す代わりに、ワーカープロセスを使い回す
+  （google-cloud の import と TTS クライアント生成はワーカーごとに1回だけ）
+- TTS 中のジョブ数 / ffmpeg 中のジョブ数をそれぞれ上限で制限（プロセス間セマフォ）
+- ジョブごとに専用の作業フォルダ（scratch.py）・ログファイル
+- 1ファイル失敗しても残りは続行。最後に成功/失敗の一覧を表示
+- 出力 mp4/srt とログはファイル名（拡張子なし）で決まるので、別フォルダの同じ名前の txt は始める前に弾く
+
+使い方:
+    python batch_tts.py texts\\                 （フォルダ内の *.txt）
+    python batch_tts.py "today\\*.txt"          （glob）
+    python batch_tts.py @jobs.lst              （1行1パスのリスト）
+    python batch_tts.py a.txt b.txt --workers 3 --tts_slots 2 --ffmpeg_slots 1
+    python batch_tts.py texts\ --subtitles soft   （字幕を焼き込まない: soft / sidecar）
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Semaphore
+from typing import Dict, List, NamedTuple
+
+_tts_sem = None
+_ff_sem = None
+
+
+class JobStatus(NamedTuple):
+    input_file: str
+    ok: bool
+    elapsed: float
+    total_duration: float
+    error: str
+    log_path: str
+
+
+def fmt(sec: float) -> str:
+    m, s = divmod(int(sec), 60)
+    return f"{m:02}:{s:02}"
+
+
+# ================== 入力の展開 ==================
+def expand_inputs(args: List[str]) -> List[str]:
+    out: List[str] = []
+    for a in args:
+        if a.startswith("@"):
+            with open(a[1:], encoding="utf-8-sig") as f:
+                out.extend(line.strip() for line in f if line.strip() and not line.startswith("#"))
+        elif os.path.isdir(a):
+            out.extend(sorted(glob.glob(os.path.join(a, "*.txt"))))
+        elif any(ch in a for ch in "*?["):
+            out.extend(sorted(glob.glob(a)))
+        else:
+            out.append(a)
+
+    # 重複除去（順序は維持）
+    seen = set()
+    uniq = []
+    for p in out:
+        ap = os.path.abspath(p)
+        if ap not in seen:
+            seen.add(ap)
+            uniq.append(ap)
+    return uniq
+
+
+def basename_clashes(files: List[str]) -> Dict[str, List[str]]:
+    """
+    出力名（拡張子なしのファイル名）がぶつかる入力をまとめて返す（Windows では大文字小文字を区別しない）
+    a/ep1.txt と b/ep1.txt はどちらも ep1.mp4 / ep1.log に書くので、一緒には流せない
+    """
+    by_base: Dict[str, List[str]] = {}
+    for f in files:
+        base = os.path.normcase(os.path.splitext(os.path.basename(f))[0])
+        by_base.setdefault(base, []).append(f)
+    return {b: fs for b, fs in by_base.items() if len(fs) > 1}
+
+
+# ================== ワーカー ==================
+def _init_worker(tts_sem, ff_sem) -> None:
+    global _tts_sem, _ff_sem
+    _tts_sem = tts_sem
+    _ff_sem = ff_sem
+
+
+def _run_job(input_file: str, out_dir: str, log_dir: str, subtitle_mode: str = "") -> JobStatus:
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    log_path = os.path.join(log_dir, base + ".log")
+    t0 = time.perf_counter()
+
+    # ジョブの出力（ffmpeg の出力も含む）をログファイルへ
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    log = open(log_path, "w", encoding="utf-8")
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+
+    total_duration = 0.0
+    try:
+        import google_txt2tts_srt_mp4_jp as pipe
+
+        if _tts_sem is not None:
+            pipe.TTS_GATE = _tts_sem
+        if _ff_sem is not None:
+            pipe.FFMPEG_GATE = _ff_sem
+
+        # 作業フォルダは run_pipeline がジョブごとに作る（RAM 上 / 片付けは SCRATCH_CLEANUP）
+        total_duration = pipe.run_pipeline(input_file, out_dir=out_dir, subtitle_mode=subtitle_mode)
+        ok, err = True, ""
+    except BaseException as e:
+        traceback.print_exc()
+        ok, err = False, f"{type(e).__name__}: {e}"
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        log.close()
+
+    return JobStatus(input_file, ok, time.perf_counter() - t0, total_duration, err, log_path)
+
+
+# ================== メイン ==================
+def main():
+    p = argparse.ArgumentParser(description="txt → mp4 をまとめて実行（ワーカープロセス使い回し）")
+    p.add_argument("inputs", nargs="+", help="txt / フォルダ / glob / @リストファイル")
+    p.add_argument("--workers", type=int, default=2, help="ワーカープロセス数")
+    p.add_argument("--tts_slots", type=int, default=2, help="同時に TTS 中にしてよいジョブ数")
+    p.add_argument("--ffmpeg_slots", type=int, default=1, help="同時に ffmpeg 中にしてよいジョブ数")
+    p.add_argument("--out_dir", default="", help="mp4/srt の出力先（既定はカレント）")
+    p.add_argument("--log_dir", default="_batch_logs", help="ジョブごとのログ出力先")
+    p.add_argument("--subtitles", default="", choices=["", "burn", "soft", "sidecar"],
+                   help="字幕の入れ方（省略時は google_txt2tts_srt_mp4_jp.SUBTITLE_MODE）")
+    args = p.parse_args()
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        sys.exit("入力 txt がありません")
+    clashes = basename_clashes(files)
+    if clashes:
+        print("❌ 同じファイル名の txt があります（出力 mp4 / ログが上書きし合うため実行しません）:")
+        for fs in clashes.values():
+            for f in fs:
+                print(f"   {f}")
+        sys.exit("ファイル名を変えるか、別々に実行してください")
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    os.makedirs(args.log_dir, exist_ok=True)
+
+    t_start = time.perf_counter()
+    print(f"=== バッチ開始: {len(files)}件 / workers={args.workers} "
+          f"tts={args.tts_slots} ffmpeg={args.ffmpeg_slots} ===")
+
+    tts_sem = Semaphore(max(1, args.tts_slots))
+    ff_sem = Semaphore(max(1, args.ffmpeg_slots))
+
+    results: List[JobStatus] = []
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.workers),
+        initializer=_init_worker,
+        initargs=(tts_sem, ff_sem),
+    ) as ex:
+        futs = {ex.submit(_run_job, f, args.out_dir, args.log_dir, args.subtitles): f for f in files}
+        for fut in as_completed(futs):
+            try:
+                st = fut.result()
+            except BaseException as e:
+                # ワーカープロセス自体が落ちた場合
+                st = JobStatus(futs[fut], False, 0.0, 0.0, f"{type(e).__name__}: {e}", "")
+            results.append(st)
+            mark = "✅" if st.ok else "❌"
+            print(f"{mark} [{len(results):03}/{len(files):03}] {os.path.basename(st.input_file)} ({fmt(st.elapsed)})")
+
+    results.sort(key=lambda r: files.index(r.input_file))
+    failed = [r for r in results if not r.ok]
+
+    print("")
+    print("=== 結果 ===")
+    for r in results:
+        if r.ok:
+            print(f"  OK   {os.path.basename(r.input_file)}  尺 {r.total_duration:.1f}秒  処理 {fmt(r.elapsed)}")
+        else:
+            print(f"  FAIL {os.path.basename(r.input_file)}  {r.error}  (log: {r.log_path})")
+
+    total = time.perf_counter() - t_start
+    print(f"成功 {len(results) - len(failed)} / 失敗 {len(failed)}")
+    print(f"⏱ 総処理時間: {fmt(total)} ({total:.2f} 秒)")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+google_txt2tts_srt_mp4_jp.py のオフライン・ベンチマーク（TTS の課金もネットワークも使わない）
+
+- 合成した日本語の台本（既定 1k / 10k / 50k / 200k 文字、乱数シード固定で毎回同じ文面）を作る
+- TTS クライアントを fake_tts.FakeTextToSpeechClient に差し替える（1文字 sec_per_char 秒の正しい WAV/MP3、
+  1リクエストごとに latency 秒待つ）
+- run_pipeline を丸ごと実行し、tracing のスパンから工程ごと（read / split / tts / assemble / srt / render …）
+  の時間と、TTS 1リクエストあたりの時間(p50/p95)を取る
+- 結果を JSON に保存。--baseline の JSON と比べて、どこかの工程が閾値を超えて遅くなっていたら終了コード 1
+
+使い方:
+    python bench_pipeline.py                                   （bench_results/<日時>.json に保存）
+    python bench_pipeline.py --sizes 1000,10000 --repeat 3
+    python bench_pipeline.py --baseline bench_results/base.json --threshold 0.2
+    python bench_pipeline.py --packing --latency 0.2 --render cue
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import tempfile
+from contextlib import redirect_stdout
+from typing import Dict, List, Optional
+
+import tracing
+
+DEFAULT_SIZES = "1000,10000,50000,200000"
+DEFAULT_THRESHOLD = 0.20   # 20% 以上遅くなったら失敗
+DEFAULT_MIN_DELTA = 0.05   # ただし差が この秒数未満ならノイズとして無視
+
+# 台本の材料（地の文 / 会話 / 読点の多い長い文 を混ぜる）
+_SUBJECTS = ["私は", "彼女は", "その男は", "村の人々は", "先生は", "猫は", "旅人は", "少年は"]
+_PLACES = ["駅前の古い喫茶店で", "雨の降る夜の街で", "山あいの小さな村で", "海の見える丘の上で",
+           "誰もいない図書館で", "夕暮れの公園で"]
+_ACTIONS = ["静かに窓の外を眺めていた", "一通の手紙を読み返していた", "遠い昔の約束を思い出していた",
+            "見知らぬ足音に耳を澄ませた", "冷めたコーヒーを一口飲んだ", "ゆっくりと扉を開けた"]
+_LINES = ["本当にそれでいいの？", "もう少しだけ待ってほしい。", "あの日のことを覚えているか？",
+          "大丈夫、きっとうまくいく！", "それは誰にも言ってはいけない。"]
+_TAILS = ["。", "。", "。", "！", "……。"]
+
+
+# ================== 台本の生成 ==================
+def synthetic_script(chars: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    out: List[str] = []
+    total = 0
+    while total < chars:
+        k = rnd.random()
+        if k < 0.2:
+            s = f"「{rnd.choice(_LINES)}」と{rnd.choice(_SUBJECTS)[:-1]}は言った。"
+        elif k < 0.35:
+            # 読点の多い長い文（TTS の長文分割と字幕の折り返しを通す）
+            s = "、".join(f"{rnd.choice(_PLACES)}{rnd.choice(_ACTIONS)}" for _ in range(rnd.randint(3, 6))) + "。"
+        else:
+            s = f"{rnd.choice(_SUBJECTS)}{rnd.choice(_PLACES)}{rnd.choice(_ACTIONS)}{rnd.choice(_TAILS)}"
+        if rnd.random() < 0.1:
+            s += "\n"
+        out.append(s)
+        total += len(s)
+    return "".join(out)[:chars].rstrip() + "。\n"
+
+
+# ================== 1回の実行 ==================
+def _stage_times(spans: List[tracing.Span]) -> Dict[str, float]:
+    root = next((s for s in spans if s.name == "pipeline"), None)
+    if root is None:
+        return {}
+    out: Dict[str, float] = {"total": root.end - root.start}
+    for s in sorted(spans, key=lambda s: s.start):
+        if s.parent == root.id:
+            out[s.name] = out.get(s.name, 0.0) + (s.end - s.start)
+    return out
+
+
+def _percentile(xs: List[float], q: float) -> float:
+    if not xs:
+        return 0.0
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(round(q * (len(xs) - 1))))]
+
+
+def run_once(pipe, input_file: str, work: str) -> dict:
+    out_dir = os.path.join(work, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    # 字幕画像と背景クリップのキャッシュも1回ごとに空のフォルダに（前の実行の分を使うとコールドにならない）
+    pipe.CUE_CACHE_DIR = tempfile.mkdtemp(prefix="cue_cache_", dir=work)
+    pipe.BG_CACHE_DIR = tempfile.mkdtemp(prefix="bg_cache_", dir=work)
+    log_path = os.path.join(work, "pipeline.log")
+    with open(log_path, "a", encoding="utf-8") as log, redirect_stdout(log):
+        total_duration = pipe.run_pipeline(input_file, out_dir, os.path.join(work, "tmp"))
+
+    spans = list(tracing.tracer.spans)
+    req = [s.end - s.start for s in spans if s.name == "tts.request"]
+    return {
+        "stages": {k: round(v, 4) for k, v in _stage_times(spans).items()},
+        "audio_seconds": round(total_duration, 3),
+        "tts_requests": len(req),
+        "tts_request_p50": round(_percentile(req, 0.5), 4),
+        "tts_request_p95": round(_percentile(req, 0.95), 4),
+        "tts_retries": sum(int(s.attrs.get("retries", 0)) for s in spans if s.name == "tts.request"),
+    }
+
+
+def _median_runs(runs: List[dict]) -> dict:
+    res = dict(runs[-1])
+    names = list(dict.fromkeys(k for r in runs for k in r["stages"]))   # 工程の順のまま
+    res["stages"] = {k: round(statistics.median(r["stages"].get(k, 0.0) for r in runs), 4) for k in names}
+    res["runs"] = [r["stages"] for r in runs]
+    return res
+
+
+# ================== 比較 ==================
+def compare(current: dict, baseline: dict, threshold: float, min_delta: float) -> List[str]:
+    """
+    遅くなった 工程 の説明文のリストを返す（空なら合格）
+    """
+    bad: List[str] = []
+    for size, cur in current["results"].items():
+        base = baseline.get("results", {}).get(size)
+        if not base:
+            continue
+        for stage, t in cur["stages"].items():
+            b = base["stages"].get(stage)
+            if b is None:
+                continue
+            if t > b * (1 + threshold) and t - b >= min_delta:
+                bad.append(f"{size}文字 {stage}: {b:.3f} → {t:.3f} 秒（+{(t / b - 1) * 100 if b else 0:.0f}%）")
+    return bad
+
+
+def print_table(current: dict, baseline: Optional[dict]) -> None:
+    for size, cur in current["results"].items():
+        base = (baseline or {}).get("results", {}).get(size, {}).get("stages", {})
+        print(f"--- {int(size):,} 文字（音声 {cur['audio_seconds']:.1f} 秒 / TTS {cur['tts_requests']}リクエスト"
+              f" p50 {cur['tts_request_p50'] * 1000:.1f} ms / p95 {cur['tts_request_p95'] * 1000:.1f} ms）")
+        for stage, t in cur["stages"].items():
+            ref = f"  基準 {base[stage]:8.3f} 秒" if stage in base else ""
+            print(f"   {stage:<10} {t:8.3f} 秒{ref}")
+
+
+# ================== メイン ==================
+def main() -> int:
+    ap = argparse.ArgumentParser(description="TTS→MP4 パイプラインのオフライン・ベンチマーク（fake TTS）")
+    ap.add_argument("--sizes", default=DEFAULT_SIZES, help="台本の文字数（カンマ区切り）")
+    ap.add_argument("--repeat", type=int, default=1, help="各サイズの実行回数（工程ごとの中央値を使う）")
+    ap.add_argument("--latency", type=float, default=0.05, help="fake TTS の1リクエストあたりの待ち（秒）")
+    ap.add_argument("--sec_per_char", type=float, default=0.12, help="fake TTS の音声の長さ（秒/文字）")
+    ap.add_argument("--workers", type=int, default=0, help="TTS 同時リクエスト数（0 なら設定どおり）")
+    ap.add_argument("--packing", action="store_true", help="TTS_PACKING=True で測る")
+    ap.add_argument("--stream", action="store_true", help="STREAM_RENDER=True で測る")
+    ap.add_argument("--assembly", choices=("pcm", "mp3"), default="", help="AUDIO_ASSEMBLY")
+    ap.add_argument("--render", choices=("legacy", "cue", "cfr"), default="", help="RENDER_MODE")
+    ap.add_argument("--out", default="", help="結果 JSON（省略時 bench_results/<日時>.json）")
+    ap.add_argument("--baseline", default="", help="比較する結果 JSON")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="この割合を超えて遅くなったら失敗")
+    ap.add_argument("--min_delta", type=float, default=DEFAULT_MIN_DELTA, help="この秒数未満の差は無視")
+    ap.add_argument("--keep", action="store_true", help="作業フォルダ（台本・出力・トレース）を残す")
+    args = ap.parse_args()
+
+    # 本物の TTS を呼ばないように、import 前に fake を指定しておく
+    os.environ["TTS_BACKEND"] = "fake"
+    import google_txt2tts_srt_mp4_jp as pipe
+    from fake_tts import FakeTextToSpeechClient
+
+    pipe._tts_clients["fake"] = FakeTextToSpeechClient(
+        sec_per_char=args.sec_per_char, latency=args.latency, error_rate=0.0, fail_first=0, seed=0,
+    )
+    # 毎回コールドに（TTS キャッシュ/マニフェストなし。字幕画像・背景のキャッシュは run_once で毎回空に）、
+    # レート制限なし、進捗表示は最小限
+    pipe.TTS_CACHE_DIR = ""
+    pipe.MANIFEST_DIR = ""
+    pipe.TTS_REQ_PER_SEC = 0.0
+    pipe.TTS_CHARS_PER_MIN = 0.0
+    pipe.ENCODE_METRICS_PATH = ""
+    pipe.TTS_PACKING = args.packing
+    pipe.STREAM_RENDER = args.stream
+    if args.workers:
+        pipe.TTS_WORKERS = args.workers
+    if args.assembly:
+        pipe.AUDIO_ASSEMBLY = args.assembly
+    if args.render:
+        pipe.RENDER_MODE = args.render
+
+    root = tempfile.mkdtemp(prefix="bench_pipeline_")
+    current = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "latency": args.latency, "sec_per_char": args.sec_per_char, "workers": pipe.TTS_WORKERS,
+            "packing": pipe.TTS_PACKING, "stream": pipe.STREAM_RENDER,
+            "assembly": pipe.AUDIO_ASSEMBLY, "render": pipe.RENDER_MODE, "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    try:
+        for size in [int(x) for x in args.sizes.split(",") if x.strip()]:
+            work = os.path.join(root, f"s{size}")
+            os.makedirs(work, exist_ok=True)
+            input_file = os.path.join(work, f"bench_{size}.txt")
+            with open(input_file, "w", encoding="utf-8") as f:
+                f.write(synthetic_script(size))
+
+            runs = []
+            for i in range(args.repeat):
+                pipe.TRACE_DIR = os.path.join(work, "trace")
+                t0 = time.perf_counter()
+                runs.append(run_once(pipe, input_file, work))
+                print(f"   {size:,} 文字 #{i + 1}: {time.perf_counter() - t0:.2f} 秒")
+            current["results"][str(size)] = _median_runs(runs)
+    finally:
+        if args.keep:
+            print(f"作業フォルダ: {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_table(current, baseline)
+
+    out = args.out or os.path.join("bench_results", time.strftime("%Y%m%d_%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(current, f, ensure_ascii=False, indent=2)
+    print(f"結果: {out}")
+
+    if baseline is not None:
+        bad = compare(current, baseline, args.threshold, args.min_delta)
+        if bad:
+            print(f"❌ 遅くなった工程があります（閾値 +{args.threshold:.0%}）:")
+            for line in bad:
+                print("   " + line)
+            return 1
+        print(f"✅ 基準から閾値 +{args.threshold:.0%} を超えて遅くなった工程はありません")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
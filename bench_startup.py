@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+CLI の起動時間の計測と予算チェック（run10.ps1 などから何度も起動されるスクリプト向け）
+
+各スクリプトについて:
+- python -X importtime -c "import <モジュール>" を repeat 回実行し、モジュール自体の import 時間（累計）の中央値
+- python <スクリプト> <引数>（--help や引数なし = 使い方を出して終わる）の実時間の中央値
+- import 時間の大きい依存モジュールの上位
+- 起動時に読み込んではいけない重いモジュール（LAZY）が読み込まれていないか
+
+import 時間が予算（BUDGET_MS × --scale）を超えるか、LAZY のモジュールが読み込まれていたら終了コード 1
+
+使い方:
+    python bench_startup.py
+    python bench_startup.py --repeat 9 --out bench_results/startup.json
+    python bench_startup.py --scale 3      （遅い PC では予算を3倍に）
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, NamedTuple, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class Target(NamedTuple):
+    module: str
+    argv: List[str]       # 実時間を測るときの引数（すぐ終わるもの）
+    budget_ms: float      # import 時間の予算
+    lazy: Tuple[str, ...]  # import 時に読み込まれていてはいけないモジュール
+
+
+TARGETS: List[Target] = [
+    Target("uploader11", ["--help"], 60.0,
+           ("googleapiclient", "google_auth_oauthlib", "google.oauth2", "google.auth.transport", "difflib")),
+    Target("google_txt2tts_srt_mp4_jp", [], 300.0, ("google.cloud.texttospeech", "numpy")),
+    Target("google_txt2tts_srt_mp4_jp_short", [], 120.0, ("google.cloud.texttospeech",)),
+    Target("batch_tts", ["--help"], 120.0, ("google.cloud.texttospeech", "google_txt2tts_srt_mp4_jp")),
+]
+
+# "import time: self [us] | cumulative | imported package"
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+def importtime(module: str) -> List[Tuple[str, int, int]]:
+    """
+    module の import で読み込まれたモジュールの (名前, 累計 µs, 深さ) を出力順に返す（最後が module 自身）
+    -X importtime は子を親より先に出すので、直前の深さ 0 の行（python の起動時の import）の後ろから module の行まで
+    """
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                       capture_output=True, text=True, encoding="utf-8", errors="replace", cwd=HERE)
+    if r.returncode != 0:
+        print(r.stderr[-2000:])
+        raise RuntimeError(f"import {module} failed")
+    out: List[Tuple[str, int, int]] = []
+    for line in r.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        name, depth = m.group(4), (len(m.group(3)) - 1) // 2
+        if depth == 0 and name != module:
+            out = []
+            continue
+        out.append((name, int(m.group(2)), depth))
+        if depth == 0:
+            break
+    return out
+
+
+def wall_ms(module: str, argv: List[str]) -> float:
+    t0 = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(HERE, module + ".py")] + argv,
+                   capture_output=True, cwd=HERE)
+    return (time.perf_counter() - t0) * 1000
+
+
+def measure(t: Target, repeat: int, top: int) -> dict:
+    importtime(t.module)   # 1回目は .pyc の作成が入るので捨てる
+    runs = [importtime(t.module) for _ in range(repeat)]
+    imports = [r[-1][1] / 1000 for r in runs]
+    walls = [wall_ms(t.module, t.argv) for _ in range(repeat)]
+
+    last = runs[-1]
+    # 対象モジュールが直接 import したもののうち、累計が大きいもの
+    children = sorted(((name, us / 1000) for name, us, depth in last if depth == 1), key=lambda x: x[1], reverse=True)
+    loaded_lazy = sorted({lz for lz in t.lazy for name, _us, _d in last if name == lz or name.startswith(lz + ".")})
+    return {
+        "import_ms": round(statistics.median(imports), 2),
+        "wall_ms": round(statistics.median(walls), 1),
+        "budget_ms": t.budget_ms,
+        "top": [[name, round(ms, 2)] for name, ms in children[:top]],
+        "loaded_lazy": loaded_lazy,
+    }
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="CLI の起動時間（import 時間）の計測と予算チェック")
+    ap.add_argument("--repeat", type=int, default=5, help="各スクリプトの計測回数（中央値を使う）")
+    ap.add_argument("--scale", type=float, default=1.0, help="予算の倍率（遅い PC 用）")
+    ap.add_argument("--top", type=int, default=5, help="表示する重い依存の件数")
+    ap.add_argument("--only", default="", help="測るモジュール（カンマ区切り。省略時は全部）")
+    ap.add_argument("--out", default="", help="結果 JSON の保存先")
+    args = ap.parse_args()
+
+    only = {x.strip() for x in args.only.split(",") if x.strip()}
+    results: Dict[str, dict] = {}
+    bad: List[str] = []
+    for t in TARGETS:
+        if only and t.module not in only:
+            continue
+        res = measure(t, max(1, args.repeat), args.top)
+        results[t.module] = res
+        budget = t.budget_ms * args.scale
+        mark = "✅" if res["import_ms"] <= budget and not res["loaded_lazy"] else "❌"
+        print(f"{mark} {t.module:<34} import {res['import_ms']:7.1f} ms（予算 {budget:.0f} ms）"
+              f" / 起動〜終了 {res['wall_ms']:7.1f} ms")
+        for name, ms in res["top"]:
+            print(f"      {ms:7.1f} ms  {name}")
+        if res["import_ms"] > budget:
+            bad.append(f"{t.module}: import {res['import_ms']:.1f} ms > 予算 {budget:.0f} ms")
+        for name in res["loaded_lazy"]:
+            bad.append(f"{t.module}: 起動時に {name} を読み込んでいます（使う関数の中で import する）")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "python": sys.version.split()[0],
+                       "scale": args.scale, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"結果: {args.out}")
+
+    if bad:
+        print("❌ 起動時間の予算を超えています:")
+        for line in bad:
+            print("   " + line)
+        return 1
+    print("✅ すべて予算内です")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
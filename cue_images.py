@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+字幕を1件ずつ透過 PNG にしておき、焼き込みのときは絵を重ねるだけにする
+
+subtitles= フィルタ（libass）は出力するフレームごとに字幕を描き直す。RENDER_MODE="legacy"（"cfr"）や
+オーバーレイ付きの描画は 30fps なので、22分の動画で 4万フレームぶん描くことになる。
+字幕の絵は文ごとに1枚あれば足りるので:
+
+  1. SRT の字幕文のうち、キャッシュに無いものだけを1本の ffmpeg で描く
+     （1秒に1件ずつ並べた SRT を 1fps・透明背景で描いて cue_%05d.png に書き出す。libass なので見た目は従来と同じ）
+  2. 描いた PNG を キー = sha1(字幕文 / force_style / 解像度) でキャッシュに置く（背景色はキーに入れない）
+  3. cue_render の境界列の各区間に「その時刻の字幕の PNG（無ければ透明な空の PNG）」を並べた ffconcat を作る
+  4. 描画時は -vf で背景色の上に重ねてから fps=30 で複製する（composite_vf）。重ねる/変換するのは境界フレームだけ
+
+- 同じ字幕文（繰り返しの台詞、同じ台本の作り直し、テーマ違いのプロファイル）は2回目から描かない
+- wide と short は文字サイズ・フォント・改行幅が違うので別の絵になる（同じスタイルどうしなら共有）
+- キャッシュが max_bytes を超えたら、最後に使った時刻が古い順に消す
+- 使うのは CUE_IMAGES=True のときだけ（既定は False で、従来どおり subtitles= で焼き込む。試験的）
+"""
+
+import os
+import bisect
+import hashlib
+import shutil
+import tempfile
+import subprocess
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from cue_render import TIMEBASE_OPTION
+
+Cue = Tuple[float, float]
+
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+
+class CueImages(NamedTuple):
+    paths: List[str]   # 字幕ごとの PNG（srt の並び順）
+    blank: str         # 字幕の無い区間用（全面透明）
+    rendered: int      # 今回描いた枚数
+    cached: int        # キャッシュにあった枚数
+
+
+def cue_key(text: str, style: str, size: str) -> str:
+    h = hashlib.sha1()
+    for part in (text, style, size):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def srt_texts(srt_path: str) -> List[str]:
+    """
+    SRT の字幕文だけを順に返す（番号と時刻の行を除く。複数行はそのまま改行でつなぐ）
+    """
+    with open(srt_path, encoding="utf-8-sig") as f:
+        blocks = f.read().replace("\r\n", "\n").split("\n\n")
+    out: List[str] = []
+    for b in blocks:
+        lines = b.strip("\n").split("\n")
+        if len(lines) >= 2 and "-->" in lines[1]:
+            out.append("\n".join(lines[2:]))
+    return out
+
+
+def _srt_time(t: float) -> str:
+    total_ms = int(round(t * 1000.0))
+    return f"{total_ms // 3600000:02}:{total_ms // 60000 % 60:02}:{total_ms // 1000 % 60:02},{total_ms % 1000:03}"
+
+
+def _escape_filter_path(path: str) -> str:
+    return path.replace("\\", "/").replace(":", "\\:").replace("'", "\\'")
+
+
+def _run(cmd: List[str]) -> None:
+    r = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if r.returncode != 0:
+        print("❌ コマンド失敗:")
+        print("   " + " ".join(cmd))
+        print("---- stderr ----")
+        print(r.stderr)
+        raise RuntimeError("command failed")
+
+
+def _rasterize(texts: Sequence[str], style: str, size: str, out_dir: str) -> List[str]:
+    """
+    texts を1件1秒の SRT にして、1fps・透明背景で1回だけ描く。out_dir/cue_00000.png … を返す
+    （空文字は描かれずに透明な1枚になる = 空の PNG）
+    """
+    srt = os.path.join(out_dir, "batch.srt")
+    with open(srt, "w", encoding="utf-8") as f:
+        for k, text in enumerate(texts):
+            # フレーム k は時刻 k 秒。字幕は k〜k+0.5 秒に置く（前後の字幕を拾わない）
+            f.write(f"{k + 1}\n{_srt_time(k)} --> {_srt_time(k + 0.5)}\n{text}\n\n")
+    _run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"color=c=black@0:s={size}:r=1,format=rgba",
+        # libass は透明な下地に色を「下地と混ぜて」書く（= 乗算済みアルファ）ので、普通の PNG の形に戻して保存する
+        "-vf", f"subtitles=filename='{_escape_filter_path(srt)}':charenc=UTF-8:alpha=1:force_style='{style}',"
+               "unpremultiply=inplace=1",
+        "-frames:v", str(len(texts)),
+        "-start_number", "0",
+        os.path.join(out_dir, "cue_%05d.png"),
+    ])
+    return [os.path.join(out_dir, f"cue_{k:05d}.png") for k in range(len(texts))]
+
+
+def render_cues(texts: Sequence[str], style: str, size: str, cache_dir: str,
+                max_bytes: int = DEFAULT_MAX_BYTES) -> CueImages:
+    """
+    字幕文ごとの透過 PNG を用意する（キャッシュに無いものだけ描く）
+    複数スレッド/プロセスから同時に呼ばれても、一時フォルダで描いてから os.replace で置くので壊れない
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths: Dict[str, str] = {}
+    missing: List[str] = []
+    for text in dict.fromkeys(list(texts) + [""]):
+        p = os.path.join(cache_dir, cue_key(text, style, size) + ".png")
+        paths[text] = p
+        if os.path.exists(p):
+            try:
+                os.utime(p, None)   # LRU 用に「最後に使った時刻」を更新
+            except OSError:
+                pass
+        else:
+            missing.append(text)
+
+    if missing:
+        work = tempfile.mkdtemp(prefix="render_", dir=cache_dir)
+        try:
+            for text, png in zip(missing, _rasterize(missing, style, size, work)):
+                os.replace(png, paths[text])
+        finally:
+            shutil.rmtree(work, ignore_errors=True)
+        prune(cache_dir, max_bytes)
+
+    return CueImages([paths[t] for t in texts], paths[""], len(missing), len(paths) - len(missing))
+
+
+def prune(cache_dir: str, max_bytes: int) -> int:
+    """
+    合計が max_bytes を超えていたら古い順に消す。消した枚数を返す
+    """
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".png"):
+            continue
+        p = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(p)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, p))
+    total = sum(e[1] for e in entries)
+    removed = 0
+    for _mtime, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(p)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+
+def write_ffconcat(list_path: str, boundaries: Sequence[float], cues: Sequence[Cue], images: CueImages) -> int:
+    """
+    cue_render.write_ffconcat と同じ区間列で、各区間にその時刻の字幕の PNG を並べる。フレーム数を返す
+    """
+    starts = [s for s, _e in cues]
+
+    def image_at(t: float) -> str:
+        i = bisect.bisect_right(starts, t) - 1
+        if 0 <= i < len(images.paths) and cues[i][0] <= t < cues[i][1]:
+            return images.paths[i]
+        return images.blank
+
+    def entry(path: str) -> str:
+        return "file '" + os.path.abspath(path).replace("\\", "/") + "'\n" + TIMEBASE_OPTION
+
+    n = 0
+    last = images.blank
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for a, b in zip(boundaries, boundaries[1:]):
+            # 区間の中央の時刻で選ぶ（境界ちょうどの丸めで前後の字幕を拾わない）
+            last = image_at((a + b) / 2)
+            f.write(entry(last))
+            f.write(f"duration {b - a:.6f}\n")
+            n += 1
+        # concat demuxer は最後の duration を無視するので、最後のファイルをもう一度書く
+        f.write(entry(last))
+    return n
+
+
+def composite_vf(background: str, fps: int = 0) -> str:
+    """
+    透過 PNG の列を背景色の上に重ねる -vf（1入力1出力なので -vf にも filter_complex の1段にも書ける）
+    fps を渡すと重ねた後で CFR に複製する。yuv420p への変換は複製の前に置く（変換も境界フレームの数だけ）
+    """
+    # ラベルは fused_render の filter_complex に埋め込んでもぶつからない名前にする
+    vf = (f"format=rgba,split[cue_fg][cue_bg];[cue_bg]drawbox=c={background}:t=fill[cue_base];"
+          f"[cue_base][cue_fg]overlay=format=auto,format=yuv420p")
+    if fps:
+        vf += f",fps={fps}"
+    return vf
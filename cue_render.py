@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+静止背景＋字幕の動画を「字幕が変わる瞬間だけフレームを出す」VFR で作る
+
+黒背景に字幕を焼くだけの動画は、絵が変わるのは字幕の出入りの瞬間だけ。
+30fps で全フレームをエンコードする代わりに:
+
+  背景画像を ffconcat で「境界から次の境界まで」表示 → フレームの pts = 字幕境界
+  → subtitles フィルタは各フレームの pts で描画（= その区間の字幕）
+  → -vsync vfr でそのままの時刻で書き出す
+
+- シーク/再生互換のため、1フレームの最大表示時間は max_gap 秒で区切る（既定 2 秒）
+- 40分の台本でも数千フレーム程度（30fps なら 72,000 フレーム）
+"""
+
+import os
+from typing import List, Sequence, Tuple
+
+Cue = Tuple[float, float]
+
+DEFAULT_MAX_GAP = 2.0
+
+# 画像入力は既定で 1/25 秒刻みになり境界が 40ms 単位に丸められるので、1ms 刻みにする
+TIMEBASE_OPTION = "option framerate 1000\n"
+
+
+def cue_boundaries(cues: Sequence[Cue], total: float, max_gap: float = DEFAULT_MAX_GAP) -> List[float]:
+    """
+    0, 各字幕の開始/終了, total を昇順に並べ、max_gap を超える区間は等分した時刻列を返す
+    （最後の要素は total）
+    """
+    pts = {0.0, round(total, 3)}
+    for start, end in cues:
+        for t in (start, end):
+            if 0.0 <= t <= total:
+                pts.add(round(t, 3))
+    edges = sorted(pts)
+
+    out: List[float] = [edges[0]]
+    for a, b in zip(edges, edges[1:]):
+        gap = b - a
+        if gap <= 0:
+            continue
+        n = max(1, int(-(-gap // max_gap))) if max_gap > 0 else 1
+        for k in range(1, n + 1):
+            out.append(round(a + gap * k / n, 6))
+    return out
+
+
+def write_ffconcat(list_path: str, image_path: str, boundaries: Sequence[float]) -> int:
+    """
+    boundaries の各区間を image_path で埋める ffconcat を書く。フレーム数を返す
+    """
+    img = os.path.abspath(image_path).replace("\\", "/")
+    n = 0
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        for a, b in zip(boundaries, boundaries[1:]):
+            f.write(f"file '{img}'\n")
+            f.write(TIMEBASE_OPTION)
+            f.write(f"duration {b - a:.6f}\n")
+            n += 1
+        # concat demuxer は最後の duration を無視するので、最後のファイルをもう一度書く
+        f.write(f"file '{img}'\n")
+        f.write(TIMEBASE_OPTION)
+    return n
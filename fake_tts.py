@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Google TTS のローカル代用品（ネットワーク・課金なしで動作確認/計測するため）
+
+texttospeech.TextToSpeechClient と同じ呼び方ができる:
+    client.synthesize_speech(input=..., voice=..., audio_config=...)
+    client.synthesize_speech(request=SynthesizeSpeechRequest(..., enable_time_pointing=[SSML_MARK]))
+
+- テキスト: 1文字あたり sec_per_char 秒のトーンを返す
+- SSML  : <break time="..."/> は無音、<mark name="..."/> はタイムポイントとして返す
+- LINEAR16 なら WAV、MP3 なら ffmpeg でエンコード（ffmpeg が必要）
+- latency 秒だけ待ってから返す（ネットワーク往復の代わり）
+- エラー注入（tts_client.RetryingTTSClient の確認用）:
+    error_rate     … この確率で error_codes のどれかを上げる（FAKE_TTS_ERROR_RATE）
+    fail_first     … 最初の N 回は必ず失敗（FAKE_TTS_FAIL_FIRST）
+    max_concurrent … 同時にこれ以上来たら RESOURCE_EXHAUSTED（FAKE_TTS_MAX_CONCURRENT、0 で無効）
+
+使い方:  環境変数 TTS_BACKEND=fake で google_txt2tts_srt_mp4_jp.py がこれを使う
+"""
+
+import io
+import os
+import re
+import math
+import time
+import random
+import wave
+import threading
+import subprocess
+from typing import List, NamedTuple, Optional, Tuple
+
+DEFAULT_SEC_PER_CHAR = float(os.environ.get("FAKE_TTS_SEC_PER_CHAR", "0.12"))
+DEFAULT_LATENCY = float(os.environ.get("FAKE_TTS_LATENCY", "0.0"))
+DEFAULT_ERROR_RATE = float(os.environ.get("FAKE_TTS_ERROR_RATE", "0.0"))
+DEFAULT_FAIL_FIRST = int(os.environ.get("FAKE_TTS_FAIL_FIRST", "0"))
+DEFAULT_MAX_CONCURRENT = int(os.environ.get("FAKE_TTS_MAX_CONCURRENT", "0"))
+
+_TOKEN = re.compile(r'<mark\s+name="([^"]*)"\s*/>|<break\s+time="(\d+(?:\.\d+)?)(ms|s)"\s*/>|<[^>]+>|([^<]+)')
+
+
+class Timepoint(NamedTuple):
+    mark_name: str
+    time_seconds: float
+
+
+class FakeResponse(NamedTuple):
+    audio_content: bytes
+    timepoints: List[Timepoint]
+
+
+class FakeStatusCode(NamedTuple):
+    name: str
+
+
+class FakeAPIError(Exception):
+    """
+    google.api_core の例外と同じく grpc_status_code を持つ
+    """
+
+    def __init__(self, status: str):
+        super().__init__(f"fake_tts: {status}")
+        self.grpc_status_code = FakeStatusCode(status)
+
+
+def _unescape(s: str) -> str:
+    return s.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+def _plan(text: str, ssml: str, sec_per_char: float) -> Tuple[List[Tuple[str, float]], List[Timepoint]]:
+    """
+    ('tone'|'silence', 秒) の並びとタイムポイントを作る
+    """
+    segs: List[Tuple[str, float]] = []
+    tps: List[Timepoint] = []
+    if not ssml:
+        segs.append(("tone", len(text.strip()) * sec_per_char))
+        return segs, tps
+
+    t = 0.0
+    for m in _TOKEN.finditer(ssml):
+        mark, brk, unit, body = m.group(1), m.group(2), m.group(3), m.group(4)
+        if mark is not None:
+            tps.append(Timepoint(mark, t))
+        elif brk is not None:
+            d = float(brk) / (1000.0 if unit == "ms" else 1.0)
+            segs.append(("silence", d))
+            t += d
+        elif body is not None:
+            d = len(_unescape(body).strip()) * sec_per_char
+            if d > 0:
+                segs.append(("tone", d))
+                t += d
+    return segs, tps
+
+
+_tone_cache = {}
+
+
+def _tone(sample_rate: int) -> bytes:
+    # 1秒分のトーン（220Hz はちょうど1秒で位相が戻るので、繰り返してもつながる）
+    if sample_rate not in _tone_cache:
+        _tone_cache[sample_rate] = b"".join(
+            int(3000 * math.sin(2 * math.pi * 220 * i / sample_rate)).to_bytes(2, "little", signed=True)
+            for i in range(sample_rate)
+        )
+    return _tone_cache[sample_rate]
+
+
+def _render_pcm(segs: List[Tuple[str, float]], sample_rate: int) -> bytes:
+    tone = _tone(sample_rate)
+    out = bytearray()
+    for kind, d in segs:
+        n = int(round(d * sample_rate))
+        if kind == "silence":
+            out += b"\x00\x00" * n
+        else:
+            out += (tone * (n // sample_rate + 1))[:2 * n]
+    return bytes(out)
+
+
+def _wav(pcm: bytes, sample_rate: int) -> bytes:
+    b = io.BytesIO()
+    with wave.open(b, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm)
+    return b.getvalue()
+
+
+def _mp3(pcm: bytes, sample_rate: int) -> bytes:
+    r = subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+        "-c:a", "libmp3lame", "-q:a", "4", "-f", "mp3", "pipe:1",
+    ], input=pcm, capture_output=True)
+    if r.returncode != 0:
+        raise RuntimeError("fake_tts: ffmpeg mp3 encode failed: " + r.stderr.decode("utf-8", "replace"))
+    return r.stdout
+
+
+def _encoding_name(audio_config) -> str:
+    enc = getattr(audio_config, "audio_encoding", None)
+    return getattr(enc, "name", str(enc or "MP3")).upper()
+
+
+class FakeTextToSpeechClient:
+    def __init__(self, sec_per_char: float = DEFAULT_SEC_PER_CHAR, latency: float = DEFAULT_LATENCY,
+                 error_rate: float = DEFAULT_ERROR_RATE, fail_first: int = DEFAULT_FAIL_FIRST,
+                 max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+                 error_codes: Tuple[str, ...] = ("RESOURCE_EXHAUSTED", "UNAVAILABLE"),
+                 seed: Optional[int] = None, **_kwargs):
+        self.sec_per_char = sec_per_char
+        self.latency = latency
+        self.error_rate = error_rate
+        self.fail_first = fail_first
+        self.max_concurrent = max_concurrent
+        self.error_codes = error_codes
+        self.calls = 0
+        self.chars = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _maybe_fail(self) -> None:
+        with self._lock:
+            if self.max_concurrent and self.in_flight > self.max_concurrent:
+                status = "RESOURCE_EXHAUSTED"
+            elif self.calls <= self.fail_first or self._rng.random() < self.error_rate:
+                status = self._rng.choice(self.error_codes)
+            else:
+                return
+            self.errors += 1
+        raise FakeAPIError(status)
+
+    def synthesize_speech(self, request=None, *, input=None, voice=None, audio_config=None, **_kwargs):
+        if request is not None:
+            input = request.input
+            audio_config = request.audio_config
+
+        text = getattr(input, "text", "") or ""
+        ssml = getattr(input, "ssml", "") or ""
+        with self._lock:
+            self.calls += 1
+            self.chars += len(text or ssml)
+            self.in_flight += 1
+
+        try:
+            if self.latency > 0:
+                time.sleep(self.latency)
+            self._maybe_fail()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        sample_rate = int(getattr(audio_config, "sample_rate_hertz", 0) or 24000)
+        segs, tps = _plan(text, ssml, self.sec_per_char)
+        pcm = _render_pcm(segs, sample_rate)
+
+        if "LINEAR16" in _encoding_name(audio_config):
+            data = _wav(pcm, sample_rate)
+        else:
+            data = _mp3(pcm, sample_rate)
+        return FakeResponse(data, tps)
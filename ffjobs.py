@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+ffmpeg / ffprobe の小さいジョブをまとめて並列実行する
+
+- ワーカー数は既定で CPU コア数
+- ジョブごとに stdout/stderr を保持（失敗時にそのジョブの stderr だけ見られる）
+- 失敗はまとめて FFJobsError で報告（1件目で止めずに全件の結果を出す）
+- 同一ジョブはメモ化：同じ key（省略時はコマンド列そのもの）は1回しか起動しない
+  例) 同じ長さ・同じサンプルレートの無音 mp3 は1本だけ作って使い回す
+
+単体でも使える（PowerShell 側から複数ファイルを一度に ffprobe したいとき）:
+    python ffjobs.py probe a.mp4 b.mp4 ...
+    → JSON で {path: {"duration": 秒, "has_audio": true/false}} を出力
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+
+class JobResult(NamedTuple):
+    cmd: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    elapsed: float
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+class FFJobsError(RuntimeError):
+    def __init__(self, failures: List[JobResult]):
+        self.failures = failures
+        super().__init__(f"{len(failures)} job(s) failed")
+
+    def report(self) -> str:
+        out = [f"❌ コマンド失敗: {len(self.failures)}件"]
+        for r in self.failures:
+            out.append("   " + " ".join(r.cmd))
+            out.append(f"---- stderr (exit={r.returncode}) ----")
+            out.append(r.stderr.rstrip())
+        return "\n".join(out)
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def _run(cmd: List[str]) -> JobResult:
+    t0 = time.perf_counter()
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+        code, out, err = r.returncode, r.stdout, r.stderr
+    except OSError as e:
+        # ffmpeg が PATH に無い等
+        code, out, err = -1, "", str(e)
+    return JobResult(list(cmd), code, out, err, time.perf_counter() - t0)
+
+
+class FFJobs:
+    """
+    使い方:
+        with FFJobs() as jobs:
+            jobs.submit([...])
+            jobs.submit([...], key=("silence", 0.25, 24000))
+        # with を抜けると全ジョブ完了を待ち、失敗があれば FFJobsError
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or default_workers()
+        self._ex = ThreadPoolExecutor(max_workers=self.workers)
+        self._memo: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.launched = 0
+        self.reused = 0
+
+    def submit(self, cmd: Sequence[str], key: Optional[Hashable] = None) -> "Future[JobResult]":
+        k = key if key is not None else tuple(cmd)
+        with self._lock:
+            fut = self._memo.get(k)
+            if fut is not None:
+                self.reused += 1
+                return fut
+            fut = self._ex.submit(_run, list(cmd))
+            self._memo[k] = fut
+            self.launched += 1
+            return fut
+
+    def run_all(self, cmds: Sequence[Sequence[str]]) -> List[JobResult]:
+        """
+        まとめて投入して、入力順に結果を返す（失敗があれば FFJobsError）
+        """
+        futs = [self.submit(c) for c in cmds]
+        results = [f.result() for f in futs]
+        failures = [r for r in results if not r.ok]
+        if failures:
+            raise FFJobsError(failures)
+        return results
+
+    def wait(self) -> List[JobResult]:
+        with self._lock:
+            futs = list(self._memo.values())
+        results = [f.result() for f in futs]
+        failures = [r for r in results if not r.ok]
+        if failures:
+            raise FFJobsError(failures)
+        return results
+
+    def close(self) -> None:
+        self._ex.shutdown(wait=True)
+
+    def __enter__(self) -> "FFJobs":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self.close()
+
+
+# ================== ffprobe まとめ実行 ==================
+def probe_many(paths: Sequence[str], ffprobe: str = "ffprobe", workers: Optional[int] = None) -> Dict[str, dict]:
+    """
+    各ファイルの duration と音声ストリーム有無を並列で取得する
+    """
+    with FFJobs(workers) as jobs:
+        dur = {p: jobs.submit([ffprobe, "-v", "error", "-show_entries", "format=duration",
+                               "-of", "default=noprint_wrappers=1:nokey=1", p]) for p in paths}
+        aud = {p: jobs.submit([ffprobe, "-v", "error", "-select_streams", "a:0",
+                               "-show_entries", "stream=index", "-of", "csv=p=0", p]) for p in paths}
+
+        out: Dict[str, dict] = {}
+        for p in paths:
+            d = dur[p].result()
+            a = aud[p].result()
+            try:
+                duration = float(d.stdout.strip())
+            except ValueError:
+                duration = None
+            out[p] = {"duration": duration, "has_audio": bool(a.stdout.strip())}
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "probe":
+        sys.exit("usage: ffjobs.py probe file1 [file2 ...]")
+    try:
+        print(json.dumps(probe_many(sys.argv[2:]), ensure_ascii=False, indent=2))
+    except FFJobsError as e:
+        print(e.report(), file=sys.stderr)
+        sys.exit(1)
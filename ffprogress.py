@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+ffmpeg を -progress pipe:1 付きで実行し、エンコードの進み具合（out_time / fps / speed / bitrate）を
+読みながら 進捗% と残り時間(ETA) を表示する。終わったら1回分の計測値を JSONL に追記する
+
+    stats = run(cmd, total_duration=812.4, label="MP4", metrics_path="_encode_metrics.jsonl")
+    print(stats.speed, stats.fps)
+
+- total_duration は generate_srt が返す想定総尺（音声の長さ）。0 なら % と ETA は出さない
+- ETA は「ここまでに進んだ尺 / 経過時間」の平均速度で残りの尺を割ったもの
+- ffmpeg のログ（stderr）は裏で読み捨て、失敗したときだけ末尾を表示する（safe_run と同じ出し方）
+- tracing が有効なら、呼び出し元のスパンに speed / fps / bitrate / size を書き込む
+- 記録する out_time は ffmpeg が報告した値そのまま。想定総尺より大きく短ければ short_by（足りない秒数）に入れて警告する
+"""
+
+import json
+import time
+import threading
+import subprocess
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import tracing
+
+STDERR_TAIL_LINES = 60
+SHORT_TOLERANCE_SEC = 1.0      # out_time が想定総尺よりこれ以上（かつ下の割合以上）短ければ「短い」とみなす
+SHORT_TOLERANCE_RATIO = 0.02
+
+
+class EncodeStats(NamedTuple):
+    label: str
+    output: str
+    total_duration: float
+    out_time: float          # エンコードし終えた尺（秒）
+    wall: float              # 実時間（秒）
+    speed: float             # 平均速度（尺 / 実時間。2.0 なら実時間の2倍速）
+    fps: float               # 平均 fps（フレーム数 / 実時間）
+    frames: int
+    bitrate_kbps: float      # ffmpeg が最後に報告したビットレート
+    size_bytes: int
+    returncode: int
+    short_by: float          # 想定総尺に足りない秒数（許容範囲内なら 0）
+
+    def line(self) -> str:
+        return (f"{self.label}: 尺 {self.out_time:.1f}秒 / 実時間 {self.wall:.1f}秒 / 速度 {self.speed:.2f}x / "
+                f"{self.fps:.1f} fps / {self.frames} フレーム / {self.bitrate_kbps:.0f} kbit/s / "
+                f"{self.size_bytes / 1024 / 1024:.1f} MB")
+
+
+def short_by(out_time: float, total_duration: float) -> float:
+    """
+    out_time が想定総尺より大きく短ければ、その差（秒）。許容範囲内なら 0
+    """
+    gap = total_duration - out_time
+    if total_duration <= 0 or gap <= max(SHORT_TOLERANCE_SEC, total_duration * SHORT_TOLERANCE_RATIO):
+        return 0.0
+    return round(gap, 3)
+
+
+def progress_cmd(cmd: List[str]) -> List[str]:
+    """
+    ffmpeg の直後に -progress pipe:1 -nostats を差し込む（同じ指定が既にあればそのまま）
+    """
+    if "-progress" in cmd:
+        return list(cmd)
+    return [cmd[0], "-progress", "pipe:1", "-nostats"] + list(cmd[1:])
+
+
+def _float(v: Optional[str], suffix: str = "") -> float:
+    if not v or v == "N/A":
+        return 0.0
+    if suffix and v.endswith(suffix):
+        v = v[:-len(suffix)]
+    try:
+        return float(v)
+    except ValueError:
+        return 0.0
+
+
+def _out_time(block: Dict[str, str]) -> float:
+    # out_time_ms も中身はマイクロ秒（ffmpeg の歴史的な名前）
+    for k in ("out_time_us", "out_time_ms"):
+        v = block.get(k)
+        if v and v != "N/A":
+            try:
+                return max(0.0, int(v) / 1e6)
+            except ValueError:
+                pass
+    return 0.0
+
+
+def fmt_clock(sec: float) -> str:
+    sec = int(max(0.0, sec))
+    h, rem = divmod(sec, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02}:{s:02}" if h else f"{m}:{s:02}"
+
+
+def progress_line(label: str, out_time: float, total: float, elapsed: float, block: Dict[str, str]) -> str:
+    rate = out_time / elapsed if elapsed > 0 else 0.0
+    parts = [f"   {label}"]
+    if total > 0:
+        parts.append(f"{min(100.0, out_time / total * 100):5.1f}%")
+        parts.append(f"{fmt_clock(out_time)}/{fmt_clock(total)}")
+    else:
+        parts.append(fmt_clock(out_time))
+    parts.append(f"速度 {block.get('speed', 'N/A').strip()}")
+    parts.append(f"fps {block.get('fps', 'N/A')}")
+    parts.append(f"{block.get('bitrate', 'N/A').strip()}")
+    if total > 0 and rate > 0:
+        parts.append(f"残り {fmt_clock((total - out_time) / rate)}")
+    return " ".join(parts)
+
+
+def append_metrics(path: str, stats: EncodeStats, cmd: List[str]) -> None:
+    rec = dict(stats._asdict())
+    rec["time"] = time.strftime("%Y-%m-%d %H:%M:%S")
+    rec["cmd"] = " ".join(cmd)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+def run(
+    cmd: List[str],
+    total_duration: float = 0.0,
+    label: str = "エンコード",
+    interval: float = 5.0,
+    metrics_path: str = "",
+    on_progress: Optional[Callable[[float, Dict[str, str]], None]] = None,
+) -> EncodeStats:
+    """
+    cmd（ffmpeg の引数列、最後が出力ファイル）を進捗付きで実行する。失敗したら RuntimeError
+    on_progress(out_time, block) は ffmpeg が進捗を出すたび（既定 0.5 秒ごと）に呼ばれる
+    """
+    full = progress_cmd(cmd)
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        full, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.DEVNULL,
+        text=True, encoding="utf-8", errors="replace",
+    )
+
+    # stderr を読まないとパイプが詰まって ffmpeg が止まるので裏で読み、末尾だけ残す
+    tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+    drain = threading.Thread(target=lambda: tail.extend(proc.stderr), daemon=True)
+    drain.start()
+
+    block: Dict[str, str] = {}
+    last: Dict[str, str] = {}
+    out_time = 0.0
+    last_print = t0
+    for raw in proc.stdout:
+        key, sep, value = raw.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value.strip()
+        if key != "progress":
+            continue
+        # progress=continue / end で1回分の報告がそろう
+        last = block
+        block = {}
+        out_time = max(out_time, _out_time(last))
+        if on_progress:
+            on_progress(out_time, last)
+        now = time.perf_counter()
+        if now - last_print >= interval or last.get("progress") == "end":
+            print(progress_line(label, out_time, total_duration, now - t0, last))
+            last_print = now
+
+    returncode = proc.wait()
+    drain.join(timeout=5)
+    wall = time.perf_counter() - t0
+
+    if returncode != 0:
+        print("❌ コマンド失敗:")
+        print("   " + " ".join(cmd))
+        print("---- stderr ----")
+        print("".join(tail))
+        raise RuntimeError("command failed")
+
+    frames = int(_float(last.get("frame")))
+    stats = EncodeStats(
+        label=label,
+        output=cmd[-1],
+        total_duration=round(total_duration, 3),
+        out_time=round(out_time, 3),
+        wall=round(wall, 3),
+        speed=round(out_time / wall, 3) if wall > 0 else 0.0,
+        fps=round(frames / wall, 2) if wall > 0 else 0.0,
+        frames=frames,
+        bitrate_kbps=round(_float(last.get("bitrate"), "kbits/s"), 1),
+        size_bytes=int(_float(last.get("total_size"))),
+        returncode=returncode,
+        short_by=short_by(out_time, total_duration),
+    )
+    print(f"   {stats.line()}")
+    if stats.short_by:
+        print(f"   ⚠ {label}: 出力の尺 {out_time:.1f}秒 が想定 {total_duration:.1f}秒 より {stats.short_by:.1f}秒 短い"
+              f"（VFR の cue 描画では最後の映像フレームの時刻で止まることがある。中身を確認してください）")
+    tracing.annotate(speed=stats.speed, fps=stats.fps, frames=frames,
+                     bitrate_kbps=stats.bitrate_kbps, encoded_bytes=stats.size_bytes, short_by=stats.short_by)
+    if metrics_path:
+        append_metrics(metrics_path, stats, cmd)
+    return stats
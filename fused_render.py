@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+背景・字幕・オーバーレイ・BGM を1本の filter_complex で描画する（エンコード1回、中間 MP4 なし）
+
+従来の本番チェーン（毎回フル再エンコード）:
+    make_mp4（字幕）→ overlay11.ps1（オーバーレイ）→ add-BGM-*.ps1（BGM）
+ここでは同じ処理を1つのグラフにまとめる:
+
+    [0:v] 背景 → subtitles ─────────────┐
+    [2:v] オーバーレイ(ループ) → scale2ref(背景幅×ratio) → alpha ─ overlay → [vout]
+    [1:a] TTS音声 ─┐
+    [3:a] BGM(ループ) → volume ─ amix(duration=first) → [aout]
+
+- オーバーレイの大きさ/透明度/位置は overlay11.ps1 の OverlayRatio / OverlayAlpha / OverlayFrom / Margin と同じ意味
+- BGM の音量とファイルは add-BGM-<theme>.ps1 と同じ（BGM_PRESETS）
+- ffmpeg に渡す引数列を返すだけなので、実行は呼び出し側（safe_run 等）で行う
+"""
+
+import os
+import glob
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+OVERLAY_ROOT_BASE = r"D:\images_for_slide_show"
+
+# overlay11.ps1 の $OverlayFolderMap と同じ（theme-from → フォルダ）
+OVERLAY_FOLDERS: Dict[str, str] = {
+    f"{theme}-{frm}": os.path.join(OVERLAY_ROOT_BASE, f"MP4s-{theme}", frm)
+    for theme in ("dark", "light", "epilogue")
+    for frm in ("left", "right", "center")
+}
+
+# add-BGM-*.ps1 と同じ（ファイル または フォルダ=ランダムに1曲, BGM音量）
+BGM_PRESETS: Dict[str, Tuple[str, float]] = {
+    "dark":     (r"D:\ecobiz-youtube-uploader\google-trans\MP3s\dark-fall.mp3", 0.4),
+    "ghost":    (r"D:\ecobiz-youtube-uploader\google-trans\MP3s\ghost.mp3", 0.3),
+    "silent":   (r"D:\ecobiz-youtube-uploader\google-trans\MP3s\silent.mp3", 0.4),
+    "epilogue": (r"D:\images_for_slide_show\MP3s\epilogue", 0.3),
+    "twilight": (r"D:\images_for_slide_show\MP3s\twilight", 0.12),
+}
+
+
+class OverlaySpec(NamedTuple):
+    path: str
+    ratio: float = 0.3       # 背景の横幅に対するオーバーレイの横幅
+    alpha: float = 0.6
+    from_: str = "left"      # left / right / center
+    margin: int = 10
+
+
+class BgmSpec(NamedTuple):
+    path: str
+    volume: float = 0.4
+    voice_volume: float = 1.0
+
+
+# ================== 素材の選択 ==================
+def pick_overlay(theme: str, from_: str, root_base: str = OVERLAY_ROOT_BASE) -> str:
+    key = f"{theme}-{from_}"
+    d = OVERLAY_FOLDERS.get(key) or os.path.join(root_base, f"MP4s-{theme}", from_)
+    cands = glob.glob(os.path.join(d, "*.mp4"))
+    if not cands:
+        raise FileNotFoundError(f"オーバーレイ動画がありません: {d}")
+    return random.choice(cands)
+
+
+def bgm_for_theme(theme: str) -> BgmSpec:
+    path, volume = BGM_PRESETS[theme]
+    if os.path.isdir(path):
+        cands = glob.glob(os.path.join(path, "*.mp3"))
+        if not cands:
+            raise FileNotFoundError(f"BGMファイルが見つかりません: {path}")
+        path = random.choice(cands)
+    return BgmSpec(path, volume)
+
+
+# ================== グラフ ==================
+def overlay_xy(from_: str, margin: int) -> Tuple[str, str]:
+    if from_ == "right":
+        return f"main_w-overlay_w-{margin}", f"{margin}"
+    if from_ == "center":
+        return "(main_w-overlay_w)/2", f"{margin}"
+    return f"{margin}", f"{margin}"
+
+
+def build_filter_complex(
+    subtitle_vf: str,
+    overlay: Optional[OverlaySpec] = None,
+    bgm: Optional[BgmSpec] = None,
+    bg_index: int = 0,
+    audio_index: int = 1,
+    overlay_index: int = 2,
+    bgm_index: int = 3,
+) -> Tuple[str, str, str]:
+    """
+    (filter_complex, 映像ラベル, 音声ラベル) を返す。音声ラベルは BGM なしなら "1:a" のような入力指定
+    """
+    parts: List[str] = []
+
+    vlabel = "[vsub]"
+    parts.append(f"[{bg_index}:v]{subtitle_vf}{vlabel}")
+
+    if overlay:
+        x, y = overlay_xy(overlay.from_, overlay.margin)
+        parts.append(f"[{overlay_index}:v]{vlabel}scale2ref=w=main_w*{overlay.ratio}:h=ow/a[ovl][base]")
+        parts.append(f"[ovl]format=yuva420p,colorchannelmixer=aa={overlay.alpha}[ovla]")
+        parts.append(f"[base][ovla]overlay=x={x}:y={y}:format=auto[vout]")
+        vlabel = "[vout]"
+
+    alabel = f"{audio_index}:a"
+    if bgm:
+        parts.append(f"[{audio_index}:a]aformat=channel_layouts=stereo,volume={bgm.voice_volume}[v0]")
+        parts.append(f"[{bgm_index}:a]aformat=channel_layouts=stereo,volume={bgm.volume}[bgm]")
+        parts.append("[v0][bgm]amix=inputs=2:duration=first:dropout_transition=2:normalize=1[aout]")
+        alabel = "[aout]"
+
+    return ";".join(parts), vlabel, alabel
+
+
+def build_command(
+    background: List[str],
+    audio: str,
+    subtitle_vf: str,
+    mp4_out: str,
+    total_duration: float,
+    overlay: Optional[OverlaySpec] = None,
+    bgm: Optional[BgmSpec] = None,
+    preset: str = "veryfast",
+    crf: int = 23,
+    extra_args: Optional[List[str]] = None,
+) -> List[str]:
+    """
+    background は背景入力の ffmpeg 引数（例: ["-f", "lavfi", "-i", "color=c=black:s=1920x1080:r=30"]）
+    extra_args は出力側に足す引数（cue 背景なら ["-vsync", "vfr", "-tune", "stillimage"]）
+    """
+    cmd = ["ffmpeg", "-y"] + background + ["-i", audio]
+    idx = 2
+    overlay_index = bgm_index = -1
+    if overlay:
+        cmd += ["-stream_loop", "-1", "-i", overlay.path]
+        overlay_index, idx = idx, idx + 1
+    if bgm:
+        cmd += ["-stream_loop", "-1", "-i", bgm.path]
+        bgm_index = idx
+
+    fc, vlabel, alabel = build_filter_complex(
+        subtitle_vf, overlay, bgm,
+        overlay_index=overlay_index, bgm_index=bgm_index,
+    )
+    cmd += [
+        "-filter_complex", fc,
+        "-map", vlabel, "-map", alabel,
+    ] + (extra_args or []) + [
+        "-c:v", "libx264", "-preset", preset, "-crf", str(crf),
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "192k",
+        "-t", f"{total_duration:.3f}",
+        "-movflags", "+faststart",
+        mp4_out,
+    ]
+    return cmd
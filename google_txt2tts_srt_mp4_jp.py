@@ -10,31 +10,156 @@ txt → 文分割 → Google TTS(文ごと) → (文間ポーズ無音を挿入
 重要:
 - MP4の音声は「結合した1本のmp3」を使用（1文目だけ問題を解消）
 - SRT時刻は 00:00:00,000 形式で正しく生成（60秒超でも壊れない）
-- subtitlesのパス地雷回避：SRTを _tts_tmp/sub.srt にコピーして渡す
+- subtitlesのパス地雷回避：SRTを 作業フォルダ/sub.srt にコピーして渡す
+- ★OUTPUT_PROFILES=["wide", "short", ...]：TTS/音声/字幕時刻は1回だけ作り、解像度・改行幅・文字サイズ・テーマ違いの MP4 を並行して出す（render_profiles.py）
+- ★RENDER_MODE="cue"（選択・試験的）：字幕の出入りの瞬間だけフレームを出す VFR（既定は従来の 30fps = "legacy"）
+- ★CUE_IMAGES=True（選択・試験的）：30fps で描くとき（legacy / オーバーレイ付き）、字幕は1件ずつ透過 PNG にしてキャッシュし、背景に重ねるだけ（cue_images.py）
+    * 既定は False（従来どおり subtitles= で焼き込む）
+- ★SUBTITLE_MODE="soft"/"sidecar"：字幕を焼き込まず（mov_text トラック / 横の .srt）、映像は作り置きの背景をコピー（soft_subs.py）
+- ★作業フォルダは実行ごとに一意（既定は RAM 上の /dev/shm、空きが足りなければディスク。scratch.py）
 - ★字幕ズレ防止：SRTに入れたポーズ秒と同じ無音をMP3側にも挿入して同期
 - ★ffmpegの -loop 問題回避：lavfi color を使い -loop を使わない
+- ★AUDIO_ASSEMBLY="pcm"（選択）：LINEAR16 を PCM バッファで結合し WAV 1本に（ポーズはサンプル単位、エンコードは MP4 の1回だけ）
+    * 既定は従来どおり "mp3"（<base>.mp3 も出力する）。"pcm" では <base>.mp3 は作らない（WAV は作業フォルダで消える）
+- ★TTS_PACKING=True：連続する文を SSML 1リクエストにまとめ、<mark> のタイムポイントで文ごとの字幕時刻を出す
+- ★STREAM_RENDER=True：TTS の結果が届いた順に音声をエンコーダへ流し、字幕と映像区間も並行して作る（所要 ≒ max(TTS, エンコード)）
+- ★OVERLAY_* / BGM_*：オーバーレイと BGM も同じ1回のエンコードで入れる（overlay11.ps1 / add-BGM-*.ps1 の再エンコード不要）
+- TTS_BACKEND=fake でローカルの代用 TTS（fake_tts.py）を使う（ネットワーク・課金なしの確認用）
+- MP4 のエンコードは -progress で 進捗% / 速度 / 残り時間 を表示し、終わったら計測値を ENCODE_METRICS_PATH に追記（ffprogress.py）
+- TTS_TRACE_DIR=フォルダ で工程/TTSリクエストごとの計測を Chrome trace(JSON) と JSONL に書き出す（tracing.py）
 """
 
 import os
 import sys
-import re
 import shutil
-import random
 import subprocess
-import chardet
+import threading
 import time
-from typing import List, Tuple
-
-from google.cloud import texttospeech
-from mutagen.mp3 import MP3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# google.cloud.texttospeech は読み込みだけで 0.4 秒ほどかかるので、TTS を呼ぶ関数の中で import する
+# （引数の確認や --help、キャッシュだけで済む実行を待たせない。bench_startup.py で計測）
+# numpy を使う pcm_assemble / stream_render も、AUDIO_ASSEMBLY="pcm" / STREAM_RENDER=True の経路の中で import する
+import jp_segment
+import tracing
+import ffprogress
+from text_encoding import read_text
+from tts_pool import run_ordered, iter_ordered, longest_first
+from tts_client import RetryingTTSClient
+from tts_cache import TTSCache, cache_key, pick_voice
+from mp3_frames import mp3_duration
+from ffjobs import FFJobs, FFJobsError
+from cue_render import cue_boundaries, write_ffconcat
+from tts_manifest import Manifest, manifest_name
+from ssml_pack import Pack, pack_sentences, sentence_timings
+from fused_render import BgmSpec, OverlaySpec, bgm_for_theme, build_command, pick_overlay
+from scratch import Scratch, estimate_bytes
+from render_profiles import Profile, get_profile
+import soft_subs
+import cue_images
 
 # ================== 設定 ==================
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"D:\central-web-428404-n2-6a98d3a64225.json"
-TMP_DIR = "_tts_tmp"
+TMP_DIR = "_tts_tmp"   # run_pipeline が実行ごとの作業フォルダに置き換える
+
+# 作業フォルダの置き場所（"" なら /dev/shm → 空きが足りなければ OS の一時フォルダ）と片付け方
+#   "always"=必ず消す / "on_success"=失敗したら残す（中身を調べる用） / "never"=残す
+SCRATCH_ROOT = os.environ.get("TTS_SCRATCH_ROOT", "")
+SCRATCH_CLEANUP = os.environ.get("TTS_SCRATCH_CLEANUP", "always")
 
-SRT_WRAP_CHARS = 25
+SRT_WRAP_CHARS = 25   # wide プロファイルの改行幅
 MAX_TTS_CHARS_PER_CHUNK = 160
 
+# TTS同時リクエスト数（1 で従来どおり逐次）
+TTS_WORKERS = 4
+
+# TTS のレート制限とリトライ（tts_client.py）。一時エラー(429/503等)は指数バックオフ＋ジッタで再送し、
+# スロットリングされたら同時リクエスト数を自動で下げ、成功が続けば TTS_WORKERS まで戻す（AIMD。TTS_WORKERS を超えては増やさない）
+TTS_REQ_PER_SEC = 10.0
+TTS_CHARS_PER_MIN = 150_000
+TTS_MAX_RETRIES = 6
+
+# TTS音声キャッシュ（"" で無効）。_tts_tmp と違い実行後も残る
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".tts_cache"))
+TTS_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# SSMLパック: 連続する文を1リクエストにまとめ、<mark> のタイムポイントで文ごとの時刻を得る
+TTS_PACKING = False
+SSML_MAX_BYTES = 4500
+
+# 文単位マニフェスト（既定は "" で無効。フォルダを指定したときだけ使う）。失敗しても消さず、再実行時は変わった文だけ合成する
+# 音声は TTS キャッシュとは別に入力ファイルごとに残り、自動では消えない（tts_manifest.py）
+MANIFEST_DIR = os.environ.get("TTS_MANIFEST_DIR", "")
+
+# 声の選び方: "random"=毎回ランダム（従来どおり） / "hash"=文ごとに固定（キャッシュが効く。声の割り当ては変わる）
+VOICE_MODE = "random"
+
+# 音声の組み立て方
+#   "mp3": 従来どおり 無音mp3 + concat(再エンコード) → <base>.mp3 → MP4（既定）
+#   "pcm": TTSにLINEAR16を頼み、PCMバッファ上でポーズ(0サンプル)込みで1本に → MP4で1回だけエンコード
+#          （速いが <base>.mp3 は出力しない）
+AUDIO_ASSEMBLY = "mp3"
+SAMPLE_RATE = 24000
+
+# 映像の作り方
+#   "legacy": 従来どおり 30fps で全フレームをエンコード（既定。"cfr" も同じ）
+#   "cue": 字幕の出入りの瞬間だけフレームを出す VFR（静止背景向け、エンコードが桁違いに速い）
+#          試験的：ffconcat の framerate 1000 / setpts の補正 / -vsync vfr に頼るので、実際の出力で確認してから使う
+RENDER_MODE = "legacy"
+CUE_MAX_FRAME_GAP = 2.0  # cue モードで1フレームを表示し続ける最大秒数（シーク用）
+
+# 30fps で描く経路（RENDER_MODE="legacy" / オーバーレイ付き）の字幕を、字幕文ごとの透過 PNG（キャッシュ）を
+# 重ねて作る。False（既定）なら従来どおり subtitles= で毎フレーム描く（cue は境界フレームでしか描かないので対象外）
+# 試験的：ffconcat の framerate 1000 と -t で尺を決めるので、実際の出力で確認してから使う
+CUE_IMAGES = False
+CUE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tts_cue_cache")
+CUE_CACHE_MAX_BYTES = 512 * 1024 ** 2
+
+# 仕上げを MP4 生成と同じ1回のエンコードで行う（fused_render.py）
+#   overlay11.ps1 / add-BGM-*.ps1 で後から再エンコードする代わり。どちらも "" なら従来どおり
+OVERLAY_THEME = ""     # dark / light / epilogue（OVERLAY_PATH が空ならテーマのフォルダからランダム）
+OVERLAY_PATH = ""
+OVERLAY_FROM = "left"  # left / right / center
+OVERLAY_RATIO = 0.3    # 背景の横幅に対する比率（overlay11 の OverlayRatio）
+OVERLAY_ALPHA = 0.6    # overlay11 の OverlayAlpha
+OVERLAY_MARGIN = 10
+BGM_THEME = ""         # dark / ghost / silent / epilogue / twilight（add-BGM-<theme>.ps1 と同じ曲・音量）
+BGM_PATH = ""          # 指定があればこのファイルを BGM_VOLUME で
+BGM_VOLUME = 0.4
+FUSED_PRESET = "ultrafast"  # overlay11.ps1 の最終エンコードと同じ設定
+FUSED_CRF = 28
+
+# 出力プロファイル（render_profiles.py）。TTS と音声組み立ては1回で、プロファイルごとに SRT と MP4 を作る
+#   "wide"=1920x1080 → <base>.mp4 / "short"=720x1280 → <base>-short.mp4 / "wide-light" 等でテーマ違い
+OUTPUT_PROFILES = ["wide"]
+PROFILE_WORKERS = 2   # 同時にエンコードするプロファイル数
+
+# 字幕の入れ方（run_pipeline の subtitle_mode でジョブごとにも指定できる）
+#   "burn"=映像に焼き込む（従来） / "soft"=mov_text の字幕トラック / "sidecar"=MP4 に入れず <base>.srt を横に置く
+#   soft / sidecar は映像をエンコードしない（背景クリップを BG_CACHE_DIR に作り置きして -c copy）
+SUBTITLE_MODE = os.environ.get("TTS_SUBTITLE_MODE", "burn")
+BG_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tts_bg_cache")
+
+# ストリーミング描画: TTS と並行して 音声エンコード / SRT追記 / 映像区間エンコード を進める
+#   （映像は cue 方式で区間ごとに作り、最後に -c copy でつなぐだけ）
+STREAM_RENDER = False
+STREAM_SEGMENT_SEC = 60.0  # 映像を何秒ごとの区間でエンコードするか
+STREAM_WINDOW = 16         # TTS 結果の先読み上限（この件数ぶんしか音声を手元に持たない）
+
+# MP4 エンコードの進捗表示の間隔（秒）と、1回ごとの計測値（速度/fps/ビットレート等）の追記先（"" で記録しない）
+ENCODE_PROGRESS_SEC = 5.0
+ENCODE_METRICS_PATH = "_encode_metrics.jsonl"
+
+# 計測（"" で無効）。<入力名>_<日時>.trace.json（Perfetto/chrome://tracing 用）と trace.jsonl（追記、実行の比較用）
+TRACE_DIR = os.environ.get("TTS_TRACE_DIR", "")
+TRACE_FORMATS = ("chrome", "jsonl")
+
+# 同時実行の制限（バッチ実行時に batch_tts.py がプロセス間セマフォを差し込む）
+TTS_GATE = nullcontext()
+FFMPEG_GATE = nullcontext()
+
 PAUSE_SEC_DEFAULT = 0.10
 PAUSE_SEC = {
     "。": 0.25,
@@ -58,10 +183,6 @@ def fmt(sec: float) -> str:
     return f"{m:02}:{s:02}"
 
 # ================== ユーティリティ ==================
-def detect_encoding(path: str) -> str:
-    with open(path, "rb") as f:
-        return chardet.detect(f.read()).get("encoding") or "utf-8"
-
 def safe_run(cmd: List[str], quiet: bool = False) -> None:
     if quiet:
         r = subprocess.run(cmd, capture_output=True, text=True)
@@ -74,6 +195,10 @@ def safe_run(cmd: List[str], quiet: bool = False) -> None:
         return
     subprocess.run(cmd, check=True)
 
+def encode(cmd: List[str], total_duration: float, label: str = "MP4") -> ffprogress.EncodeStats:
+    # 長いエンコード用: 進捗% と残り時間を出しながら実行し、計測値を残す
+    return ffprogress.run(cmd, total_duration, label, ENCODE_PROGRESS_SEC, ENCODE_METRICS_PATH)
+
 def ffmpeg_escape_filter_path(path: str) -> str:
     # subtitlesフィルタ用: Windowsの D:\ の ":" を "\:" にする
     p = os.path.abspath(path).replace("\\", "/")
@@ -93,45 +218,13 @@ def srt_time(t: float) -> str:
     sec = total_s % 60
     return f"{h:02}:{m:02}:{sec:02},{ms:03}"
 
-def wrap_text(text: str, max_length: int = SRT_WRAP_CHARS) -> str:
-    lines = []
-    t = text.strip()
-    while len(t) > max_length:
-        idx = max(t.rfind("、", 0, max_length), t.rfind("。", 0, max_length))
-        if idx == -1:
-            idx = max_length
-        lines.append(t[:idx+1].strip())
-        t = t[idx+1:].strip()
-    lines.append(t)
-    return "\n".join([x for x in lines if x])
+def wrap_text(text: str, max_length: int = SRT_WRAP_CHARS, prefer_punct: bool = True) -> str:
+    return jp_segment.wrap_text(text, max_length, prefer_punct)
 
 # ================== テキスト処理 ==================
-def split_text_by_sentence(text: str) -> List[str]:
-    parts = re.split(r"(?<=[。！？])\s*", text)
-    return [p.strip() for p in parts if p.strip()]
-
-def split_long_sentence(s: str, max_chars: int = MAX_TTS_CHARS_PER_CHUNK) -> List[str]:
-    if len(s) <= max_chars:
-        return [s]
-    out, buf = [], ""
-    for ch in s:
-        buf += ch
-        if ch in "、。！？" and len(buf) >= int(max_chars * 0.6):
-            out.append(buf.strip())
-            buf = ""
-        elif len(buf) >= max_chars:
-            out.append(buf.strip())
-            buf = ""
-    if buf.strip():
-        out.append(buf.strip())
-    return out
-
 def normalize_sentences(text: str) -> List[str]:
-    base = split_text_by_sentence(text)
-    out: List[str] = []
-    for s in base:
-        out.extend(split_long_sentence(s))
-    return out
+    # 文分割 → 長文の分割（jp_segment: 線形時間・閉じ括弧/禁則対応）
+    return jp_segment.normalize_sentences(text, MAX_TTS_CHARS_PER_CHUNK)
 
 def infer_pause_seconds(sentence: str) -> float:
     if not sentence:
@@ -139,46 +232,238 @@ def infer_pause_seconds(sentence: str) -> float:
     return PAUSE_SEC.get(sentence[-1], PAUSE_SEC_DEFAULT)
 
 # ================== TTS ==================
-def tts_each_sentence(sentences: List[str], base: str) -> Tuple[List[float], List[str]]:
-    ensure_tmp()
-    client = texttospeech.TextToSpeechClient()
-    durations: List[float] = []
-    mp3s: List[str] = []
+_tts_clients: Dict[str, object] = {}
+
+def get_tts_client(beta: bool = False):
+    """
+    同じプロセス内では使い回す（バッチ実行で毎回作り直さない）
+    beta=True は SSML タイムポイント用の v1beta1 クライアント
+    環境変数 TTS_BACKEND=fake ならローカル代用品（fake_tts.py）を返す
+    """
+    kind = "fake" if os.environ.get("TTS_BACKEND") == "fake" else ("beta" if beta else "v1")
+    if kind not in _tts_clients:
+        if kind == "fake":
+            from fake_tts import FakeTextToSpeechClient
+            _tts_clients[kind] = FakeTextToSpeechClient()
+        elif kind == "beta":
+            from google.cloud import texttospeech_v1beta1
+            _tts_clients[kind] = texttospeech_v1beta1.TextToSpeechClient()
+        else:
+            from google.cloud import texttospeech
+            _tts_clients[kind] = texttospeech.TextToSpeechClient()
+    return _tts_clients[kind]
+
+def make_tts_client(beta: bool = False) -> RetryingTTSClient:
+    # 1回の実行（1ジョブ）ごとに作る。カウンタはその実行ぶん
+    return RetryingTTSClient(
+        get_tts_client(beta),
+        req_per_sec=TTS_REQ_PER_SEC,
+        chars_per_min=TTS_CHARS_PER_MIN,
+        max_retries=TTS_MAX_RETRIES,
+        concurrency=TTS_WORKERS,
+    )
+
+def make_audio_config(tts=None):
+    # AUDIO_ASSEMBLY="pcm" なら LINEAR16(WAV)、それ以外は MP3
+    if tts is None:
+        from google.cloud import texttospeech as tts
+    if AUDIO_ASSEMBLY == "pcm":
+        return tts.AudioConfig(
+            audio_encoding=tts.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE,
+        )
+    return tts.AudioConfig(audio_encoding=tts.AudioEncoding.MP3)
+
+def audio_seconds(data: bytes) -> float:
+    if data[:4] == b"RIFF":
+        from pcm_assemble import pcm_seconds
+        return pcm_seconds(data, SAMPLE_RATE)
+    return mp3_duration(data)
 
-    total = len(sentences)
-    print(f"🔊 TTS開始（{total}文）")
+class TTSJob(NamedTuple):
+    texts: List[str]          # リクエスト単位のテキスト（文そのもの、または SSML）
+    voices: List[str]
+    config_key: str
+    request_one: Callable[[int, str], Tuple[bytes, dict]]
+    packs: List[Pack]         # SSML パック時のみ
+    client: RetryingTTSClient
 
-    for i, s in enumerate(sentences, 1):
-        print(f"   TTS [{i:03}/{total:03}]")
-        voice_name = random.choice(JAPANESE_FEMALE_VOICES)
+def sentence_job(sentences: List[str]) -> TTSJob:
+    from google.cloud import texttospeech
 
+    client = make_tts_client()
+
+    # 声は文順に先に決めておく（並列の完了順に左右されないように）
+    voices = [pick_voice(s, JAPANESE_FEMALE_VOICES, VOICE_MODE) for s in sentences]
+    audio_config = make_audio_config(texttospeech)
+    config_key = texttospeech.AudioConfig.to_json(audio_config)
+
+    def request_one(idx: int, s: str) -> Tuple[bytes, dict]:
         resp = client.synthesize_speech(
             input=texttospeech.SynthesisInput(text=s),
-            voice=texttospeech.VoiceSelectionParams(language_code="ja-JP", name=voice_name),
-            audio_config=texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3),
+            voice=texttospeech.VoiceSelectionParams(language_code="ja-JP", name=voices[idx]),
+            audio_config=audio_config,
         )
+        return resp.audio_content, {}
+
+    return TTSJob(sentences, voices, config_key, request_one, [], client)
+
+def packed_job(sentences: List[str], pauses: List[float]) -> TTSJob:
+    from google.cloud import texttospeech_v1beta1 as tts_beta
+
+    client = make_tts_client(beta=True)
+    packs = pack_sentences(sentences, pauses, SSML_MAX_BYTES)
+    ssmls = [p.ssml for p in packs]
+    print(f"   SSMLパック: {len(sentences)}文 → {len(packs)}リクエスト")
+
+    voices = [pick_voice(x, JAPANESE_FEMALE_VOICES, VOICE_MODE) for x in ssmls]
+    audio_config = make_audio_config(tts_beta)
+    config_key = "ssml:" + tts_beta.AudioConfig.to_json(audio_config)
+
+    def request_one(idx: int, ssml: str) -> Tuple[bytes, dict]:
+        resp = client.synthesize_speech(request=tts_beta.SynthesizeSpeechRequest(
+            input=tts_beta.SynthesisInput(ssml=ssml),
+            voice=tts_beta.VoiceSelectionParams(language_code="ja-JP", name=voices[idx]),
+            audio_config=audio_config,
+            enable_time_pointing=[tts_beta.SynthesizeSpeechRequest.TimepointType.SSML_MARK],
+        ))
+        marks = {tp.mark_name: float(tp.time_seconds) for tp in resp.timepoints}
+        return resp.audio_content, {"marks": marks}
+
+    return TTSJob(ssmls, voices, config_key, request_one, packs, client)
+
+def synthesize(job: TTSJob, manifest: Optional[Manifest] = None,
+               stream: bool = False) -> Iterator[Tuple[int, Tuple[float, bytes, dict]]]:
+    """
+    job.texts を並列に合成して (番号, (長さ秒, 音声バイト列, extra)) を番号順に返す
+    マニフェスト → キャッシュ → API(request_one) の順に探す
+    stream=True なら先頭から届いた順に1件ずつ返す（長い順投入はせず、先読みは STREAM_WINDOW 件まで）
+    """
+    texts, voices, config_key = job.texts, job.voices, job.config_key
+    cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES) if TTS_CACHE_DIR else None
+    # ワーカースレッドのスパンは呼び出し元（tts 工程）のスパンにぶら下げる
+    parent = tracing.current()
+
+    def lookup(idx: int, s: str) -> Tuple[str, str, float, bytes, dict]:
+        # (出どころ, 実際の声, 長さ, 音声, extra)。マニフェストの音声は記録したときの声（voices[idx] とは限らない）
+        if manifest:
+            rec = manifest.lookup_entry(s, config_key)
+            if rec:
+                voice, data, duration, extra = rec
+                return "manifest", voice, duration, data, extra
+
+        key = cache_key(s, voices[idx], "ja-JP", config_key) if cache else ""
+        hit = cache.get_entry(key) if cache else None
+        if hit:
+            source = "cache"
+            data, duration, extra = hit
+        else:
+            source = "api"
+            data, extra = job.request_one(idx, s)
+            duration = audio_seconds(data)
+            if cache:
+                cache.put(key, data, duration, extra)
+
+        if manifest:
+            manifest.record(s, config_key, voices[idx], data, duration, extra)
+        return source, voices[idx], duration, data, extra
+
+    def synth(idx: int, s: str) -> Tuple[float, bytes, dict]:
+        with tracing.span("tts.request", parent=parent, index=idx, chars=len(s)) as sp:
+            source, voice, duration, data, extra = lookup(idx, s)
+            sp.set(source=source, voice=voice, bytes=len(data), seconds=round(duration, 3))
+        return duration, data, extra
+
+    def progress(done: int, n: int) -> None:
+        print(f"   TTS [{done:03}/{n:03}]")
+
+    print(f"🔊 TTS開始（{len(texts)}リクエスト / 同時{TTS_WORKERS}本）")
+    try:
+        if stream:
+            for i, r in iter_ordered(texts, synth, workers=TTS_WORKERS, window=STREAM_WINDOW):
+                progress(i + 1, len(texts))
+                yield i, r
+        else:
+            results = run_ordered(
+                texts, synth,
+                workers=TTS_WORKERS,
+                order=longest_first(texts),
+                on_done=progress,
+            )
+            yield from enumerate(results)
+    finally:
+        # 途中で落ちても、そこまでの分は次回使えるように書き出す
+        if manifest:
+            manifest.save()
+
+    print(f"   {job.client.summary()}")
+    if cache:
+        print(f"   キャッシュ: hit {cache.hits} / miss {cache.misses}")
+        cache.evict()
+    if manifest:
+        dropped = manifest.prune(texts, config_key)
+        print(f"   マニフェスト: 再利用 {manifest.reused} / 新規記録 {manifest.recorded} / 削除 {dropped}")
+
+def tts_each_sentence(sentences: List[str], manifest: Optional[Manifest] = None) -> Tuple[List[float], List[bytes]]:
+    """
+    文ごとに合成し、長さ(秒)のリストと音声バイト列のリストを文順で返す（ファイルには書かない）
+    長さはヘッダ/フレームから直接数える（書いて開き直さない）
+    manifest があれば記録済みの文はそこから使い、新しく得た音声は記録していく
+    """
+    results = [r for _, r in synthesize(sentence_job(sentences), manifest)]
+    durations = [d for d, _, _ in results]
+    audios = [a for _, a, _ in results]
+    return durations, audios
 
+def tts_packed(sentences: List[str], pauses: List[float], manifest: Optional[Manifest] = None
+               ) -> Tuple[List[Pack], List[float], List[bytes], List[Dict[str, float]]]:
+    """
+    連続する文を SSML にまとめて合成する版（TTS_PACKING=True）
+    パック一覧と、パックごとの 長さ / 音声 / マーク時刻{"s0": 秒, "e0": 秒, ...}（パック内の位置）を返す
+    """
+    job = packed_job(sentences, pauses)
+    results = [r for _, r in synthesize(job, manifest)]
+    durations = [d for d, _, _ in results]
+    audios = [a for _, a, _ in results]
+    marks = [x.get("marks", {}) for _, _, x in results]
+    return job.packs, durations, audios, marks
+
+def write_parts(audios: List[bytes], base: str) -> List[str]:
+    """
+    MP3結合など、ファイルが必要な工程の直前にだけ書き出す
+    """
+    ensure_tmp()
+    paths: List[str] = []
+    for i, data in enumerate(audios, 1):
         path = os.path.join(TMP_DIR, f"{base}_{i:03}.mp3")
         with open(path, "wb") as f:
-            f.write(resp.audio_content)
+            f.write(data)
+        paths.append(path)
+    return paths
 
-        audio = MP3(path)
-        durations.append(float(audio.info.length))
-        mp3s.append(path)
+# ================== 無音生成（ポーズ同期用） ==================
+SILENCE_SAMPLE_RATE = 24000
 
-    return durations, mp3s
+def silence_path(duration_sec: float) -> str:
+    # 同じ長さの無音は1本だけ作って使い回す（ファイル名を長さで決める）
+    ms = int(round(max(0.01, float(duration_sec)) * 1000))
+    return os.path.join(TMP_DIR, f"sil_{ms}ms_{SILENCE_SAMPLE_RATE}.mp3")
 
-# ================== 無音生成（ポーズ同期用） ==================
-def make_silence_mp3(duration_sec: float, out_path: str) -> None:
+def make_silence_mp3(duration_sec: float, out_path: str, jobs: Optional[FFJobs] = None) -> None:
     ensure_tmp()
     d = max(0.01, float(duration_sec))
-    safe_run([
+    cmd = [
         "ffmpeg", "-y",
-        "-f", "lavfi", "-i", "anullsrc=r=24000:cl=mono",
+        "-f", "lavfi", "-i", f"anullsrc=r={SILENCE_SAMPLE_RATE}:cl=mono",
         "-t", f"{d:.3f}",
         "-c:a", "libmp3lame", "-q:a", "4",
         out_path
-    ], quiet=True)
+    ]
+    if jobs is None:
+        safe_run(cmd, quiet=True)
+        return
+    # 並列実行＋メモ化（同じ長さ/サンプルレートなら起動しない）
+    jobs.submit(cmd, key=("silence", f"{d:.3f}", SILENCE_SAMPLE_RATE))
 
 # ================== MP3結合 ==================
 def concat_mp3(mp3_files: List[str], out_mp3: str) -> None:
@@ -201,121 +486,487 @@ def concat_mp3(mp3_files: List[str], out_mp3: str) -> None:
     ], quiet=True)
 
 # ================== SRT生成 ==================
-def generate_srt(sentences: List[str], durations: List[float], pauses: List[float], srt_out: str) -> float:
+def generate_srt(sentences: List[str], durations: List[float], pauses: List[float], srt_out: str,
+                 profile: Optional[Profile] = None) -> float:
+    width, punct = (profile.wrap_chars, profile.wrap_punct) if profile else (SRT_WRAP_CHARS, True)
     t = 0.0
     with open(srt_out, "w", encoding="utf-8") as f:
         for i, (s, d, p) in enumerate(zip(sentences, durations, pauses), 1):
             f.write(f"{i}\n")
             f.write(f"{srt_time(t)} --> {srt_time(t + d)}\n")
-            f.write(wrap_text(s) + "\n\n")
+            f.write(wrap_text(s, width, punct) + "\n\n")
             t += d + p
     return t
 
+def srt_cues(durations: List[float], pauses: List[float]) -> List[Tuple[float, float]]:
+    # generate_srt と同じ規則で (開始, 終了) 秒を返す
+    t = 0.0
+    cues: List[Tuple[float, float]] = []
+    for d, p in zip(durations, pauses):
+        cues.append((t, t + d))
+        t += d + p
+    return cues
+
 # ================== MP4生成 ==================
-def make_mp4(merged_mp3: str, srt_out: str, mp4_out: str) -> None:
+def output_profiles() -> List[Profile]:
+    profiles = [get_profile(n) for n in OUTPUT_PROFILES]
+    # wide の改行幅は従来どおり SRT_WRAP_CHARS で変えられる
+    return [p._replace(wrap_chars=SRT_WRAP_CHARS) if p.name.partition("-")[0] == "wide" else p for p in profiles]
+
+WIDE = get_profile("wide")
+
+def subtitle_vf(srt_out: str, safe_name: str = "sub.srt", profile: Profile = WIDE) -> str:
     ensure_tmp()
 
     # subtitles地雷回避：SRTを安全名でコピー
-    safe_srt = os.path.join(TMP_DIR, "sub.srt")
+    safe_srt = os.path.join(TMP_DIR, safe_name)
     shutil.copyfile(srt_out, safe_srt)
 
     srt_ff = ffmpeg_escape_filter_path(safe_srt)
-    vf = (
-        f"subtitles=filename='{srt_ff}':charenc=UTF-8:"
-        "force_style='FontName=MS\\ Gothic,FontSize=18,Alignment=2,MarginV=80'"
-    )
+    return f"subtitles=filename='{srt_ff}':charenc=UTF-8:force_style='{profile.force_style()}'"
+
+def make_mp4(merged_audio: str, srt_out: str, mp4_out: str, total_duration: float = 0.0,
+             profile: Profile = WIDE, cues: Optional[List[Tuple[float, float]]] = None) -> None:
+    if CUE_IMAGES and cues is not None:
+        # 字幕の絵を重ねた列を 30fps に増やすだけ（毎フレームの字幕描画なし）
+        list_path, vf = cue_image_inputs(srt_out, cues, total_duration, f"_{profile.name}", profile)
+        encode([
+            "ffmpeg", "-y",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", merged_audio,
+            "-vf", vf,
+            "-c:v", "libx264",
+            "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "192k",
+            "-t", f"{total_duration:.3f}",
+            mp4_out
+        ], total_duration, f"MP4[{profile.name}]")
+        return
+
+    vf = subtitle_vf(srt_out, f"sub_{profile.name}.srt", profile)
 
     # ★-loop は使わない（あなたのffmpegで Option loop not found 対策）
-    safe_run([
+    encode([
         "ffmpeg", "-y",
-        "-f", "lavfi", "-i", "color=c=black:s=1920x1080:r=30",
-        "-i", merged_mp3,
+        "-f", "lavfi", "-i", f"color=c={profile.background}:s={profile.size}:r=30",
+        "-i", merged_audio,
         "-vf", vf,
         "-c:v", "libx264",
         "-pix_fmt", "yuv420p",
         "-c:a", "aac", "-b:a", "192k",
         "-shortest",
         mp4_out
-    ], quiet=False)
+    ], total_duration, f"MP4[{profile.name}]")
 
-# ================== メイン ==================
-def main():
-    t_start = now()
-    print("=== 処理開始 ===")
+def make_black_image(image_file: str, size: str = "1920x1080", color: str = "black") -> None:
+    if os.path.exists(image_file):
+        return
+    # 複数スレッドから同時に呼ばれても壊れないよう、別名で作ってから置き換える
+    root, ext = os.path.splitext(image_file)
+    tmp = f"{root}.{threading.get_ident()}{ext}"
+    safe_run([
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"color=c={color}:s={size}",
+        "-frames:v", "1",
+        tmp
+    ], quiet=True)
+    os.replace(tmp, image_file)
 
-    if len(sys.argv) < 2:
-        sys.exit("usage: script.py input.txt")
+def cue_video_inputs(srt_out: str, cues: List[Tuple[float, float]], total_duration: float,
+                     tag: str = "", profile: Profile = WIDE) -> Tuple[str, str]:
+    """
+    cue(VFR) 描画用の ffconcat と -vf を用意して (list_path, vf) を返す
+    tag は同時に複数描画するとき（ストリーミングの区間 / プロファイル）の作業ファイル名の区別用
+    """
+    vf = subtitle_vf(srt_out, f"sub{tag}.srt", profile)
 
-    input_file = sys.argv[1]
-    base = os.path.splitext(os.path.basename(input_file))[0]
+    image = os.path.join(TMP_DIR, f"bg_{profile.background}_{profile.size}.png")
+    make_black_image(image, profile.size, profile.background)
+
+    boundaries = cue_boundaries(cues, total_duration, CUE_MAX_FRAME_GAP)
+    list_path = os.path.join(TMP_DIR, f"frames{tag}.ffconcat")
+    n = write_ffconcat(list_path, image, boundaries)
+    print(f"   フレーム数: {n}（30fps なら {int(total_duration * 30)}）")
 
-    mp3_out = base + ".mp3"
-    srt_out = base + ".srt"
-    mp4_out = base + ".mp4"
+    # 字幕は各フレームの pts で描画される。境界ちょうどだと ASS の 1/100 秒丸めで
+    # 前後の字幕を拾うことがあるので、描画時だけ 20ms 後ろの時刻で評価する
+    vf = f"setpts=PTS+0.02/TB,{vf},setpts=PTS-0.02/TB"
+    return list_path, vf
 
+def cue_image_inputs(srt_out: str, cues: List[Tuple[float, float]], total_duration: float,
+                     tag: str = "", profile: Profile = WIDE) -> Tuple[str, str]:
+    """
+    30fps 描画用に、字幕画像（cue_images.py）を並べた ffconcat と -vf を用意して (list_path, vf) を返す
+    字幕の絵は境界フレームで重ねるだけで、30fps へはその後で複製する
+    """
+    ensure_tmp()
+    with tracing.span("render.cue_images", profile=profile.name, cues=len(cues)) as sp:
+        images = cue_images.render_cues(cue_images.srt_texts(srt_out), profile.force_style(), profile.size,
+                                        CUE_CACHE_DIR, CUE_CACHE_MAX_BYTES)
+        sp.set(rendered=images.rendered, cached=images.cached)
+
+    boundaries = cue_boundaries(cues, total_duration, CUE_MAX_FRAME_GAP)
+    list_path = os.path.join(TMP_DIR, f"cues{tag}.ffconcat")
+    n = cue_images.write_ffconcat(list_path, boundaries, cues, images)
+    print(f"   字幕画像: {images.rendered}枚描画 / {images.cached}枚キャッシュ（重ねるフレーム {n} → 30fps）")
+    return list_path, cue_images.composite_vf(profile.background, 30)
+
+def make_mp4_cues(merged_audio: str, srt_out: str, mp4_out: str,
+                  cues: List[Tuple[float, float]], total_duration: float, profile: Profile = WIDE) -> None:
+    """
+    字幕境界だけにフレームを置く VFR 版（静止背景専用）
+    """
+    list_path, vf = cue_video_inputs(srt_out, cues, total_duration, f"_{profile.name}", profile)
+
+    encode([
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", merged_audio,
+        "-vf", vf,
+        "-vsync", "vfr",
+        "-c:v", "libx264", "-tune", "stillimage",
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "192k",
+        "-t", f"{total_duration:.3f}",
+        "-movflags", "+faststart",
+        mp4_out
+    ], total_duration, f"MP4[{profile.name}]")
+
+def make_video_segment(srt_out: str, mp4_out: str,
+                       cues: List[Tuple[float, float]], duration: float, profile: Profile = WIDE) -> None:
+    """
+    ストリーミング描画の1区間（映像のみ、cue 方式）。区間ごとにスレッドから呼ばれる
+    """
+    tag = "_" + os.path.splitext(os.path.basename(mp4_out))[0]
+    list_path, vf = cue_video_inputs(srt_out, cues, duration, tag, profile)
+
+    with FFMPEG_GATE, tracing.span("render.segment", segment=tag[1:], cues=len(cues), duration=round(duration, 3)):
+        safe_run([
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-vf", vf,
+            "-vsync", "vfr",
+            "-c:v", "libx264", "-tune", "stillimage",
+            "-pix_fmt", "yuv420p",
+            "-an",
+            "-t", f"{duration:.3f}",
+            mp4_out
+        ], quiet=True)
+
+def render_streaming(sentences: List[str], pauses: List[float], manifest: Optional[Manifest],
+                     srt_out: str, mp4_out: str, profile: Profile = WIDE) -> float:
+    """
+    STREAM_RENDER=True の本体。TTS の結果を文順に受け取りながら 音声/字幕/映像 を進める
+    音声は受け取ったら PCM にしてエンコーダへ流して捨てる（全文ぶんを手元に溜めない）
+    """
+    from pcm_assemble import decode_to_pcm
+    from stream_render import StreamRender
+
+    ensure_tmp()
+    job = packed_job(sentences, pauses) if TTS_PACKING else sentence_job(sentences)
+    sr = StreamRender(
+        mp4_out, srt_out, os.path.join(TMP_DIR, "stream"),
+        lambda srt, mp4, cues, duration: make_video_segment(srt, mp4, cues, duration, profile),
+        sample_rate=SAMPLE_RATE, segment_sec=STREAM_SEGMENT_SEC,
+    )
+    wrap = lambda s: wrap_text(s, profile.wrap_chars, profile.wrap_punct)
     try:
-        # ---------- 読み込み ----------
-        t0 = now()
-        enc = detect_encoding(input_file)
-        with open(input_file, encoding=enc, errors="replace") as f:
-            text = f.read()
-        print(f"📥 入力読込完了 ({fmt(now()-t0)})")
+        with TTS_GATE:
+            for i, (_duration, data, extra) in synthesize(job, manifest, stream=True):
+                pcm = decode_to_pcm(data, SAMPLE_RATE)
+                dur = len(pcm) / SAMPLE_RATE
+                if TTS_PACKING:
+                    pack = job.packs[i]
+                    pause = pauses[pack.indices[-1]]
+                    # パック内の文の時刻はマークから（パック単位なので先頭文の開始は 0 とみなす）
+                    ds, ps = sentence_timings([pack], sentences, [extra.get("marks", {})], [dur], [pause])
+                    texts = [wrap(sentences[k]) for k in pack.indices]
+                else:
+                    pause = pauses[i]
+                    ds, ps = [dur], [round(pause * SAMPLE_RATE) / SAMPLE_RATE]
+                    texts = [wrap(sentences[i])]
+                sr.add(pcm, pause, texts, ds, ps)
+        print(f"   映像区間: {len(sr.segments) + (1 if sr.seg_cues else 0)}本（{STREAM_SEGMENT_SEC:.0f}秒ごと）")
+        return sr.close()
+    except BaseException:
+        sr.abort()
+        raise
+
+def fused_specs() -> Tuple[Optional[OverlaySpec], Optional[BgmSpec]]:
+    overlay = None
+    if OVERLAY_PATH or OVERLAY_THEME:
+        path = OVERLAY_PATH or pick_overlay(OVERLAY_THEME, OVERLAY_FROM)
+        overlay = OverlaySpec(path, OVERLAY_RATIO, OVERLAY_ALPHA, OVERLAY_FROM, OVERLAY_MARGIN)
+
+    bgm = None
+    if BGM_PATH:
+        bgm = BgmSpec(BGM_PATH, BGM_VOLUME)
+    elif BGM_THEME:
+        bgm = bgm_for_theme(BGM_THEME)
+    return overlay, bgm
+
+def make_mp4_fused(merged_audio: str, srt_out: str, mp4_out: str,
+                   cues: List[Tuple[float, float]], total_duration: float,
+                   overlay: Optional[OverlaySpec], bgm: Optional[BgmSpec], profile: Profile = WIDE) -> None:
+    """
+    字幕 + オーバーレイ + BGM を1つの filter_complex で（エンコード1回）
+    オーバーレイは動画なので 30fps。BGM だけなら cue(VFR) 背景のまま
+    """
+    if overlay is None and RENDER_MODE == "cue":
+        list_path, vf = cue_video_inputs(srt_out, cues, total_duration, f"_{profile.name}", profile)
+        background = ["-f", "concat", "-safe", "0", "-i", list_path]
+        extra = ["-vsync", "vfr", "-tune", "stillimage"]
+    elif CUE_IMAGES:
+        # オーバーレイは動画なので、字幕を重ねた列を 30fps にしてから重ねる
+        list_path, vf = cue_image_inputs(srt_out, cues, total_duration, f"_{profile.name}", profile)
+        background = ["-f", "concat", "-safe", "0", "-i", list_path]
+        extra = []
+    else:
+        background = ["-f", "lavfi", "-i", f"color=c={profile.background}:s={profile.size}:r=30"]
+        vf = subtitle_vf(srt_out, f"sub_{profile.name}.srt", profile)
+        extra = []
+
+    if overlay:
+        print(f"   オーバーレイ: {overlay.path}（{overlay.from_} / 幅{overlay.ratio:.0%} / alpha {overlay.alpha}）")
+    if bgm:
+        print(f"   BGM: {bgm.path}（音量 {bgm.volume}）")
+
+    encode(build_command(
+        background, merged_audio, vf, mp4_out, total_duration,
+        overlay=overlay, bgm=bgm,
+        preset=FUSED_PRESET, crf=FUSED_CRF, extra_args=extra,
+    ), total_duration, f"MP4[{profile.name}]")
+
+def make_mp4_soft(merged_audio: str, srt_out: str, mp4_out: str, total_duration: float,
+                  bgm: Optional[BgmSpec], profile: Profile = WIDE, subtitle_mode: str = "soft") -> None:
+    """
+    字幕を焼き込まない版。映像は背景クリップを並べてコピーするだけ（エンコードは音声のみ）
+    soft は SRT を mov_text トラックで入れる。sidecar は入れない（横の srt_out を字幕として使う）
+    """
+    clip = soft_subs.background_clip(BG_CACHE_DIR, profile.size, profile.background)
+    list_path = os.path.join(TMP_DIR, f"bg_{profile.name}.ffconcat")
+    soft_subs.write_loop_list(list_path, clip, total_duration)
+    if bgm:
+        print(f"   BGM: {bgm.path}（音量 {bgm.volume}）")
+    encode(soft_subs.build_command(
+        list_path, merged_audio, mp4_out, total_duration,
+        srt=srt_out if subtitle_mode == "soft" else None, bgm=bgm,
+    ), total_duration, f"MP4[{profile.name}/{subtitle_mode}]")
+
+def render_profile(profile: Profile, audio_out: str, srt_out: str, mp4_out: str,
+                   cues: List[Tuple[float, float]], total_duration: float,
+                   overlay: Optional[OverlaySpec], bgm: Optional[BgmSpec], parent=None,
+                   subtitle_mode: str = "burn") -> None:
+    # プロファイル1本ぶんの MP4。プロファイルごとにスレッドから呼ばれる
+    with FFMPEG_GATE, tracing.span("render.profile", parent=parent, profile=profile.name,
+                                   size=profile.size, subtitles=subtitle_mode) as sp:
+        if subtitle_mode != "burn":
+            make_mp4_soft(audio_out, srt_out, mp4_out, total_duration, bgm, profile, subtitle_mode)
+        elif overlay or bgm:
+            make_mp4_fused(audio_out, srt_out, mp4_out, cues, total_duration, overlay, bgm, profile)
+        elif RENDER_MODE == "cue":
+            make_mp4_cues(audio_out, srt_out, mp4_out, cues, total_duration, profile)
+        else:
+            make_mp4(audio_out, srt_out, mp4_out, total_duration, profile, cues)
+        sp.set(bytes=os.path.getsize(mp4_out))
 
-        # ---------- 文分割 ----------
-        t0 = now()
+# ================== メイン ==================
+def run_pipeline(input_file: str, out_dir: str = "", tmp_dir: str = "", subtitle_mode: str = "") -> float:
+    """
+    1ファイル分の 読込 → 文分割 → TTS → 音声結合 → SRT → MP4。想定総尺(秒)を返す
+    作業フォルダは実行ごとに作る（tmp_dir を渡すとそのフォルダを使う。既にあるフォルダは終わっても消さない）
+    subtitle_mode は "burn" / "soft" / "sidecar"（省略時 SUBTITLE_MODE）
+    """
+    global TMP_DIR
+    subtitle_mode = subtitle_mode or SUBTITLE_MODE
+    if subtitle_mode not in soft_subs.SUBTITLE_MODES:
+        raise ValueError(f"subtitle_mode は {soft_subs.SUBTITLE_MODES} のどれか: {subtitle_mode}")
+
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    scr = Scratch(
+        f"tts_{base}", estimate_bytes(os.path.getsize(input_file), SAMPLE_RATE),
+        root=SCRATCH_ROOT, cleanup=SCRATCH_CLEANUP, path=tmp_dir,
+    )
+    TMP_DIR = scr.create()
+    print(f"   {scr.describe()}")
+
+    if TRACE_DIR:
+        tracing.start(f"{base}_{time.strftime('%Y%m%d_%H%M%S')}", input=os.path.abspath(input_file),
+                      stream=STREAM_RENDER, packing=TTS_PACKING, assembly=AUDIO_ASSEMBLY, render=RENDER_MODE)
+    ok = False
+    try:
+        with tracing.span("pipeline", input=base, scratch_ram=scr.ram):
+            total_duration = _run_stages(input_file, base, out_dir, subtitle_mode)
+        ok = True
+        return total_duration
+    finally:
+        scr.finish(ok)
+        if scr.kept:
+            print(f"🗂 作業フォルダを残しました: {scr.path}")
+        for path in tracing.finish(TRACE_DIR, TRACE_FORMATS):
+            print(f"📈 トレース: {path}")
+
+def profile_outputs(out_dir: str, base: str, profile: Profile) -> Tuple[str, str]:
+    # (srt, mp4)。wide は従来どおり <base>.srt / <base>.mp4
+    stem = os.path.join(out_dir, base + profile.suffix)
+    return stem + ".srt", stem + ".mp4"
+
+def _run_stages(input_file: str, base: str, out_dir: str, subtitle_mode: str = "burn") -> float:
+    mp3_out = os.path.join(out_dir, base + ".mp3")
+    profiles = output_profiles()
+
+    # ---------- 読み込み ----------
+    t0 = now()
+    with tracing.span("read") as sp:
+        text, det = read_text(input_file)
+        sp.set(chars=len(text), bytes=os.path.getsize(input_file), encoding=det.encoding, method=det.method)
+    print(f"   文字コード: {det.encoding}（{det.method} / 判定 {det.seconds * 1000:.1f} ms）")
+    print(f"📥 入力読込完了 ({fmt(now()-t0)})")
+
+    # ---------- 文分割 ----------
+    t0 = now()
+    with tracing.span("split", chars=len(text)) as sp:
         sentences = normalize_sentences(text)
-        if not sentences:
-            raise RuntimeError("empty text")
-        print(f"✂ 文分割完了: {len(sentences)}文 ({fmt(now()-t0)})")
+        sp.set(sentences=len(sentences))
+    if not sentences:
+        raise RuntimeError("empty text")
+    print(f"✂ 文分割完了: {len(sentences)}文 ({fmt(now()-t0)})")
+
+    # ---------- TTS ----------
+    t0 = now()
+    manifest = Manifest(MANIFEST_DIR, manifest_name(input_file)) if MANIFEST_DIR else None
+    # ---------- ポーズ（SRTと音声で一致させる） ----------
+    pauses = [infer_pause_seconds(s) for s in sentences]
+
+    if STREAM_RENDER:
+        # ---------- TTS と MP4 を並行 ----------
+        print("🎬 ストリーミング描画（TTS と並行してエンコード）")
+        if len(profiles) > 1:
+            print(f"⚠ ストリーミング描画は1プロファイルのみ: {profiles[0].name} だけ出力します")
+        if subtitle_mode != "burn":
+            print(f"⚠ ストリーミング描画は字幕を焼き込みます（subtitle_mode={subtitle_mode} は使いません）")
+        srt_out, mp4_out = profile_outputs(out_dir, base, profiles[0])
+        with tracing.span("stream", sentences=len(sentences), profile=profiles[0].name) as sp:
+            total_duration = render_streaming(sentences, pauses, manifest, srt_out, mp4_out, profiles[0])
+            sp.set(duration=round(total_duration, 3))
+        print(f"🕒 総尺: {total_duration:.3f} 秒")
+        print(f"🎬 MP4生成完了: {mp4_out} ({fmt(now()-t0)})")
+        return total_duration
+
+    packs: List[Pack] = []
+    with TTS_GATE, tracing.span("tts", sentences=len(sentences), workers=TTS_WORKERS, packing=TTS_PACKING) as sp:
+        if TTS_PACKING:
+            # 以降の音声組み立てはパック単位（パック内のポーズは SSML の <break> で入っている）
+            packs, durations, audios, marks = tts_packed(sentences, pauses, manifest)
+            sentence_pauses = pauses
+            pauses = [sentence_pauses[p.indices[-1]] for p in packs]
+        else:
+            durations, audios = tts_each_sentence(sentences, manifest)
+        sp.set(requests=len(audios), bytes=sum(len(a) for a in audios))
+    print(f"🔊 TTS完了 ({fmt(now()-t0)})")
+
+    if AUDIO_ASSEMBLY == "pcm":
+        # ---------- PCM組み立て（無音ファイル/concat不要） ----------
+        from pcm_assemble import assemble, write_wav
 
-        # ---------- TTS ----------
         t0 = now()
-        durations, mp3_files = tts_each_sentence(sentences, base)
-        print(f"🔊 TTS完了 ({fmt(now()-t0)})")
-
-        # ---------- ポーズ（SRTと音声で一致させる） ----------
-        pauses = [infer_pause_seconds(s) for s in sentences]
+        print("🎵 PCM組み立て開始（ポーズ込み）")
+        with tracing.span("assemble", parts=len(audios)) as sp:
+            asm = assemble(audios, pauses, SAMPLE_RATE)
+            # SRT はサンプル数ベースの長さで作る（音声と完全一致）
+            durations, pauses = asm.durations, asm.pauses
+            ensure_tmp()
+            audio_out = os.path.join(TMP_DIR, base + ".wav")
+            write_wav(audio_out, asm)
+            sp.set(seconds=round(asm.total_seconds, 3), bytes=os.path.getsize(audio_out))
+        print(f"🎵 PCM組み立て完了: {asm.total_seconds:.3f} 秒 ({fmt(now()-t0)})")
+    else:
+        mp3_files = write_parts(audios, base)
 
         # ---------- 無音挿入（字幕ズレ防止） ----------
         t0 = now()
         print("🤫 無音(ポーズ)生成開始")
         mp3_with_silence: List[str] = []
-        total = len(mp3_files)
-
-        for i, (mp3p, p) in enumerate(zip(mp3_files, pauses), 1):
-            print(f"   無音準備 [{i:03}/{total:03}]")
-            mp3_with_silence.append(mp3p)
-            if p > 0:
-                sil = os.path.join(TMP_DIR, f"{base}_sil_{i:03}.mp3")
-                make_silence_mp3(p, sil)
-                mp3_with_silence.append(sil)
 
+        with tracing.span("silence", pauses=sum(1 for p in pauses if p > 0)) as sp:
+            try:
+                with FFJobs() as jobs:
+                    for mp3p, p in zip(mp3_files, pauses):
+                        mp3_with_silence.append(mp3p)
+                        if p > 0:
+                            sil = silence_path(p)
+                            make_silence_mp3(p, sil, jobs)
+                            mp3_with_silence.append(sil)
+            except FFJobsError as e:
+                print(e.report())
+                raise RuntimeError("command failed")
+            sp.set(launched=jobs.launched, reused=jobs.reused)
+
+        print(f"   無音 {jobs.launched}本生成 / {jobs.reused}回使い回し（同時{jobs.workers}本）")
         print(f"🤫 無音(ポーズ)生成完了 ({fmt(now()-t0)})")
 
         # ---------- MP3結合 ----------
         t0 = now()
         print("🎵 MP3結合開始（ポーズ込み）")
-        concat_mp3(mp3_with_silence, mp3_out)
+        with FFMPEG_GATE, tracing.span("concat", files=len(mp3_with_silence)) as sp:
+            concat_mp3(mp3_with_silence, mp3_out)
+            sp.set(bytes=os.path.getsize(mp3_out))
         print(f"🎵 MP3結合完了: {mp3_out} ({fmt(now()-t0)})")
+        audio_out = mp3_out
+
+    if TTS_PACKING:
+        # マークの時刻から文ごとの長さ/ポーズに戻す
+        durations, pauses = sentence_timings(packs, sentences, marks, durations, pauses)
+
+    # ---------- SRT（プロファイルごとに改行幅が違う。時刻は共通） ----------
+    t0 = now()
+    outputs: List[Tuple[Profile, str, str]] = []
+    with tracing.span("srt", cues=len(sentences), profiles=len(profiles)) as sp:
+        for prof in profiles:
+            srt_out, mp4_out = profile_outputs(out_dir, base, prof)
+            total_duration = generate_srt(sentences, durations, pauses, srt_out, prof)
+            outputs.append((prof, srt_out, mp4_out))
+        sp.set(duration=round(total_duration, 3))
+    print(f"📝 SRT生成完了: {', '.join(o[1] for o in outputs)} ({fmt(now()-t0)})")
+    print(f"🕒 想定総尺（SRT/音声）: {total_duration:.3f} 秒")
+
+    # ---------- MP4（プロファイルごと、並行） ----------
+    t0 = now()
+    print(f"🎬 MP4生成開始（{', '.join(p.name for p in profiles)}）")
+    overlay, bgm = fused_specs()
+    if overlay and subtitle_mode != "burn":
+        # オーバーレイは映像のエンコードが要るので、字幕トラック化しても速くならない
+        print(f"⚠ オーバーレイ指定があるため字幕は焼き込みます（subtitle_mode={subtitle_mode} は使いません）")
+        subtitle_mode = "burn"
+    mode = subtitle_mode if subtitle_mode != "burn" else ("fused" if (overlay or bgm) else RENDER_MODE)
+    cues = srt_cues(durations, pauses)
+    with tracing.span("render", mode=mode, duration=round(total_duration, 3), profiles=len(profiles)) as sp:
+        if len(outputs) == 1:
+            prof, srt_out, mp4_out = outputs[0]
+            render_profile(prof, audio_out, srt_out, mp4_out, cues, total_duration, overlay, bgm,
+                           subtitle_mode=subtitle_mode)
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, min(PROFILE_WORKERS, len(outputs)))) as ex:
+                futs = [ex.submit(render_profile, prof, audio_out, srt_out, mp4_out, cues, total_duration,
+                                  overlay, bgm, sp, subtitle_mode) for prof, srt_out, mp4_out in outputs]
+                for fut in futs:
+                    fut.result()
+        sp.set(bytes=sum(os.path.getsize(o[2]) for o in outputs))
+    print(f"🎬 MP4生成完了: {', '.join(o[2] for o in outputs)} ({fmt(now()-t0)})")
+
+    return total_duration
 
-        # ---------- SRT ----------
-        t0 = now()
-        total_duration = generate_srt(sentences, durations, pauses, srt_out)
-        print(f"📝 SRT生成完了: {srt_out} ({fmt(now()-t0)})")
-        print(f"🕒 想定総尺（SRT/音声）: {total_duration:.3f} 秒")
+def main():
+    t_start = now()
+    print("=== 処理開始 ===")
 
-        # ---------- MP4 ----------
-        t0 = now()
-        print("🎬 MP4生成開始")
-        make_mp4(mp3_out, srt_out, mp4_out)
-        print(f"🎬 MP4生成完了: {mp4_out} ({fmt(now()-t0)})")
+    if len(sys.argv) < 2:
+        sys.exit("usage: script.py input.txt")
 
+    try:
+        run_pipeline(sys.argv[1])
         print("=== 正常終了 ===")
-
     finally:
-        # tmp掃除（欲しければコメントアウト）
-        if os.path.exists(TMP_DIR):
-            shutil.rmtree(TMP_DIR, ignore_errors=True)
         total = now() - t_start
         print(f"⏱ 総処理時間: {fmt(total)} ({total:.2f} 秒)")
 
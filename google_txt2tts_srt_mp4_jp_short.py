@@ -10,27 +10,40 @@
 安全化:
 - MP4音声は「結合した1本のmp3」を使用（1文目だけ問題の解消）
 - SRTは正規フォーマット(00:00:00,000)
-- subtitlesパス地雷回避：SRTを _tts_tmp/sub.srt にコピーして subtitles=filename= で渡す
+- subtitlesパス地雷回避：SRTを 作業フォルダ/sub.srt にコピーして subtitles=filename= で渡す
+- CUE_IMAGES=True（選択・試験的）で字幕を透過 PNG から重ねる（cue_images.py。既定は subtitles=）
+- 作業フォルダは実行ごとに一意（既定は RAM 上の /dev/shm、空きが足りなければディスク。scratch.py）
 - Windowsドライブ ":" を "\:" にエスケープ
+- MP4 のエンコードは -progress で 進捗% / 速度 / 残り時間 を表示し、計測値を ENCODE_METRICS_PATH に追記（ffprogress.py）
 """
 
 import os
 import sys
-import re
 import shutil
-import random
 import subprocess
-import chardet
 import time
-from typing import List, Tuple
-
-from google.cloud import texttospeech
-from mutagen.mp3 import MP3
+from typing import List, Optional, Tuple
+
+# google.cloud.texttospeech は読み込みだけで 0.4 秒ほどかかるので、tts_each_sentence の中で import する
+import jp_segment
+from text_encoding import read_text
+from tts_pool import run_ordered, longest_first
+from tts_client import RetryingTTSClient
+from tts_cache import TTSCache, cache_key, pick_voice
+from mp3_frames import mp3_duration
+from scratch import Scratch, estimate_bytes
+from cue_render import cue_boundaries
+import ffprogress
+import cue_images
 
 # ================== 設定 ==================
 os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"D:\central-web-428404-n2-6a98d3a64225.json"
 
-TMP_DIR = "_tts_tmp"
+TMP_DIR = "_tts_tmp"   # main が実行ごとの作業フォルダに置き換える
+
+# 作業フォルダの置き場所（"" なら /dev/shm → OS の一時フォルダ）と片付け方（always / on_success / never）
+SCRATCH_ROOT = os.environ.get("TTS_SCRATCH_ROOT", "")
+SCRATCH_CLEANUP = os.environ.get("TTS_SCRATCH_CLEANUP", "always")
 
 # ショート縦型
 W = 720
@@ -42,6 +55,25 @@ SRT_WRAP_CHARS = 13
 # 長文をTTS安全側で分割
 MAX_TTS_CHARS_PER_CHUNK = 160
 
+# TTS同時リクエスト数（1 で従来どおり逐次）
+TTS_WORKERS = 4
+
+# TTS のレート制限とリトライ（tts_client.py）。一時エラー(429/503等)は指数バックオフ＋ジッタで再送
+TTS_REQ_PER_SEC = 10.0
+TTS_CHARS_PER_MIN = 150_000
+TTS_MAX_RETRIES = 6
+
+# TTS音声キャッシュ（"" で無効）。_tts_tmp と違い実行後も残る
+TTS_CACHE_DIR = os.environ.get("TTS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".tts_cache"))
+TTS_CACHE_MAX_BYTES = 2 * 1024 ** 3
+
+# MP4 エンコードの進捗表示の間隔（秒）と計測値の追記先（"" で記録しない）
+ENCODE_PROGRESS_SEC = 5.0
+ENCODE_METRICS_PATH = "_encode_metrics.jsonl"
+
+# 声の選び方: "random"=毎回ランダム（従来どおり） / "hash"=文ごとに固定（キャッシュが効く。声の割り当ては変わる）
+VOICE_MODE = "random"
+
 # 文末に「間」を入れたい場合（不要なら全部 0.0 に）
 PAUSE_SEC_DEFAULT = 0.0
 PAUSE_SEC = {
@@ -65,6 +97,14 @@ SUB_FONT_SIZE = 16
 SUB_MARGIN_V = 100
 SUB_ALIGNMENT = 2  # 下寄せ
 
+# 字幕を 字幕文ごとの透過 PNG（cue_images.py）から重ねる（False（既定）なら従来どおり subtitles= で毎フレーム描く）
+# 試験的：ffconcat の framerate 1000 と -t で尺を決めるので、実際の出力で確認してから使う
+# 見た目の設定が同じなので、google_txt2tts_srt_mp4_jp.py の short プロファイルとキャッシュを共有する
+CUE_IMAGES = False
+CUE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tts_cue_cache")
+CUE_CACHE_MAX_BYTES = 512 * 1024 ** 2
+CUE_MAX_FRAME_GAP = 2.0
+
 # ================== 時間表示 ==================
 def now() -> float:
     return time.perf_counter()
@@ -77,10 +117,6 @@ def fmt(sec: float) -> str:
 def ensure_tmp() -> None:
     os.makedirs(TMP_DIR, exist_ok=True)
 
-def detect_encoding(path: str) -> str:
-    with open(path, "rb") as f:
-        return chardet.detect(f.read()).get("encoding") or "utf-8"
-
 def safe_run(cmd: List[str], quiet: bool = False) -> None:
     if quiet:
         r = subprocess.run(cmd, capture_output=True, text=True)
@@ -108,37 +144,13 @@ def srt_time(t: float) -> str:
     return f"{h:02}:{m:02}:{sec:02},{ms:03}"
 
 def wrap_text(text: str, max_length: int = SRT_WRAP_CHARS) -> str:
-    # 省略なし：固定幅で改行（元ショート版の挙動）
-    t = text.strip()
-    return "\n".join([t[i:i + max_length] for i in range(0, len(t), max_length)]) if t else ""
+    # 省略なし：固定幅で改行（元ショート版の挙動）＋禁則
+    return jp_segment.wrap_text(text, max_length, prefer_punct=False)
 
 # ================== テキスト処理 ==================
-def split_text_by_sentence(text: str) -> List[str]:
-    parts = re.split(r"(?<=[。！？])\s*", text)
-    return [p.strip() for p in parts if p.strip()]
-
-def split_long_sentence(s: str, max_chars: int = MAX_TTS_CHARS_PER_CHUNK) -> List[str]:
-    if len(s) <= max_chars:
-        return [s]
-    out, buf = [], ""
-    for ch in s:
-        buf += ch
-        if ch in "、。！？" and len(buf) >= int(max_chars * 0.6):
-            out.append(buf.strip())
-            buf = ""
-        elif len(buf) >= max_chars:
-            out.append(buf.strip())
-            buf = ""
-    if buf.strip():
-        out.append(buf.strip())
-    return out
-
 def normalize_sentences(text: str) -> List[str]:
-    base = split_text_by_sentence(text)
-    out: List[str] = []
-    for s in base:
-        out.extend(split_long_sentence(s))
-    return out
+    # 文分割 → 長文の分割（jp_segment: 線形時間・閉じ括弧/禁則対応）
+    return jp_segment.normalize_sentences(text, MAX_TTS_CHARS_PER_CHUNK)
 
 def infer_pause_seconds(sentence: str) -> float:
     if not sentence:
@@ -146,34 +158,79 @@ def infer_pause_seconds(sentence: str) -> float:
     return PAUSE_SEC.get(sentence[-1], PAUSE_SEC_DEFAULT)
 
 # ================== TTS ==================
-def tts_each_sentence(sentences: List[str], base: str) -> Tuple[List[float], List[str]]:
-    ensure_tmp()
-    client = texttospeech.TextToSpeechClient()
-    durations: List[float] = []
-    mp3s: List[str] = []
-
+def tts_each_sentence(sentences: List[str]) -> Tuple[List[float], List[bytes]]:
+    """
+    文ごとに合成し、長さ(秒)のリストと MP3 バイト列のリストを文順で返す（ファイルには書かない）
+    長さはフレームヘッダから直接数える（書いて開き直さない）
+    """
+    from google.cloud import texttospeech
+
+    client = RetryingTTSClient(
+        texttospeech.TextToSpeechClient(),
+        req_per_sec=TTS_REQ_PER_SEC,
+        chars_per_min=TTS_CHARS_PER_MIN,
+        max_retries=TTS_MAX_RETRIES,
+        concurrency=TTS_WORKERS,
+    )
     total = len(sentences)
-    print(f"🔊 TTS開始（{total}文）")
 
-    for i, s in enumerate(sentences, 1):
-        print(f"   TTS [{i:03}/{total:03}]")
-        voice_name = random.choice(JAPANESE_FEMALE_VOICES)
+    # 声は文順に先に決めておく（並列の完了順に左右されないように）
+    voices = [pick_voice(s, JAPANESE_FEMALE_VOICES, VOICE_MODE) for s in sentences]
+    audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+    config_key = texttospeech.AudioConfig.to_json(audio_config)
+    cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES) if TTS_CACHE_DIR else None
+
+    def synth(idx: int, s: str) -> Tuple[float, bytes]:
+        key = cache_key(s, voices[idx], "ja-JP", config_key) if cache else ""
+        hit = cache.get(key) if cache else None
+        if hit:
+            data, duration = hit
+            return duration, data
 
         resp = client.synthesize_speech(
             input=texttospeech.SynthesisInput(text=s),
-            voice=texttospeech.VoiceSelectionParams(language_code="ja-JP", name=voice_name),
-            audio_config=texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3),
+            voice=texttospeech.VoiceSelectionParams(language_code="ja-JP", name=voices[idx]),
+            audio_config=audio_config,
         )
 
-        path = os.path.join(TMP_DIR, f"{base}_{i:03}.mp3")
-        with open(path, "wb") as f:
-            f.write(resp.audio_content)
+        data = resp.audio_content
+        duration = mp3_duration(data)
+        if cache:
+            cache.put(key, data, duration)
+        return duration, data
+
+    def progress(done: int, n: int) -> None:
+        print(f"   TTS [{done:03}/{n:03}]")
+
+    print(f"🔊 TTS開始（{total}文 / 同時{TTS_WORKERS}本）")
+    results = run_ordered(
+        sentences, synth,
+        workers=TTS_WORKERS,
+        order=longest_first(sentences),
+        on_done=progress,
+    )
 
-        audio = MP3(path)
-        durations.append(float(audio.info.length))
-        mp3s.append(path)
+    durations = [d for d, _ in results]
+    audios = [a for _, a in results]
 
-    return durations, mp3s
+    print(f"   {client.summary()}")
+    if cache:
+        print(f"   キャッシュ: hit {cache.hits} / miss {cache.misses}")
+        cache.evict()
+    return durations, audios
+
+def write_parts(audios: List[bytes], base: str) -> List[str]:
+    """
+    MP3結合など、ファイルが必要な工程の直前にだけ書き出す
+    """
+    ensure_tmp()
+    paths: List[str] = []
+    for i, data in enumerate(audios, 1):
+        path = os.path.join(TMP_DIR, f"{base}_{i:03}.mp3")
+        with open(path, "wb") as f:
+            f.write(data)
+        paths.append(path)
+    return paths
 
 def concat_mp3(mp3_files: List[str], out_mp3: str) -> None:
     ensure_tmp()
@@ -202,6 +259,15 @@ def generate_srt(sentences: List[str], durations: List[float], pauses: List[floa
             t += d + p
     return t
 
+def srt_cues(durations: List[float], pauses: List[float]) -> List[Tuple[float, float]]:
+    # generate_srt と同じ規則で (開始, 終了) 秒を返す
+    t = 0.0
+    cues: List[Tuple[float, float]] = []
+    for d, p in zip(durations, pauses):
+        cues.append((t, t + d))
+        t += d + p
+    return cues
+
 # ================== MP4生成（縦型） ==================
 def make_black_image_vertical(image_file: str = "black_vertical.jpg") -> None:
     if os.path.exists(image_file):
@@ -213,7 +279,43 @@ def make_black_image_vertical(image_file: str = "black_vertical.jpg") -> None:
         image_file
     ], quiet=True)
 
-def make_mp4_short(merged_mp3: str, srt_out: str, mp4_out: str, total_duration: float) -> None:
+def sub_force_style() -> str:
+    # フォント名の空白は \ でエスケープする必要がある場合あり
+    # 例: "MS Gothic" → "MS\ Gothic"
+    font_for_style = SUB_FONT.replace(" ", "\\ ")
+    return (f"FontName={font_for_style},FontSize={SUB_FONT_SIZE},"
+            f"Alignment={SUB_ALIGNMENT},MarginV={SUB_MARGIN_V}")
+
+def make_mp4_short_images(merged_mp3: str, srt_out: str, mp4_out: str, total_duration: float,
+                          cues: List[Tuple[float, float]]) -> None:
+    """
+    字幕の絵を境界フレームで重ね、25fps（-loop 1 の既定と同じ）に複製してエンコード
+    """
+    ensure_tmp()
+    images = cue_images.render_cues(cue_images.srt_texts(srt_out), sub_force_style(), f"{W}x{H}",
+                                    CUE_CACHE_DIR, CUE_CACHE_MAX_BYTES)
+    list_path = os.path.join(TMP_DIR, "cues.ffconcat")
+    n = cue_images.write_ffconcat(list_path, cue_boundaries(cues, total_duration, CUE_MAX_FRAME_GAP), cues, images)
+    print(f"   字幕画像: {images.rendered}枚描画 / {images.cached}枚キャッシュ（重ねるフレーム {n} → 25fps）")
+
+    ffprogress.run([
+        "ffmpeg", "-y",
+        "-f", "concat", "-safe", "0", "-i", list_path,
+        "-i", merged_mp3,
+        "-vf", cue_images.composite_vf("black", 25),
+        "-c:v", "libx264", "-tune", "stillimage",
+        "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "192k",
+        "-t", f"{total_duration:.3f}",
+        mp4_out
+    ], total_duration, "MP4", ENCODE_PROGRESS_SEC, ENCODE_METRICS_PATH)
+
+def make_mp4_short(merged_mp3: str, srt_out: str, mp4_out: str, total_duration: float,
+                   cues: Optional[List[Tuple[float, float]]] = None) -> None:
+    if CUE_IMAGES and cues is not None:
+        make_mp4_short_images(merged_mp3, srt_out, mp4_out, total_duration, cues)
+        return
+
     ensure_tmp()
     make_black_image_vertical("black_vertical.jpg")
 
@@ -222,20 +324,9 @@ def make_mp4_short(merged_mp3: str, srt_out: str, mp4_out: str, total_duration:
     shutil.copyfile(srt_out, safe_srt)
 
     srt_ff = ffmpeg_escape_filter_path(safe_srt)
+    vf = f"subtitles=filename='{srt_ff}':charenc=UTF-8:force_style='{sub_force_style()}'"
 
-    # フォント名の空白は \ でエスケープする必要がある場合あり
-    # 例: "MS Gothic" → "MS\ Gothic"
-    font_for_style = SUB_FONT.replace(" ", "\\ ")
-
-    vf = (
-        "subtitles="
-        f"filename='{srt_ff}'"
-        ":charenc=UTF-8"
-        f":force_style='FontName={font_for_style},FontSize={SUB_FONT_SIZE},"
-        f"Alignment={SUB_ALIGNMENT},MarginV={SUB_MARGIN_V}'"
-    )
-
-    safe_run([
+    ffprogress.run([
         "ffmpeg", "-y",
         "-loop", "1", "-i", "black_vertical.jpg",
         "-i", merged_mp3,
@@ -246,10 +337,11 @@ def make_mp4_short(merged_mp3: str, srt_out: str, mp4_out: str, total_duration:
         "-shortest",
         "-t", f"{total_duration:.3f}",
         mp4_out
-    ], quiet=False)
+    ], total_duration, "MP4", ENCODE_PROGRESS_SEC, ENCODE_METRICS_PATH)
 
 # ================== メイン ==================
 def main():
+    global TMP_DIR
     t_start = now()
     print("=== ショート動画 生成開始 ===")
 
@@ -263,12 +355,17 @@ def main():
     srt_out = base + ".srt"
     mp4_out = base + ".mp4"  # ここは必要なら base + "-short.mp4" にしてOK
 
+    # MP3 パーツ（1文字 ≒ 0.15秒、mp3 は WAV の1/8程度）なので見積もりは控えめでよい
+    scr = Scratch(f"tts_short_{base}", estimate_bytes(os.path.getsize(input_file)) // 8,
+                  root=SCRATCH_ROOT, cleanup=SCRATCH_CLEANUP)
+    TMP_DIR = scr.create()
+    print(f"   {scr.describe()}")
+    ok = False
     try:
         # ---------- 読み込み ----------
         t0 = now()
-        enc = detect_encoding(input_file)
-        with open(input_file, encoding=enc, errors="replace") as f:
-            text = f.read()
+        text, det = read_text(input_file)
+        print(f"   文字コード: {det.encoding}（{det.method} / 判定 {det.seconds * 1000:.1f} ms）")
         print(f"📥 入力読込完了 ({fmt(now()-t0)})")
 
         # ---------- 文分割 ----------
@@ -280,7 +377,8 @@ def main():
 
         # ---------- TTS ----------
         t0 = now()
-        durations, mp3_files = tts_each_sentence(sentences, base)
+        durations, audios = tts_each_sentence(sentences)
+        mp3_files = write_parts(audios, base)
         print(f"🔊 TTS完了 ({fmt(now()-t0)})")
 
         # ---------- MP3結合 ----------
@@ -298,14 +396,16 @@ def main():
         # ---------- MP4（縦型） ----------
         t0 = now()
         print("🎬 ショートMP4生成開始（縦型 720x1280）")
-        make_mp4_short(mp3_out, srt_out, mp4_out, total_duration)
+        make_mp4_short(mp3_out, srt_out, mp4_out, total_duration, srt_cues(durations, pauses))
         print(f"🎬 ショートMP4生成完了: {mp4_out} ({fmt(now()-t0)})")
 
         print("=== 正常終了 ===")
+        ok = True
 
     finally:
-        if os.path.exists(TMP_DIR):
-            shutil.rmtree(TMP_DIR, ignore_errors=True)
+        scr.finish(ok)
+        if scr.kept:
+            print(f"🗂 作業フォルダを残しました: {scr.path}")
         total = now() - t_start
         print(f"⏱ 総処理時間: {fmt(total)} ({total:.2f} 秒)")
 
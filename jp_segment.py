@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+日本語テキストの分割（文分割 / 長文のTTS用分割 / 字幕の改行）を線形時間で行う
+
+従来は split_long_sentence が1文字ずつ buf += ch、wrap_text が t[idx+1:] を切り直していたので、
+句読点の少ない長い段落で 2乗オーダーになっていた。ここではすべて添字で走査し、切り出しは最後に1回だけ。
+
+- 文分割: 「。！？」の後で切る。直後の閉じ括弧/引用符（」』）等）は前の文に含める
+    「本当に？」と彼は言った。 → 引用の後が「と/って」なら文の途中とみなして切らない
+    「晴れ。明日は雨。」        → 括弧の中では切らない（改行で括弧の深さはリセット）
+    閉じない括弧で残りの行が1文にならないよう、同じ行の後ろに閉じ括弧がある開き括弧だけを数え、
+    括弧が BRACKET_SPAN_LIMIT 文字を超えて開いたままなら、その後の文末では切る
+- 長文分割: MAX_CHARS の6割を超えたら句読点の後で、MAX_CHARS で強制的に切る
+- 字幕改行: width 以内の最後の「、。」の後で改行（prefer_punct=False なら固定幅）
+- 禁則: 行頭禁則文字（、。」ー っ 等）は前の行にぶら下げ、行末禁則文字（「（ 等）は次の行へ送る
+
+ベンチマーク（書籍サイズの入力で旧実装と比較）:
+    python jp_segment.py bench              （合成テキスト 1,000,000 文字）
+    python jp_segment.py bench book.txt     （手元の txt）
+"""
+
+import re
+import sys
+import time
+import bisect
+from typing import List
+
+DEFAULT_MAX_CHARS = 160
+DEFAULT_WIDTH = 25
+
+TERMINATORS = "。！？"
+SOFT_BREAKS = "、。！？"
+
+OPENERS = "「『（【〔〈《〘〖｛［(［“‘"
+CLOSERS = "」』）】〕〉》〙〗｝］)]”’"
+QUOTE_CLOSERS = "」』”’"
+QUOTE_PARTICLES = "とっ"   # 」と言った / 」って
+
+# 行頭に来てはいけない文字（前の行にぶら下げる）
+NO_LINE_START = (
+    CLOSERS + SOFT_BREAKS + "，．・：；!?,.:;ー…‥々ゝゞヽヾ"
+    "ぁぃぅぇぉっゃゅょゎゕゖァィゥェォッャュョヮヵヶ"
+)
+# 行末に来てはいけない文字（次の行へ送る）
+NO_LINE_END = OPENERS
+
+MAX_HANG = 2   # ぶら下げで width を超えてよい文字数
+
+# 括弧の中で文末を切らないのは、括弧が開いてからこの文字数まで（長文分割の上限と同じ）
+BRACKET_SPAN_LIMIT = DEFAULT_MAX_CHARS
+
+
+def _cls(chars: str) -> str:
+    return "[" + "".join(re.escape(c) for c in chars) + "]"
+
+# 文分割で見る必要がある文字だけを拾う（それ以外の文字は regex がまとめて読み飛ばす）
+_SENTENCE_EVENT = re.compile(
+    "(" + _cls(TERMINATORS) + "+)(" + _cls(CLOSERS) + "*)"
+    "|(" + _cls(OPENERS) + ")|(" + _cls(CLOSERS) + ")|(\n)"
+)
+_SOFT_BREAK = re.compile(_cls(SOFT_BREAKS))
+_CLOSER_OR_NL = re.compile(_cls(CLOSERS) + "|\n")
+
+
+# ================== 文分割 ==================
+def split_sentences(text: str) -> List[str]:
+    """
+    文に分ける（前後の空白は除く。文の中の改行はそのまま）
+    """
+    out: List[str] = []
+    n = len(text)
+
+    # 行ごとの最後の閉じ括弧の位置（開き括弧の後ろに閉じ括弧が無ければ、その開き括弧は数えない）
+    line_ends: List[int] = []
+    last_closer: List[int] = []
+    cur = -1
+    for m in _CLOSER_OR_NL.finditer(text):
+        if m.group() == "\n":
+            line_ends.append(m.start())
+            last_closer.append(cur)
+            cur = -1
+        else:
+            cur = m.start()
+    line_ends.append(n)
+    last_closer.append(cur)
+
+    start = 0
+    depth = 0
+    opened_at = 0
+    for m in _SENTENCE_EVENT.finditer(text):
+        term, closers, opener, closer, _nl = m.groups()
+        if opener:
+            if last_closer[bisect.bisect_left(line_ends, m.start())] > m.start():
+                if depth == 0:
+                    opened_at = m.start()
+                depth += 1
+        elif closer:
+            depth = max(0, depth - 1)
+        elif term is None:
+            depth = 0
+        else:
+            # 「！？」のような連続と、直後の閉じ括弧は同じ文に含める
+            depth = max(0, depth - len(closers))
+            j = m.end()
+            # 長く開いたままの括弧は閉じ忘れとみなす（残りの文を1文にしない）
+            if depth > 0 and j - opened_at > BRACKET_SPAN_LIMIT:
+                depth = 0
+            quoted = any(c in QUOTE_CLOSERS for c in closers)
+            # 括弧の外で、かつ「」と言った」の形でなければ文末
+            if depth == 0 and not (quoted and j < n and text[j] in QUOTE_PARTICLES):
+                s = text[start:j].strip()
+                if s:
+                    out.append(s)
+                start = j
+
+    s = text[start:].strip()
+    if s:
+        out.append(s)
+    return out
+
+
+# ================== 長文分割（TTS用） ==================
+def _kinsoku_cut(s: str, start: int, cut: int, limit: int) -> int:
+    """
+    s[start:cut] で切るとき、禁則に合わせて cut を調整する（limit までぶら下げ可）
+    """
+    n = len(s)
+    hang = cut
+    while hang < n and s[hang] in NO_LINE_START and hang < limit:
+        hang += 1
+    if hang == n or s[hang] not in NO_LINE_START:
+        cut = hang
+    # 行末禁則: 開き括弧で終わらない（start までは戻らない）
+    back = cut
+    while back - 1 > start and s[back - 1] in NO_LINE_END:
+        back -= 1
+    if back > start:
+        cut = back
+    return cut
+
+
+def chunk_sentence(s: str, max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    """
+    max_chars を超える文を分ける。max_chars の6割を超えたら句読点の後で、max_chars で強制的に切る
+    """
+    n = len(s)
+    if n <= max_chars:
+        return [s]
+
+    soft = max(1, int(max_chars * 0.6))
+    out: List[str] = []
+    start = 0
+    while n - start > max_chars:
+        # 6割〜max_chars の窓の中の最初の句読点（無ければ max_chars で強制）
+        m = _SOFT_BREAK.search(s, start + soft - 1, start + max_chars)
+        cut = m.end() if m else start + max_chars
+        cut = _kinsoku_cut(s, start, cut, cut + MAX_HANG)
+        piece = s[start:cut].strip()
+        if piece:
+            out.append(piece)
+        start = cut
+
+    piece = s[start:].strip()
+    if piece:
+        out.append(piece)
+    return out
+
+
+def normalize_sentences(text: str, max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    out: List[str] = []
+    for s in split_sentences(text):
+        out.extend(chunk_sentence(s, max_chars))
+    return out
+
+
+# ================== 字幕の改行 ==================
+def wrap_lines(text: str, width: int = DEFAULT_WIDTH, prefer_punct: bool = True) -> List[str]:
+    t = text.strip()
+    n = len(t)
+    if n <= width:
+        return [t] if t else []
+
+    lines: List[str] = []
+    i = 0
+    while n - i > width:
+        end = i + width
+        cut = -1
+        if prefer_punct:
+            cut = max(t.rfind("、", i, end), t.rfind("。", i, end)) + 1
+        if cut <= i:
+            cut = end
+        cut = _kinsoku_cut(t, i, cut, end + MAX_HANG)
+
+        line = t[i:cut].strip()
+        if line:
+            lines.append(line)
+        i = cut
+        while i < n and t[i].isspace():
+            i += 1
+
+    line = t[i:].strip()
+    if line:
+        lines.append(line)
+    return lines
+
+
+def wrap_text(text: str, width: int = DEFAULT_WIDTH, prefer_punct: bool = True) -> str:
+    return "\n".join(wrap_lines(text, width, prefer_punct))
+
+
+# ================== ベンチマーク ==================
+def _legacy_split(text: str) -> List[str]:
+    parts = re.split(r"(?<=[。！？])\s*", text)
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _legacy_chunk(s: str, max_chars: int = DEFAULT_MAX_CHARS) -> List[str]:
+    if len(s) <= max_chars:
+        return [s]
+    out, buf = [], ""
+    for ch in s:
+        buf += ch
+        if ch in "、。！？" and len(buf) >= int(max_chars * 0.6):
+            out.append(buf.strip())
+            buf = ""
+        elif len(buf) >= max_chars:
+            out.append(buf.strip())
+            buf = ""
+    if buf.strip():
+        out.append(buf.strip())
+    return out
+
+
+def _legacy_wrap(text: str, max_length: int = DEFAULT_WIDTH) -> str:
+    lines = []
+    t = text.strip()
+    while len(t) > max_length:
+        idx = max(t.rfind("、", 0, max_length), t.rfind("。", 0, max_length))
+        if idx == -1:
+            idx = max_length
+        lines.append(t[:idx+1].strip())
+        t = t[idx+1:].strip()
+    lines.append(t)
+    return "\n".join([x for x in lines if x])
+
+
+def _synthetic_book(chars: int) -> str:
+    # 普通の文・会話文・句読点のない長い段落を混ぜる
+    parts = [
+        "吾輩は猫である。名前はまだ無い。",
+        "「本当に？」と彼は言った。",
+        "「今日は晴れ。明日は雨。」\n",
+        "どこで生れたかとんと見当がつかぬ、何でも薄暗いじめじめした所でニャーニャー泣いていた事だけは記憶している。\n",
+        "あ" * 3000 + "。\n",
+    ]
+    out: List[str] = []
+    total = 0
+    k = 0
+    while total < chars:
+        p = parts[k % len(parts)]
+        out.append(p)
+        total += len(p)
+        k += 1
+    return "".join(out)[:chars]
+
+
+def bench(text: str, width: int = DEFAULT_WIDTH, max_chars: int = DEFAULT_MAX_CHARS) -> None:
+    def run(split, chunk, wrap):
+        t0 = time.perf_counter()
+        sentences = [c for s in split(text) for c in chunk(s, max_chars)]
+        t1 = time.perf_counter()
+        for s in sentences:
+            wrap(s, width)
+        t2 = time.perf_counter()
+        return len(sentences), t1 - t0, t2 - t1
+
+    print(f"入力: {len(text):,} 文字")
+    for name, fns in (
+        ("旧実装", (_legacy_split, _legacy_chunk, _legacy_wrap)),
+        ("jp_segment", (split_sentences, chunk_sentence, wrap_text)),
+    ):
+        n, ts, tw = run(*fns)
+        print(f"  {name:<10} 文 {n:>8,}  分割 {ts:8.3f} 秒  改行 {tw:8.3f} 秒  計 {ts + tw:8.3f} 秒")
+
+    # 句読点のない長い段落だけ（旧実装が2乗になるケース）
+    for size in (100_000, 1_000_000):
+        blob = "あ" * size
+        t0 = time.perf_counter()
+        _legacy_wrap(blob, width)
+        _legacy_chunk(blob, max_chars)
+        t1 = time.perf_counter()
+        wrap_text(blob, width)
+        chunk_sentence(blob, max_chars)
+        t2 = time.perf_counter()
+        print(f"  句読点なし {size:>7,} 文字: 旧 {t1 - t0:8.3f} 秒 / 新 {t2 - t1:8.3f} 秒")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "bench":
+        if len(sys.argv) >= 3:
+            with open(sys.argv[2], encoding="utf-8-sig", errors="replace") as f:
+                src = f.read()
+        else:
+            src = _synthetic_book(1_000_000)
+        bench(src)
+    else:
+        sys.exit("usage: python jp_segment.py bench [input.txt]")
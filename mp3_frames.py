@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+MP3 フレームヘッダをメモリ上で直接読んで、正確なサンプル数と長さを求める
+
+- TTS のレスポンス(bytes)をそのまま渡せる（ファイルに書いて開き直さない）
+- フレームを全部数えるので VBR でも推定ではなく実測
+- 先頭の ID3v2 / 末尾の ID3v1 はスキップ
+- Xing/Info フレームは音声として数えない。LAME タグがあればエンコーダ遅延/パディングを差し引く
+  （CRC 付きのフレームでは、ヘッダ直後の 2byte の分だけ後ろにずらして探す）
+- 同期を探し直すとき（先頭・壊れた箇所の後）は、そのフレームの直後にも同じストリームの正しいヘッダが
+  続くことを確かめてから数える（音声データ中の 0xFFE… を偶然ヘッダと取り違えない）
+"""
+
+from typing import NamedTuple
+
+# ビットレート表（kbps） [MPEG1 / MPEG2・2.5][Layer1..3][index]
+_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG1
+    2: [22050, 24000, 16000],  # MPEG2
+    0: [11025, 12000, 8000],   # MPEG2.5
+}
+
+
+class Mp3Info(NamedTuple):
+    samples: int       # 1ch あたりのサンプル数（遅延/パディング補正後）
+    sample_rate: int
+    channels: int
+    frames: int        # 音声フレーム数（Xing/Info を除く）
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+
+class _Header(NamedTuple):
+    version_bits: int
+    layer: int
+    sample_rate: int
+    channels: int
+    frame_len: int
+    samples: int
+    side_info_len: int
+    crc: bool            # protection bit が 0 → ヘッダの後に CRC 16bit
+
+
+def _parse_header(b: bytes, pos: int):
+    if pos + 4 > len(b):
+        return None
+    h = int.from_bytes(b[pos:pos + 4], "big")
+    if (h >> 21) & 0x7FF != 0x7FF:
+        return None
+
+    version_bits = (h >> 19) & 0x3   # 3=MPEG1, 2=MPEG2, 0=MPEG2.5
+    layer_bits = (h >> 17) & 0x3     # 3=L1, 2=L2, 1=L3
+    br_idx = (h >> 12) & 0xF
+    sr_idx = (h >> 10) & 0x3
+    crc = not (h >> 16) & 0x1
+    padding = (h >> 9) & 0x1
+    mode = (h >> 6) & 0x3
+
+    if version_bits == 1 or layer_bits == 0 or br_idx in (0, 15) or sr_idx == 3:
+        return None
+
+    layer = 4 - layer_bits
+    mpeg1 = version_bits == 3
+    bitrate = _BITRATES[(1 if mpeg1 else 2, layer)][br_idx] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sr_idx]
+    channels = 1 if mode == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        frame_len = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2:
+        samples = 1152
+        frame_len = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 1152 if mpeg1 else 576
+        frame_len = (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+
+    if mpeg1:
+        side_info_len = 17 if channels == 1 else 32
+    else:
+        side_info_len = 9 if channels == 1 else 17
+
+    return _Header(version_bits, layer, sample_rate, channels, frame_len, samples, side_info_len, crc)
+
+
+def _same_stream(a: _Header, b: _Header) -> bool:
+    return a.version_bits == b.version_bits and a.layer == b.layer and a.sample_rate == b.sample_rate
+
+
+def _confirmed(b: bytes, pos: int, hdr: _Header, end: int) -> bool:
+    """
+    pos のヘッダの直後（pos + frame_len）にも同じストリームのヘッダがあるか。最後のフレームならそれで良しとする
+    """
+    nxt = pos + hdr.frame_len
+    if nxt == end:
+        return True
+    h2 = _parse_header(b, nxt)
+    return h2 is not None and nxt + 4 <= end and _same_stream(hdr, h2)
+
+
+def _skip_id3v2(b: bytes) -> int:
+    if len(b) >= 10 and b[:3] == b"ID3":
+        size = (b[6] & 0x7F) << 21 | (b[7] & 0x7F) << 14 | (b[8] & 0x7F) << 7 | (b[9] & 0x7F)
+        footer = 10 if b[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _xing_info(b: bytes, pos: int, hdr: _Header):
+    """
+    先頭フレームが Xing/Info なら (True, 遅延, パディング) を返す
+    """
+    off = pos + 4 + (2 if hdr.crc else 0) + hdr.side_info_len
+    tag = b[off:off + 4]
+    if tag not in (b"Xing", b"Info"):
+        return False, 0, 0
+
+    flags = int.from_bytes(b[off + 4:off + 8], "big")
+    p = off + 8
+    if flags & 0x1:
+        p += 4   # frames
+    if flags & 0x2:
+        p += 4   # bytes
+    if flags & 0x4:
+        p += 100  # TOC
+    if flags & 0x8:
+        p += 4   # quality
+
+    # LAME 拡張タグ（エンコーダ名9byte + 12byte の後に 遅延12bit/パディング12bit）
+    if b[p:p + 4] in (b"LAME", b"Lavf", b"Lavc") and p + 24 <= len(b):
+        x = int.from_bytes(b[p + 21:p + 24], "big")
+        return True, x >> 12, x & 0xFFF
+    return True, 0, 0
+
+
+def parse_mp3(data: bytes) -> Mp3Info:
+    """
+    MP3 のバイト列からフレームを数えて Mp3Info を返す。
+    フレームが1つも見つからなければ ValueError。
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+
+    pos = _skip_id3v2(data)
+    frames = 0
+    samples = 0
+    sample_rate = 0
+    channels = 0
+    delay = pad = 0
+    ref = None          # 最初のフレームのヘッダ（以降のフレームは同じストリームのはず）
+    locked = False      # 直前のフレームの終わりがちょうどここ（同期が取れている）
+
+    while pos + 4 <= end:
+        hdr = _parse_header(data, pos)
+        if (hdr is None or hdr.frame_len <= 0
+                or (ref is not None and not _same_stream(ref, hdr))
+                or (not locked and not _confirmed(data, pos, hdr, end))):
+            # 同期が外れていたら1バイトずつ探し直す（見つけたヘッダは次のヘッダで確かめる）
+            locked = False
+            pos += 1
+            continue
+        locked = True
+
+        if ref is None:
+            ref = hdr
+            sample_rate = hdr.sample_rate
+            channels = hdr.channels
+            is_tag, delay, pad = _xing_info(data, pos, hdr)
+            if is_tag:
+                pos += hdr.frame_len
+                continue
+
+        if pos + hdr.frame_len > end:
+            break
+
+        frames += 1
+        samples += hdr.samples
+        pos += hdr.frame_len
+
+    if frames == 0:
+        raise ValueError("no MPEG audio frames found")
+
+    samples = max(0, samples - delay - pad)
+    return Mp3Info(samples=samples, sample_rate=sample_rate, channels=channels, frames=frames)
+
+
+def mp3_duration(data: bytes) -> float:
+    return parse_mp3(data).duration
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+PCM(16bit/mono) 上で音声を1本に組み立てる
+
+従来: TTS mp3 → 無音mp3を ffmpeg で作る → concat で libmp3lame 再エンコード → MP4 で AAC 再エンコード
+PCM : 各パートを PCM に展開 → 事前確保した1本の NumPy バッファにコピー
+      → ポーズは「ちょうど N サンプルの 0」→ WAV 1本を MP4 側で1回だけエンコード
+
+- TTS に LINEAR16 を頼めば展開は WAV ヘッダを外すだけ（ffmpeg 不要）
+- MP3 等が来た場合だけ ffmpeg パイプで展開
+- 長さはすべてサンプル数で持つので、SRT はサンプル単位で音声と一致する
+"""
+
+import io
+import wave
+import subprocess
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+from tts_pool import run_ordered
+
+
+class Assembled(NamedTuple):
+    pcm: "np.ndarray"         # int16 / mono
+    sample_rate: int
+    durations: List[float]    # 各パートの長さ（秒、サンプル数/サンプルレート）
+    pauses: List[float]       # 実際に入れたポーズ（秒、サンプル数に丸めた値）
+
+    @property
+    def total_seconds(self) -> float:
+        return len(self.pcm) / self.sample_rate
+
+
+# ================== 展開 ==================
+def _wav_pcm(data: bytes, sample_rate: int):
+    """
+    16bit/mono/指定レートの WAV ならそのまま int16 配列に。条件外なら None
+    """
+    try:
+        with wave.open(io.BytesIO(data)) as w:
+            if w.getsampwidth() != 2 or w.getnchannels() != 1 or w.getframerate() != sample_rate:
+                return None
+            frames = w.readframes(w.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    return np.frombuffer(frames, dtype="<i2")
+
+
+def decode_to_pcm(data: bytes, sample_rate: int) -> "np.ndarray":
+    pcm = _wav_pcm(data, sample_rate) if data[:4] == b"RIFF" else None
+    if pcm is not None:
+        return pcm
+
+    r = subprocess.run([
+        "ffmpeg", "-v", "error",
+        "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1",
+    ], input=data, capture_output=True)
+    if r.returncode != 0:
+        print("❌ PCM展開失敗:")
+        print(r.stderr.decode("utf-8", errors="replace"))
+        raise RuntimeError("command failed")
+    return np.frombuffer(r.stdout, dtype="<i2")
+
+
+def pcm_seconds(data: bytes, sample_rate: int) -> float:
+    """
+    LINEAR16(WAV) の長さをヘッダから求める（展開しない）
+    """
+    with wave.open(io.BytesIO(data)) as w:
+        return w.getnframes() / float(w.getframerate() or sample_rate)
+
+
+# ================== 組み立て ==================
+def assemble(
+    audios: Sequence[bytes],
+    pauses: Sequence[float],
+    sample_rate: int = 24000,
+    workers: int = 4,
+) -> Assembled:
+    """
+    audios[i] の後に pauses[i] 秒の無音を入れて1本にする
+    """
+    parts = run_ordered(audios, lambda _i, a: decode_to_pcm(a, sample_rate), workers=workers)
+    pause_n = [max(0, int(round(p * sample_rate))) for p in pauses]
+
+    total = sum(len(p) for p in parts) + sum(pause_n)
+    buf = np.zeros(total, dtype=np.int16)  # ポーズ部分は 0 のまま
+
+    pos = 0
+    for part, n in zip(parts, pause_n):
+        buf[pos:pos + len(part)] = part
+        pos += len(part) + n
+
+    return Assembled(
+        pcm=buf,
+        sample_rate=sample_rate,
+        durations=[len(p) / sample_rate for p in parts],
+        pauses=[n / sample_rate for n in pause_n],
+    )
+
+
+def write_wav(path: str, a: Assembled) -> None:
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(a.sample_rate)
+        w.writeframes(a.pcm.astype("<i2", copy=False).tobytes())
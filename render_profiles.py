@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+出力プロファイル（1回の TTS・音声組み立てから、解像度や字幕の見た目が違う MP4 を何本も作る）
+
+    wide        1920x1080 / 25文字で改行 / MS Gothic 18    → <base>.mp4（従来の google_txt2tts_srt_mp4_jp.py）
+    short       720x1280  / 13文字（固定幅）/ Meiryo 16    → <base>-short.mp4（google_txt2tts_srt_mp4_jp_short.py と同じ見た目）
+    <名前>-light 背景を白・文字を黒にしたテーマ違い          → 例: wide-light → <base>-light.mp4
+
+- 改行幅が違うので SRT もプロファイルごと（<base><suffix>.srt）。音声と字幕の時刻は共通
+- get_profile("short-light") のように「基本形-テーマ」で指定する
+"""
+
+from typing import Dict, NamedTuple, Tuple
+
+
+class Profile(NamedTuple):
+    name: str
+    width: int
+    height: int
+    wrap_chars: int            # 字幕の1行の文字数（SRT_WRAP_CHARS）
+    font_size: int
+    font: str = "MS Gothic"
+    margin_v: int = 80
+    wrap_punct: bool = True    # 幅以内の最後の「、。」で改行する（False なら固定幅）
+    background: str = "black"  # ffmpeg の色名
+    primary: str = ""          # 字幕の文字色（ASS の &HAABBGGRR。"" なら libass の既定=白）
+    outline: str = ""          # 縁取りの色（"" なら既定=黒）
+    suffix: str = ""           # 出力ファイル名 <base><suffix>.mp4 / .srt
+
+    @property
+    def size(self) -> str:
+        return f"{self.width}x{self.height}"
+
+    def force_style(self) -> str:
+        font = self.font.replace(" ", "\\ ")
+        style = f"FontName={font},FontSize={self.font_size},Alignment=2,MarginV={self.margin_v}"
+        if self.primary:
+            style += f",PrimaryColour={self.primary}"
+        if self.outline:
+            style += f",OutlineColour={self.outline}"
+        return style
+
+
+BASE_PROFILES: Dict[str, Profile] = {
+    "wide": Profile("wide", 1920, 1080, wrap_chars=25, font_size=18),
+    "short": Profile("short", 720, 1280, wrap_chars=13, font_size=16, font="Meiryo", margin_v=100,
+                     wrap_punct=False, suffix="-short"),
+}
+
+# テーマ名 → (背景色, 文字色, 縁取り色)。dark は従来どおり（黒背景・白文字）
+THEMES: Dict[str, Tuple[str, str, str]] = {
+    "dark": ("black", "", ""),
+    "light": ("white", "&H00000000", "&H00FFFFFF"),
+}
+
+
+def get_profile(name: str) -> Profile:
+    """
+    "wide" / "short" / "wide-light" / "short-dark" など
+    """
+    base, _, theme = name.partition("-")
+    if base not in BASE_PROFILES:
+        raise ValueError(f"未知のプロファイル: {name}（{', '.join(BASE_PROFILES)}）")
+    p = BASE_PROFILES[base]
+    if not theme or theme == "dark":
+        return p._replace(name=name)
+    if theme not in THEMES:
+        raise ValueError(f"未知のテーマ: {theme}（{', '.join(THEMES)}）")
+    bg, primary, outline = THEMES[theme]
+    return p._replace(name=name, background=bg, primary=primary, outline=outline,
+                      suffix=f"{p.suffix}-{theme}")
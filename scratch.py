@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+実行ごとの作業フォルダ（既定は RAM 上の /dev/shm、足りなければディスク）
+
+従来は TMP_DIR = "_tts_tmp" 固定だったので、同じフォルダで2本同時に動かすと mp3_list.txt や sub.srt を
+上書きし合っていた。ここでは1実行ごとに一意なフォルダを作る:
+
+    with Scratch("tts_input", need_bytes=estimate_bytes(os.path.getsize("input.txt"))) as scr:
+        work = scr.path          # 例: /dev/shm/tts_input_12345_k3j2a9/
+        ...
+
+- 置き場所: root 指定 > /dev/shm（あって書き込めて、空きが need_bytes + 余裕 以上なら）> OS の一時フォルダ
+  （Windows には /dev/shm がないので常に一時フォルダ）
+- 片付け: "always"=必ず消す / "on_success"=失敗したら残す（中身を調べる用） / "never"=残す
+  消すのはここで作ったフォルダだけ（path で渡された既存のフォルダは、どの方針でも消さない）
+"""
+
+import os
+import shutil
+import tempfile
+from typing import List, Optional, Tuple
+
+SHM_ROOT = "/dev/shm"
+HEADROOM_BYTES = 256 * 1024 ** 2   # 空き容量の確認で need_bytes に足す余裕
+CLEANUP_MODES = ("always", "on_success", "never")
+
+
+def estimate_bytes(input_bytes: int, sample_rate: int = 24000, sec_per_char: float = 0.15) -> int:
+    """
+    入力 txt の大きさから作業フォルダに要る量をざっくり見積もる
+    （1文字 ≥ 2バイトとして文字数を多めに取り、16bit モノラル PCM（WAV）2本ぶん）
+    """
+    chars = max(1, input_bytes // 2)
+    return int(chars * sec_per_char * sample_rate * 2 * 2)
+
+
+def _free_bytes(path: str) -> int:
+    try:
+        return shutil.disk_usage(path).free
+    except OSError:
+        return 0
+
+
+def candidate_roots(root: str = "", fallback: str = "") -> List[str]:
+    if root:
+        return [root]
+    out: List[str] = []
+    if os.path.isdir(SHM_ROOT) and os.access(SHM_ROOT, os.W_OK):
+        out.append(SHM_ROOT)
+    out.append(fallback or tempfile.gettempdir())
+    return out
+
+
+def pick_root(need_bytes: int, root: str = "", fallback: str = "") -> Tuple[str, bool]:
+    """
+    (置き場所, RAM上か) を返す。どこも空きが足りなければ最後の候補（ディスク）
+    """
+    cands = candidate_roots(root, fallback)
+    for c in cands:
+        if _free_bytes(c) >= need_bytes + HEADROOM_BYTES:
+            return c, os.path.abspath(c) == SHM_ROOT
+    last = cands[-1]
+    return last, os.path.abspath(last) == SHM_ROOT
+
+
+class Scratch:
+    def __init__(self, prefix: str, need_bytes: int = 0, root: str = "", fallback: str = "",
+                 cleanup: str = "always", path: str = ""):
+        """
+        path を渡すとそのフォルダをそのまま使う（無ければ作る。片付けるのは作ったときだけ）
+        """
+        if cleanup not in CLEANUP_MODES:
+            raise ValueError(f"cleanup は {CLEANUP_MODES} のどれか: {cleanup}")
+        self.prefix = prefix
+        self.need_bytes = need_bytes
+        self.root = root
+        self.fallback = fallback
+        self.cleanup = cleanup
+        self.path = path
+        self.ram = False
+        self.kept = False
+        self.owned = False   # create() で作ったフォルダか（呼び出し側のフォルダは消さない）
+
+    def create(self) -> str:
+        if self.path:
+            self.owned = not os.path.exists(self.path)
+            os.makedirs(self.path, exist_ok=True)
+            self.ram = os.path.abspath(self.path).startswith(SHM_ROOT + os.sep)
+            return self.path
+        where, self.ram = pick_root(self.need_bytes, self.root, self.fallback)
+        os.makedirs(where, exist_ok=True)
+        self.path = tempfile.mkdtemp(prefix=f"{self.prefix}_{os.getpid()}_", dir=where)
+        self.owned = True
+        return self.path
+
+    def finish(self, ok: bool) -> None:
+        if not self.owned or not self.path or not os.path.exists(self.path):
+            return
+        if self.cleanup == "always" or (self.cleanup == "on_success" and ok):
+            shutil.rmtree(self.path, ignore_errors=True)
+        else:
+            self.kept = True
+
+    def describe(self) -> str:
+        where = "RAM" if self.ram else "ディスク"
+        cleanup = self.cleanup if self.owned else "never（指定フォルダ）"
+        return f"作業フォルダ: {self.path}（{where} / 見積 {self.need_bytes / 1024 ** 2:.0f} MB / 片付け {cleanup}）"
+
+    def __enter__(self) -> "Scratch":
+        self.create()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> Optional[bool]:
+        self.finish(exc_type is None)
+        return None
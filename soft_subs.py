@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+字幕を焼き込まない出力（映像は作り置きの背景クリップを -c copy でつなぐだけ。映像のエンコードなし）
+
+    soft    … SRT を mov_text の字幕トラックとして MP4 に入れる（プレーヤーで表示/非表示を切り替えられる）
+    sidecar … MP4 には入れず、横の <base>.srt をそのまま使う（uploader11.py --captions で YouTube の字幕として上げる）
+
+焼き込み（subtitles= フィルタ）は字幕を描くために映像を毎回エンコードし直すので、文字の多い動画ほど重い。
+ここでは背景色・解像度ごとに BG_SEGMENT_SEC 秒の背景クリップを1回だけエンコードしてキャッシュし、
+ffconcat で必要な長さまで並べて -t で切る。残るエンコードは音声(AAC)だけ。
+"""
+
+import os
+import math
+import threading
+import subprocess
+from typing import List, Optional
+
+BG_SEGMENT_SEC = 60
+BG_FPS = 30
+SUBTITLE_MODES = ("burn", "soft", "sidecar")
+
+
+def background_clip(cache_dir: str, size: str, color: str = "black",
+                    fps: int = BG_FPS, seconds: int = BG_SEGMENT_SEC) -> str:
+    """
+    背景クリップのパスを返す（無ければ作る。同時に呼ばれても別名で作ってから置き換える）
+    """
+    path = os.path.join(cache_dir, f"bg_{color}_{size}_{fps}fps_{seconds}s.mp4")
+    if os.path.exists(path):
+        return path
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.mp4"
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"color=c={color}:s={size}:r={fps}",
+        "-t", str(seconds),
+        "-c:v", "libx264", "-tune", "stillimage", "-preset", "veryfast",
+        "-g", str(fps * 2),
+        "-pix_fmt", "yuv420p",
+        tmp,
+    ]
+    r = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    if r.returncode != 0:
+        print("❌ コマンド失敗:")
+        print("   " + " ".join(cmd))
+        print("---- stderr ----")
+        print(r.stderr)
+        raise RuntimeError("command failed")
+    os.replace(tmp, path)
+    return path
+
+
+def write_loop_list(list_path: str, clip: str, total_duration: float, seconds: int = BG_SEGMENT_SEC) -> int:
+    """
+    clip を total_duration 以上になるまで並べた ffconcat を書く。並べた本数を返す
+    """
+    n = max(1, math.ceil(total_duration / seconds))
+    entry = "file '" + os.path.abspath(clip).replace("\\", "/").replace("'", "'\\''") + "'\n"
+    with open(list_path, "w", encoding="utf-8") as f:
+        f.write("ffconcat version 1.0\n")
+        f.write(entry * n)
+    return n
+
+
+def build_command(
+    list_path: str,
+    audio: str,
+    mp4_out: str,
+    total_duration: float,
+    srt: Optional[str] = None,
+    bgm=None,
+    language: str = "jpn",
+) -> List[str]:
+    """
+    srt を渡すと mov_text トラックとして入れる（sidecar なら None）
+    bgm（fused_render.BgmSpec）があれば音声だけ amix する。映像は常に -c:v copy
+    """
+    cmd = ["ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path, "-i", audio]
+    idx = 2
+    srt_index = bgm_index = -1
+    if srt:
+        cmd += ["-i", srt]
+        srt_index, idx = idx, idx + 1
+    if bgm:
+        cmd += ["-stream_loop", "-1", "-i", bgm.path]
+        bgm_index = idx
+
+    cmd += ["-map", "0:v"]
+    if bgm:
+        cmd += [
+            "-filter_complex",
+            f"[1:a]aformat=channel_layouts=stereo,volume={bgm.voice_volume}[v0];"
+            f"[{bgm_index}:a]aformat=channel_layouts=stereo,volume={bgm.volume}[bgm];"
+            "[v0][bgm]amix=inputs=2:duration=first:dropout_transition=2:normalize=1[aout]",
+            "-map", "[aout]",
+        ]
+    else:
+        cmd += ["-map", "1:a"]
+    if srt:
+        cmd += ["-map", f"{srt_index}:s", "-c:s", "mov_text", "-metadata:s:s:0", f"language={language}"]
+
+    cmd += [
+        "-c:v", "copy",
+        "-c:a", "aac", "-b:a", "192k",
+        "-t", f"{total_duration:.3f}",
+        "-movflags", "+faststart",
+        mp4_out,
+    ]
+    return cmd
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+連続する文を1本の SSML リクエストにまとめる（リクエスト数を 5〜20分の1 に）
+
+    <speak><mark name="s0"/>文0<mark name="e0"/><break time="250ms"/><mark name="s1"/>文1<mark name="e1"/></speak>
+
+- マーク名はパックの中での位置（s0, e0, s1, ...）。台本全体の文番号は使わないので、パックの SSML は
+  中の文とポーズだけで決まる（前に文を足し引きしても、同じ中身のパックはキャッシュ/マニフェストがそのまま効く）
+
+- 1リクエストのバイト数が max_bytes を超えないように詰める（API 上限は 5000 バイト）
+- 文間のポーズ（PAUSE_SEC）はパック内では <break> で表現し、パックの最後の文のポーズだけ外で足す
+- TTS にはタイムポイント(SSML_MARK)を要求し、s/e マークの時刻から文ごとの開始/終了を出す
+- マークが返ってこない文は、パック内の残り時間を文字数で按分する
+"""
+
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+DEFAULT_MAX_BYTES = 4500
+
+
+class Pack(NamedTuple):
+    indices: List[int]   # 元の文番号（0始まり）
+    ssml: str
+
+
+def mark_names(j: int) -> Tuple[str, str]:
+    """
+    パック内 j 番目の文の (開始, 終了) マーク名
+    """
+    return f"s{j}", f"e{j}"
+
+
+def _sentence_ssml(j: int, text: str) -> str:
+    start, end = mark_names(j)
+    return f'<mark name="{start}"/>{escape(text)}<mark name="{end}"/>'
+
+
+def _break_ssml(sec: float) -> str:
+    ms = int(round(sec * 1000))
+    return f'<break time="{ms}ms"/>' if ms > 0 else ""
+
+
+def pack_sentences(
+    sentences: Sequence[str],
+    pauses: Sequence[float],
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> List[Pack]:
+    packs: List[Pack] = []
+    head, tail = "<speak>", "</speak>"
+
+    cur: List[int] = []
+    body = ""
+    for k, s in enumerate(sentences):
+        piece = _sentence_ssml(len(cur), s)
+        joint = _break_ssml(pauses[cur[-1]]) if cur else ""
+        cand = body + joint + piece
+        if cur and len((head + cand + tail).encode("utf-8")) > max_bytes:
+            packs.append(Pack(cur, head + body + tail))
+            cur, body = [], ""
+            cand = _sentence_ssml(0, s)
+        cur.append(k)
+        body = cand
+
+    if cur:
+        packs.append(Pack(cur, head + body + tail))
+    return packs
+
+
+def sentence_timings(
+    packs: Sequence[Pack],
+    sentences: Sequence[str],
+    marks: Sequence[Dict[str, float]],
+    pack_durations: Sequence[float],
+    pack_pauses: Sequence[float],
+) -> Tuple[List[float], List[float]]:
+    """
+    パックごとのマーク時刻と (実際の) パック長/パック後ポーズから、
+    generate_srt にそのまま渡せる文ごとの (durations, pauses) を作る
+    """
+    starts: List[float] = []
+    ends: List[float] = []
+
+    t = 0.0
+    for pack, mk, pdur, ppause in zip(packs, marks, pack_durations, pack_pauses):
+        # マークが無い文はパック内で文字数按分
+        total_chars = sum(max(1, len(sentences[k])) for k in pack.indices) or 1
+        acc = 0.0
+        for j, k in enumerate(pack.indices):
+            share = pdur * max(1, len(sentences[k])) / total_chars
+            start, end = mark_names(j)
+            s = mk.get(start, acc)
+            e = mk.get(end, s + share)
+            s = min(max(s, 0.0), pdur)
+            e = min(max(e, s), pdur)
+            starts.append(t + s)
+            ends.append(t + e)
+            acc = e
+        t += pdur + ppause
+
+    # 先頭の無音は1文目に含める（SRT は 0 秒から始まるため）
+    if starts:
+        starts[0] = 0.0
+
+    durations: List[float] = []
+    pauses: List[float] = []
+    for i in range(len(starts)):
+        nxt = starts[i + 1] if i + 1 < len(starts) else t
+        durations.append(ends[i] - starts[i])
+        pauses.append(max(0.0, nxt - ends[i]))
+    return durations, pauses
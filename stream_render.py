@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+TTS と並行して MP4 を作るストリーミング描画
+
+従来: TTS 全部 → 音声結合 → SRT → MP4（エンコーダは TTS の間ずっと待っている）
+ここ: 文の音声が先頭から順に届くたびに
+  - 音声: 常駐 ffmpeg の stdin に PCM(+ポーズの0サンプル)を流し込み、その場で AAC にエンコード
+  - 字幕: 時刻が確定した字幕を SRT に1件ずつ追記
+  - 映像: 字幕が segment_sec 秒分たまったら、その区間の映像(-an)を別スレッドでエンコード開始
+最後に 映像セグメントを concat(-c copy) ＋ AAC を mux するだけ（再エンコードなし）
+
+- 区間は文(アイテム)の境目でしか切らないので、1つの字幕が2区間にまたがることはない
+- 区間の長さは ffconcat の duration で指定するので、つなぎ目で時刻がずれない
+- 手元に持つのは「まだ区間に入っていない字幕」だけ。音声は書いたら捨てる（台本の長さに依存しない）
+- 区間の映像は render_segment(srt, mp4, cues, 長さ) で作る（字幕スタイル等は呼び出し側が決める）
+"""
+
+import os
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Sequence, Tuple
+
+import numpy as np
+
+Cue = Tuple[float, float]
+RenderSegment = Callable[[str, str, List[Cue], float], None]
+
+DEFAULT_SEGMENT_SEC = 60.0
+
+
+def _srt_time(t: float) -> str:
+    total_ms = int(round(t * 1000.0))
+    ms = total_ms % 1000
+    total_s = total_ms // 1000
+    h = total_s // 3600
+    m = (total_s % 3600) // 60
+    s = total_s % 60
+    return f"{h:02}:{m:02}:{s:02},{ms:03}"
+
+
+class StreamRender:
+    def __init__(
+        self,
+        mp4_out: str,
+        srt_out: str,
+        work_dir: str,
+        render_segment: RenderSegment,
+        sample_rate: int = 24000,
+        segment_sec: float = DEFAULT_SEGMENT_SEC,
+        video_workers: int = 2,
+        audio_bitrate: str = "192k",
+    ):
+        self.mp4_out = mp4_out
+        self.srt_out = srt_out
+        self.work_dir = work_dir
+        self.render_segment = render_segment
+        self.sample_rate = sample_rate
+        self.segment_sec = segment_sec
+
+        self.samples = 0          # ここまでに書いた総サンプル数（= 現在時刻）
+        self.n_cues = 0
+        self.seg_start = 0.0
+        self.seg_cues: List[Tuple[str, float, float]] = []   # (字幕テキスト, 開始, 終了) 絶対時刻
+        self.segments: List[Tuple[str, float]] = []          # (mp4, 長さ)
+        self.futures: List[Future] = []
+
+        os.makedirs(work_dir, exist_ok=True)
+        self.audio_path = os.path.join(work_dir, "stream_audio.m4a")
+        self._audio_log = open(os.path.join(work_dir, "stream_audio.log"), "wb")
+        self._audio = subprocess.Popen([
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "aac", "-b:a", audio_bitrate,
+            self.audio_path,
+        ], stdin=subprocess.PIPE, stderr=self._audio_log)
+        self._srt = open(srt_out, "w", encoding="utf-8")
+        self._pool = ThreadPoolExecutor(max_workers=max(1, video_workers))
+
+    @property
+    def seconds(self) -> float:
+        return self.samples / self.sample_rate
+
+    # ---------- 追加 ----------
+    def add(self, pcm: "np.ndarray", pause_sec: float,
+            texts: Sequence[str], durations: Sequence[float], pauses: Sequence[float]) -> None:
+        """
+        1アイテム分（1文、または SSML パック1つ）の PCM と、その後ろのポーズを流す。
+        texts/durations/pauses はアイテム内の字幕（秒、アイテム先頭からの並び）
+        """
+        pause_n = max(0, int(round(pause_sec * self.sample_rate)))
+        t = self.seconds
+
+        self._audio.stdin.write(pcm.astype("<i2", copy=False).tobytes())
+        if pause_n:
+            self._audio.stdin.write(b"\x00\x00" * pause_n)
+
+        for text, d, p in zip(texts, durations, pauses):
+            self.n_cues += 1
+            self._srt.write(f"{self.n_cues}\n{_srt_time(t)} --> {_srt_time(t + d)}\n{text}\n\n")
+            self.seg_cues.append((text, t, t + d))
+            t += d + p
+        self._srt.flush()
+
+        self.samples += len(pcm) + pause_n
+        if self.seconds - self.seg_start >= self.segment_sec:
+            self._flush_segment()
+
+    def _flush_segment(self) -> None:
+        end = self.seconds
+        length = end - self.seg_start
+        if length <= 0:
+            return
+        k = len(self.segments)
+        seg_srt = os.path.join(self.work_dir, f"seg_{k:04}.srt")
+        seg_mp4 = os.path.join(self.work_dir, f"seg_{k:04}.mp4")
+
+        # 区間内の相対時刻にした SRT と cue
+        cues: List[Cue] = []
+        with open(seg_srt, "w", encoding="utf-8") as f:
+            for i, (text, a, b) in enumerate(self.seg_cues, 1):
+                a, b = a - self.seg_start, b - self.seg_start
+                f.write(f"{i}\n{_srt_time(a)} --> {_srt_time(b)}\n{text}\n\n")
+                cues.append((a, b))
+
+        self.segments.append((seg_mp4, length))
+        self.futures.append(self._pool.submit(self.render_segment, seg_srt, seg_mp4, cues, length))
+        self.seg_start = end
+        self.seg_cues = []
+
+    # ---------- 仕上げ ----------
+    def close(self) -> float:
+        """
+        残りの区間を出し、音声エンコードとすべての区間の完了を待って mux する。総尺(秒)を返す
+        """
+        self._flush_segment()
+        self._srt.close()
+        self._audio.stdin.close()
+        rc = self._audio.wait()
+        self._audio_log.close()
+        if rc != 0:
+            with open(os.path.join(self.work_dir, "stream_audio.log"), encoding="utf-8", errors="replace") as f:
+                print(f.read())
+            raise RuntimeError("command failed")
+
+        try:
+            for fut in self.futures:
+                fut.result()
+        finally:
+            self._pool.shutdown()
+
+        list_path = os.path.join(self.work_dir, "segments.ffconcat")
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("ffconcat version 1.0\n")
+            for path, length in self.segments:
+                f.write(f"file '{os.path.abspath(path).replace(chr(92), '/')}'\n")
+                f.write(f"duration {length:.6f}\n")
+
+        total = self.seconds
+        r = subprocess.run([
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "concat", "-safe", "0", "-i", list_path,
+            "-i", self.audio_path,
+            "-map", "0:v", "-map", "1:a",
+            "-c", "copy",
+            "-t", f"{total:.3f}",
+            "-movflags", "+faststart",
+            self.mp4_out,
+        ], capture_output=True, text=True)
+        if r.returncode != 0:
+            print("❌ mux 失敗:")
+            print(r.stderr)
+            raise RuntimeError("command failed")
+        return total
+
+    def abort(self) -> None:
+        """
+        途中で失敗したとき用: 常駐 ffmpeg を止め、未着手の区間を捨てる
+        """
+        for fut in self.futures:
+            fut.cancel()
+        self._pool.shutdown(wait=True)
+        try:
+            self._srt.close()
+            if self._audio.stdin and not self._audio.stdin.closed:
+                self._audio.stdin.close()
+        except OSError:
+            pass
+        if self._audio.poll() is None:
+            self._audio.kill()
+        self._audio.wait()
+        self._audio_log.close()
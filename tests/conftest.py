@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+# スクリプトはリポジトリ直下に並んでいるので、そこから import できるようにする
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
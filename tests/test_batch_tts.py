@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import os
+
+from batch_tts import basename_clashes, expand_inputs
+
+
+def test_same_name_in_different_folders_clashes(tmp_path):
+    for d in ("a", "b"):
+        (tmp_path / d).mkdir()
+        (tmp_path / d / "ep1.txt").write_text("x", encoding="utf-8")
+    (tmp_path / "a" / "ep2.txt").write_text("x", encoding="utf-8")
+    files = expand_inputs([str(tmp_path / "a"), str(tmp_path / "b")])
+    clashes = basename_clashes(files)
+    assert list(clashes) == [os.path.normcase("ep1")]
+    assert len(clashes[os.path.normcase("ep1")]) == 2
+
+
+def test_same_file_twice_is_deduplicated_not_a_clash(tmp_path):
+    f = tmp_path / "ep1.txt"
+    f.write_text("x", encoding="utf-8")
+    files = expand_inputs([str(f), str(tmp_path / "." / "ep1.txt")])
+    assert len(files) == 1 and basename_clashes(files) == {}
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+import ffprogress
+
+
+def _fake_ffmpeg(tmp_path, out_times_us, code=0):
+    """
+    引数を無視して -progress の出力だけを真似るスクリプト
+    """
+    blocks = []
+    for i, us in enumerate(out_times_us):
+        end = "end" if i == len(out_times_us) - 1 else "continue"
+        blocks.append(f"frame={i * 30}\nout_time_us={us}\nbitrate=100.0kbits/s\ntotal_size=2048\nspeed=2x\nprogress={end}\n")
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\nimport sys\nsys.stdout.write({''.join(blocks)!r})\nsys.exit({code})\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    return str(script)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="shebang が要る")
+def test_records_real_out_time_and_flags_short(tmp_path):
+    metrics = tmp_path / "m.jsonl"
+    stats = ffprogress.run([_fake_ffmpeg(tmp_path, [1_000_000, 7_000_000]), "out.mp4"],
+                           total_duration=10.0, metrics_path=str(metrics))
+    assert stats.out_time == 7.0
+    assert stats.short_by == 3.0
+    assert json.loads(metrics.read_text(encoding="utf-8"))["short_by"] == 3.0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="shebang が要る")
+def test_full_length_is_not_short(tmp_path):
+    stats = ffprogress.run([_fake_ffmpeg(tmp_path, [5_000_000, 9_980_000]), "out.mp4"], total_duration=10.0)
+    assert stats.out_time == 9.98 and stats.short_by == 0.0
+
+
+@pytest.mark.skipif(os.name == "nt", reason="shebang が要る")
+def test_failure_raises(tmp_path):
+    with pytest.raises(RuntimeError):
+        ffprogress.run([_fake_ffmpeg(tmp_path, [0], code=1), "out.mp4"])
+
+
+def test_short_by_tolerance():
+    assert ffprogress.short_by(599.0, 600.0) == 0.0      # 2% 以内
+    assert ffprogress.short_by(580.0, 600.0) == 20.0
+    assert ffprogress.short_by(0.5, 1.2) == 0.0          # 1秒以内
+    assert ffprogress.short_by(3.0, 0.0) == 0.0
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import jp_segment
+from jp_segment import split_sentences, chunk_sentence, wrap_lines
+
+
+def test_split_basic():
+    assert split_sentences("吾輩は猫である。名前はまだ無い。") == ["吾輩は猫である。", "名前はまだ無い。"]
+
+
+def test_split_keeps_quote_followed_by_particle():
+    assert split_sentences("「本当に？」と彼は言った。次。") == ["「本当に？」と彼は言った。", "次。"]
+
+
+def test_split_does_not_cut_inside_brackets():
+    assert split_sentences("「今日は晴れ。明日は雨。」終わり。") == ["「今日は晴れ。明日は雨。」", "終わり。"]
+    assert split_sentences("（注「あ。い。」）次。") == ["（注「あ。い。」）", "次。"]
+
+
+def test_split_unclosed_bracket_does_not_swallow_line():
+    assert split_sentences("これは「引用が閉じない文。次の文。さらに。") == ["これは「引用が閉じない文。", "次の文。", "さらに。"]
+
+
+def test_split_stray_closer_then_unclosed_opener():
+    assert split_sentences("a」b「c。d。") == ["a」b「c。", "d。"]
+
+
+def test_split_newline_resets_brackets():
+    assert split_sentences("「あ。\nい。」う。") == ["「あ。", "い。」", "う。"]
+
+
+def test_split_long_bracket_span_is_limited():
+    text = "「" + "あ。" * 100 + "」"
+    out = split_sentences(text)
+    assert len(out) > 1
+    assert len(out[0]) <= jp_segment.BRACKET_SPAN_LIMIT + 2
+    assert "".join(out) == text
+
+
+def test_chunk_sentence_respects_max_chars():
+    s = "あ" * 500
+    pieces = chunk_sentence(s, 160)
+    assert "".join(pieces) == s
+    assert all(len(p) <= 160 + jp_segment.MAX_HANG for p in pieces)
+
+
+def test_chunk_sentence_prefers_punctuation():
+    s = "あ" * 100 + "、" + "い" * 100
+    assert chunk_sentence(s, 160)[0] == "あ" * 100 + "、"
+
+
+def test_wrap_lines_kinsoku():
+    lines = wrap_lines("あ" * 10 + "」" + "い" * 5, width=10, prefer_punct=False)
+    assert lines[0].endswith("」")
+    assert all(not line.startswith("」") for line in lines)
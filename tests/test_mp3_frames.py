@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from mp3_frames import parse_mp3
+
+# MPEG2 Layer3 24kHz mono 32kbps（Google TTS の MP3 と同じ形）: 1フレーム 96byte / 576 サンプル
+FRAME_LEN = 96
+
+
+def _header(crc: bool = False) -> bytes:
+    h = (0x7FF << 21) | (2 << 19) | (1 << 17) | ((0 if crc else 1) << 16) | (4 << 12) | (1 << 10) | (3 << 6)
+    return h.to_bytes(4, "big")
+
+
+def _frame(crc: bool = False, fill: int = 0x00) -> bytes:
+    return _header(crc) + bytes([fill]) * (FRAME_LEN - 4)
+
+
+def _xing_frame(crc: bool, delay: int, pad: int) -> bytes:
+    body = bytearray(FRAME_LEN - 4)
+    off = (2 if crc else 0) + 9   # CRC 2byte + サイドインフォ（MPEG2 モノラル 9byte）
+    body[off:off + 4] = b"Info"
+    body[off + 4:off + 8] = (0).to_bytes(4, "big")   # フィールド無し
+    p = off + 8
+    body[p:p + 4] = b"LAME"
+    body[p + 21:p + 24] = ((delay << 12) | pad).to_bytes(3, "big")
+    return _header(crc) + bytes(body)
+
+
+def test_counts_frames():
+    info = parse_mp3(_frame() * 10)
+    assert (info.frames, info.samples, info.sample_rate, info.channels) == (10, 5760, 24000, 1)
+    assert info.duration == pytest.approx(0.24)
+
+
+@pytest.mark.parametrize("crc", [False, True])
+def test_info_tag_found_with_and_without_crc(crc):
+    info = parse_mp3(_xing_frame(crc, 576, 100) + _frame(crc) * 10)
+    assert info.frames == 10
+    assert info.samples == 5760 - 576 - 100
+
+
+def test_false_sync_in_junk_is_not_counted():
+    # 単独の「それらしい」ヘッダ（直後に次のヘッダが無い）は数えない
+    junk = _header() + b"\x11" * 120
+    info = parse_mp3(b"\x00" * 7 + junk + _frame() * 5)
+    assert info.frames == 5
+
+
+def test_resync_after_corruption():
+    data = _frame() * 3 + b"\xff\xf3\x00" + b"\x22" * 40 + _frame() * 4
+    assert parse_mp3(data).frames == 7
+
+
+def test_id3_tags_are_skipped():
+    id3v2 = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 20]) + b"\xff" * 20
+    id3v1 = b"TAG" + b"\x00" * 125
+    assert parse_mp3(id3v2 + _frame() * 4 + id3v1).frames == 4
+
+
+def test_no_frames_raises():
+    with pytest.raises(ValueError):
+        parse_mp3(b"\x00" * 500)
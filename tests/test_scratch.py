@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import os
+
+from scratch import Scratch
+
+
+def test_created_dir_is_removed(tmp_path):
+    scr = Scratch("t", root=str(tmp_path), cleanup="always")
+    path = scr.create()
+    assert scr.owned and os.path.isdir(path)
+    scr.finish(True)
+    assert not os.path.exists(path)
+
+
+def test_existing_caller_dir_is_never_removed(tmp_path):
+    own = tmp_path / "mine"
+    own.mkdir()
+    (own / "keep.txt").write_text("x")
+    for mode in ("always", "on_success"):
+        scr = Scratch("t", cleanup=mode, path=str(own))
+        scr.create()
+        assert not scr.owned
+        scr.finish(True)
+        assert (own / "keep.txt").exists()
+
+
+def test_missing_caller_dir_is_created_and_removed(tmp_path):
+    path = str(tmp_path / "new")
+    scr = Scratch("t", cleanup="always", path=path)
+    scr.create()
+    assert scr.owned
+    scr.finish(True)
+    assert not os.path.exists(path)
+
+
+def test_on_success_keeps_failed_run(tmp_path):
+    scr = Scratch("t", root=str(tmp_path), cleanup="on_success")
+    path = scr.create()
+    scr.finish(False)
+    assert scr.kept and os.path.isdir(path)
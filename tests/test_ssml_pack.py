@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from ssml_pack import pack_sentences, sentence_timings
+
+
+def test_packs_respect_max_bytes_and_keep_order():
+    sentences = [f"文{i}です。" * 5 for i in range(30)]
+    packs = pack_sentences(sentences, [0.25] * 30, max_bytes=600)
+    assert [k for p in packs for k in p.indices] == list(range(30))
+    assert all(len(p.ssml.encode("utf-8")) <= 600 for p in packs)
+    assert len(packs) > 1
+
+
+def test_marks_are_pack_local():
+    packs = pack_sentences(["あ。", "い。", "う。"], [0.25, 0.5, 0.0], max_bytes=80)
+    for p in packs:
+        for j in range(len(p.indices)):
+            assert f'<mark name="s{j}"/>' in p.ssml and f'<mark name="e{j}"/>' in p.ssml
+        assert f'name="s{len(p.indices)}"' not in p.ssml
+
+
+def test_same_sentences_give_same_ssml_wherever_they_are():
+    tail = ["い。", "う。"]
+    a = pack_sentences(["あ。" * 10] + tail, [0.3] * 3, max_bytes=120)
+    b = pack_sentences(["え。" * 10, "お。" * 10] + tail, [0.3] * 4, max_bytes=120)
+    assert a[-1].ssml == b[-1].ssml
+
+
+def test_break_between_sentences_and_escaping():
+    (p,) = pack_sentences(["a<b", "c&d"], [0.25, 1.0])
+    assert '<mark name="e0"/><break time="250ms"/><mark name="s1"/>' in p.ssml
+    assert "a&lt;b" in p.ssml and "c&amp;d" in p.ssml
+    assert "1000ms" not in p.ssml   # 最後の文のポーズはパックの外で足す
+
+
+def test_timings_from_marks():
+    packs = pack_sentences(["あいう。", "えお。"], [0.2, 0.5])
+    marks = [{"s0": 0.1, "e0": 1.0, "s1": 1.2, "e1": 2.0}]
+    durations, pauses = sentence_timings(packs, ["あいう。", "えお。"], marks, [2.1], [0.5])
+    assert durations == pytest.approx([1.0, 0.8])     # 1文目は 0 秒から
+    assert pauses == pytest.approx([0.2, 0.6])        # 最後は パック残り 0.1 + 外のポーズ 0.5
+
+
+def test_timings_without_marks_split_by_chars():
+    packs = pack_sentences(["ああ。", "い。"], [0.0, 0.0])
+    durations, pauses = sentence_timings(packs, ["ああ。", "い。"], [{}], [5.0], [0.0])
+    assert durations == pytest.approx([3.0, 2.0])
+    assert pauses == pytest.approx([0.0, 0.0])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from tts_client import AIMDLimiter, RetryingTTSClient
+
+
+class _Throttle(Exception):
+    code = 429
+
+
+class _Client:
+    def __init__(self, fail_first):
+        self.left = fail_first
+
+    def synthesize_speech(self, **kwargs):
+        if self.left:
+            self.left -= 1
+            raise _Throttle()
+        return "ok"
+
+
+def test_limiter_halves_on_throttle_and_recovers_to_ceiling():
+    lim = AIMDLimiter(4, 1.0, 4.0)
+    lim.acquire()
+    lim.release(throttled=True)
+    assert lim.limit == 2.0 and lim.lowest == 2.0
+    for _ in range(20):
+        lim.acquire()
+        lim.release()
+    assert lim.limit == 4.0
+
+
+def test_client_never_raises_limit_above_concurrency():
+    client = RetryingTTSClient(_Client(0), req_per_sec=0, chars_per_min=0, concurrency=3)
+    for _ in range(50):
+        assert client.synthesize_speech(input=None) == "ok"
+    assert client.limiter.limit == 3.0
+
+
+def test_client_retries_throttling():
+    client = RetryingTTSClient(_Client(2), req_per_sec=0, chars_per_min=0, base_delay=0.0, concurrency=4)
+    assert client.synthesize_speech(input=None) == "ok"
+    assert (client.retries, client.throttled) == (2, 2)
+    assert client.lowest_limit == 1.0
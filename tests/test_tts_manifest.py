@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from tts_manifest import Manifest, manifest_name
+
+
+def test_name_depends_on_full_path(tmp_path):
+    a = manifest_name(str(tmp_path / "a" / "ep1.txt"))
+    b = manifest_name(str(tmp_path / "b" / "ep1.txt"))
+    assert a != b and a.startswith("ep1_") and b.startswith("ep1_")
+    assert a == manifest_name(str(tmp_path / "a" / "." / "ep1.txt"))
+
+
+def test_record_lookup_prune(tmp_path):
+    m = Manifest(str(tmp_path), "ep1_x")
+    m.record("あ。", "cfg", "voice-A", b"abc", 1.5, {"marks": {"s0": 0.1}})
+    m.record("い。", "cfg", "voice-B", b"de", 0.5)
+    m.save()
+
+    again = Manifest(str(tmp_path), "ep1_x")
+    assert again.lookup_entry("あ。", "cfg") == ("voice-A", b"abc", 1.5, {"marks": {"s0": 0.1}})
+    assert again.lookup("あ。", "other-cfg") is None
+    assert again.prune(["い。"], "cfg") == 1
+    assert again.lookup("あ。", "cfg") is None
+    assert again.lookup("い。", "cfg") == ("voice-B", b"de", 0.5)
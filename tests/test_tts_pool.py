@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from tts_pool import iter_ordered, longest_first, run_ordered
+
+
+def test_longest_first_is_stable():
+    assert longest_first(["a", "ccc", "bb", "ddd"]) == [1, 3, 2, 0]
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_results_in_item_order_with_custom_submit_order(workers):
+    started = []
+    progress = []
+
+    def fn(i, s):
+        started.append(i)
+        return s.upper()
+
+    items = ["a", "bbb", "cc"]
+    out = run_ordered(items, fn, workers=workers, order=longest_first(items),
+                      on_done=lambda n, total: progress.append((n, total)))
+    assert out == ["A", "BBB", "CC"]
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    if workers == 1:
+        assert started == [1, 2, 0]
+
+
+def test_results_in_item_order_when_completing_in_reverse():
+    # 後ろの要素から終わるように、各ジョブは次の要素の完了を待つ
+    n = 4
+    done = [threading.Event() for _ in range(n)]
+
+    def fn(i, x):
+        if i + 1 < n:
+            assert done[i + 1].wait(5)
+        done[i].set()
+        return x * 10
+
+    assert run_ordered(list(range(n)), fn, workers=n) == [0, 10, 20, 30]
+
+
+def test_error_propagates():
+    def fn(i, x):
+        if i == 2:
+            raise ValueError("boom")
+        return x
+
+    with pytest.raises(ValueError):
+        run_ordered([1, 2, 3, 4], fn, workers=2)
+    assert run_ordered([], fn, workers=2) == []
+
+
+def test_iter_ordered_yields_in_order_and_stops_early():
+    calls = []
+
+    def fn(i, x):
+        calls.append(i)
+        return x + 1
+
+    assert list(iter_ordered([1, 2, 3], fn, workers=2)) == [(0, 2), (1, 3), (2, 4)]
+
+    calls.clear()
+    it = iter_ordered(list(range(100)), fn, workers=2, window=4)
+    assert next(it) == (0, 1)
+    it.close()
+    assert len(calls) <= 5    # 先読みは window 件まで
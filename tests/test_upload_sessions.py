@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import upload_sessions
+from upload_sessions import SessionStore, file_identity, query_offset
+
+
+class _Resp(dict):
+    def __init__(self, status, **headers):
+        super().__init__(headers)
+        self.status = status
+
+
+class _Http:
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def request(self, uri, method="GET", headers=None, **kwargs):
+        self.calls.append((uri, method, dict(headers or {})))
+        ans = self.answers.pop(0)
+        if isinstance(ans, Exception):
+            raise ans
+        return ans
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    monkeypatch.setattr(upload_sessions.time, "sleep", lambda s: None)
+
+
+def test_active_uses_range_end_plus_one():
+    http = _Http((_Resp(308, range="bytes=0-1048575"), b""))
+    assert query_offset(http, "u", 5000000) == ("active", 1048576, None)
+    assert http.calls[0][2]["Content-Range"] == "bytes */5000000"
+
+
+def test_active_without_range_starts_at_zero():
+    assert query_offset(_Http((_Resp(308), b"")), "u", 10) == ("active", 0, None)
+
+
+def test_done_returns_video_resource():
+    state, offset, body = query_offset(_Http((_Resp(200), b'{"id": "abc"}')), "u", 10)
+    assert (state, offset, body["id"]) == ("done", 10, "abc")
+
+
+@pytest.mark.parametrize("content", [b"<html>oops</html>", b"{}", b'["x"]', b"\xff\xfe"])
+def test_done_without_id_is_unknown(content):
+    assert query_offset(_Http((_Resp(201), content)), "u", 10) == ("unknown", 0, None)
+
+
+@pytest.mark.parametrize("status", [404, 410])
+def test_expired(status):
+    assert query_offset(_Http((_Resp(status), b"")), "u", 10) == ("expired", 0, None)
+
+
+def test_retries_server_errors_then_gives_up():
+    http = _Http((_Resp(503), b""), OSError("reset"), (_Resp(500), b""))
+    assert query_offset(http, "u", 10) == ("unknown", 0, None)
+    assert len(http.calls) == upload_sessions.QUERY_ATTEMPTS
+
+
+def test_retry_recovers():
+    http = _Http(OSError("reset"), (_Resp(308, range="bytes=0-9"), b""))
+    assert query_offset(http, "u", 100) == ("active", 10, None)
+
+
+def test_store_roundtrip_and_identity_mismatch(tmp_path):
+    mp4 = tmp_path / "a.mp4"
+    mp4.write_bytes(b"0" * 1000)
+    store = SessionStore(str(tmp_path / "sessions"))
+    ident = file_identity(str(mp4))
+    store.save(str(mp4), "https://x/u", 512, ident, 1e12)
+    saved = store.load(str(mp4), ident)
+    assert (saved.uri, saved.offset) == ("https://x/u", 512)
+
+    mp4.write_bytes(b"1" * 1000)
+    assert store.load(str(mp4), file_identity(str(mp4))) is None
+    assert store.load(str(mp4), ident) is None   # 食い違った時点で消えている
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from upload_tuning import CHUNK_ALIGN, ChunkTuner, format_progress
+
+MB = 1024 * 1024
+
+
+def _tuner(**kw):
+    args = dict(initial_bytes=8 * MB, min_bytes=1 * MB, max_bytes=128 * MB, target_sec=8.0, rtt_factor=20.0)
+    args.update(kw)
+    return ChunkTuner(**args)
+
+
+def test_sizes_are_aligned_and_clamped():
+    t = _tuner(initial_bytes=3 * MB + 1, max_bytes=5 * MB + 7)
+    assert t.size % CHUNK_ALIGN == 0 and t.size == 3 * MB
+    assert t.max_bytes == 5 * MB
+    assert _tuner(initial_bytes=500 * MB).size == 128 * MB
+
+
+def test_grows_at_most_double_per_chunk_towards_target():
+    t = _tuner()
+    t.observe_chunk(8 * MB, 1.0, 308)           # 8 MB/s → 8秒なら 64MB だが 1回で2倍まで
+    assert t.size == 16 * MB
+    t.observe_chunk(16 * MB, 2.0, 308)
+    assert t.size == 32 * MB
+    for _ in range(10):
+        t.observe_chunk(t.size, t.size / (8 * MB), 308)
+    assert t.size == 64 * MB                    # 8 MB/s × 8秒で落ち着く
+
+
+def test_shrinks_at_most_half_on_slow_link():
+    t = _tuner()
+    t.observe_chunk(8 * MB, 80.0, 308)          # 0.1 MB/s → 0.8MB が欲しいが半分まで
+    assert t.size == 4 * MB
+    t.observe_chunk(4 * MB, 40.0, 308)
+    assert t.size == 2 * MB
+
+
+def test_high_rtt_keeps_chunks_large():
+    t = _tuner(initial_bytes=4 * MB)
+    t.observe_small(1.0)                        # RTT 1秒 × 20 = 20秒ぶん
+    t.observe_chunk(4 * MB, 4.0, 308)           # 1 MB/s
+    assert t.size == 8 * MB
+    t.observe_chunk(8 * MB, 8.0, 308)
+    assert t.size == 16 * MB
+
+
+def test_error_halves_and_cools_down():
+    t = _tuner()
+    t.observe_chunk(8 * MB, 0.5, 503)
+    assert t.size == 4 * MB and t.errors == 1
+    t.observe_chunk(4 * MB, 0.1, 308)           # 速くても cooldown 中は大きくしない
+    assert t.size == 4 * MB
+
+
+def test_fixed_never_changes():
+    t = _tuner(fixed=True)
+    t.observe_chunk(8 * MB, 0.1, 308)
+    t.observe_chunk(8 * MB, 100.0, 0)
+    assert t.size == 8 * MB
+
+
+def test_summary_counts_retried_bytes_and_resume():
+    t = _tuner()
+    t.resumed_from = 10 * MB
+    t.observe_chunk(8 * MB, 1.0, 0)             # 通信エラーで送り直し
+    t.observe_chunk(4 * MB, 1.0, 308)
+    t.observe_chunk(6 * MB, 1.0, 200)
+    s = t.summary(20 * MB, 2.0)
+    assert s["sent_bytes"] == 18 * MB
+    assert s["retried_bytes"] == 8 * MB
+    assert s["errors"] == 1 and s["chunks"] == 3
+    assert s["avg_mb_s"] == 5.0
+    assert "再送 8.0 MB" in format_progress(t, 20 * MB, 20 * MB)
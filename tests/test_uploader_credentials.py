@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+credentials = pytest.importorskip("google.oauth2.credentials")
+
+import uploader11
+
+
+def _creds():
+    return credentials.Credentials(token="t0", refresh_token="r", token_uri="http://127.0.0.1:9/token",
+                                   client_id="c", client_secret="s", scopes=["a"])
+
+
+def test_refreshes_are_serialized_across_threads(monkeypatch, tmp_path):
+    active = []
+    overlap = []
+    count = [0]
+
+    def slow_refresh(self, request):
+        active.append(1)
+        if len(active) > 1:
+            overlap.append(True)
+        time.sleep(0.02)
+        count[0] += 1
+        self.token = f"t{count[0]}"
+        self.expiry = datetime.utcnow() - timedelta(seconds=1)   # 次の呼び出しでもまた更新させる
+        active.pop()
+
+    monkeypatch.setattr(credentials.Credentials, "refresh", slow_refresh)
+    src = _creds()
+    src.expiry = datetime.utcnow() - timedelta(seconds=1)
+    shared = uploader11.shared_credentials(src)
+    keeper = uploader11.TokenKeeper(shared, str(tmp_path / "token.json"), margin_sec=60, interval_sec=60)
+    assert keeper._lock is shared.lock
+
+    # 401 での更新 / 期限切れでの before_request / TokenKeeper の先回り更新 が同時に来る
+    targets = [lambda: shared.refresh(None)] * 3 + [lambda: shared.before_request(None, "PUT", "u", {})] * 3 \
+        + [keeper.refresh_if_needed] * 3
+    threads = [threading.Thread(target=t) for t in targets]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert count[0] == 9 and not overlap
+    assert (tmp_path / "token.json").exists()
+
+
+def test_shared_copy_keeps_identity_and_type():
+    src = _creds()
+    shared = uploader11.shared_credentials(src)
+    assert isinstance(shared, credentials.Credentials)
+    assert (shared.token, shared.refresh_token, shared.client_id, shared.scopes) == ("t0", "r", "c", ["a"])
+    assert shared.token_uri == src.token_uri
+    headers = {}
+    shared.apply(headers)
+    assert headers["authorization"] == "Bearer t0"
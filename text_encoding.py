@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+テキストファイルの文字コード判定（TTS スクリプトと uploader11 で共通）
+
+従来はファイル全体に chardet.detect をかけていた（数MBの台本だとこれが一番重い）。ここでは:
+
+1. BOM があればそれで確定（utf-8-sig / utf-16 / utf-32）
+2. 全体が厳密に UTF-8 として読めれば utf-8（C 実装のデコードなので chardet よりずっと速い）
+3. cp932 / shift_jis / euc_jp を順に厳密デコード。読めたのが1種類ならそれで確定
+4. 複数読めて決めきれない / どれも読めないときだけ、先頭 SAMPLE_BYTES だけ chardet にかける
+
+結果は (絶対パス, サイズ, mtime) をキーにプロセス内でキャッシュする（同じ txt を何度も開く場合用）。
+判定にかかった時間は Detected.seconds と summary() で確認できる。
+"""
+
+import os
+import time
+import codecs
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+SAMPLE_BYTES = 64 * 1024
+CASCADE = ("cp932", "shift_jis", "euc_jp")
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class Detected(NamedTuple):
+    encoding: str
+    method: str       # "bom" / "utf-8" / "cascade" / "chardet" / "fallback" / "cache"
+    seconds: float
+
+
+_cache: Dict[Tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+_stats = {"calls": 0, "cache_hits": 0, "chardet": 0, "seconds": 0.0}
+
+
+def _decodes(raw: bytes, enc: str) -> bool:
+    try:
+        raw.decode(enc, errors="strict")
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+
+def _normalize_name(enc: Optional[str]) -> Optional[str]:
+    if not enc:
+        return None
+    try:
+        return codecs.lookup(enc).name
+    except LookupError:
+        return None
+
+
+def _chardet_sample(raw: bytes, sample_bytes: int) -> Optional[str]:
+    try:
+        import chardet
+    except ImportError:
+        return None
+    with _lock:
+        _stats["chardet"] += 1
+    return _normalize_name(chardet.detect(raw[:sample_bytes]).get("encoding"))
+
+
+def _detect(raw: bytes, sample_bytes: int) -> Tuple[str, str]:
+    for bom, enc in _BOMS:
+        if raw.startswith(bom):
+            return enc, "bom"
+
+    if _decodes(raw, "utf-8"):
+        return "utf-8", "utf-8"
+
+    ok = [enc for enc in CASCADE if _decodes(raw, enc)]
+    # shift_jis は cp932 の部分集合なので、両方読めても cp932 1種類として扱う
+    distinct = {("cp932" if e == "shift_jis" else e) for e in ok}
+    if len(distinct) == 1:
+        return ok[0], "cascade"
+
+    guess = _chardet_sample(raw, sample_bytes)
+    if ok:
+        names = {_normalize_name(e): e for e in ok}
+        if guess in names:
+            return names[guess], "chardet"
+        return ok[0], "cascade"
+    if guess:
+        return guess, "chardet"
+    return "utf-8", "fallback"
+
+
+def detect_bytes(raw: bytes, sample_bytes: int = SAMPLE_BYTES) -> Detected:
+    t0 = time.perf_counter()
+    enc, method = _detect(raw, sample_bytes)
+    dt = time.perf_counter() - t0
+    with _lock:
+        _stats["calls"] += 1
+        _stats["seconds"] += dt
+    return Detected(enc, method, dt)
+
+
+def _file_key(path: str) -> Optional[Tuple[str, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+def detect_file(path: str, sample_bytes: int = SAMPLE_BYTES) -> Detected:
+    """
+    ファイルの文字コードを返す（キャッシュあり）
+    """
+    key = _file_key(path)
+    with _lock:
+        enc = _cache.get(key) if key else None
+        if enc:
+            _stats["calls"] += 1
+            _stats["cache_hits"] += 1
+            return Detected(enc, "cache", 0.0)
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    d = detect_bytes(raw, sample_bytes)
+    if key:
+        with _lock:
+            _cache[key] = d.encoding
+    return d
+
+
+def read_text(path: str, errors: str = "replace") -> Tuple[str, Detected]:
+    """
+    判定した文字コードで読んだ全文と判定結果を返す（ファイルは1回だけ読む）
+    """
+    key = _file_key(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    with _lock:
+        enc = _cache.get(key) if key else None
+        if enc:
+            _stats["calls"] += 1
+            _stats["cache_hits"] += 1
+    d = Detected(enc, "cache", 0.0) if enc else detect_bytes(raw)
+    if key and not enc:
+        with _lock:
+            _cache[key] = d.encoding
+    return raw.decode(d.encoding, errors=errors), d
+
+
+def read_lines_strict(path: str) -> Optional[List[str]]:
+    """
+    厳密にデコードできたときだけ行リスト（改行付き）を返す。読めなければ None
+    """
+    try:
+        text, _d = read_text(path, errors="strict")
+    except (OSError, UnicodeDecodeError, LookupError):
+        return None
+    return text.splitlines(True)
+
+
+def summary() -> str:
+    with _lock:
+        s = dict(_stats)
+    return (f"文字コード判定: {s['calls']}件（キャッシュ {s['cache_hits']} / chardet {s['chardet']}）"
+            f" 計 {s['seconds'] * 1000:.1f} ms")
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+工程ごとの計測（入れ子のスパン）を Chrome trace / JSONL で書き出す（opt-in）
+
+    tracing.start(run_id="input_20250101_120000", input="input.txt")
+    with tracing.span("tts", sentences=120) as sp:
+        with tracing.span("tts.request", parent=sp, chars=42, voice="ja-JP-Wavenet-A"):
+            ...
+            tracing.annotate(retries=2)          # いま開いている一番内側のスパンに属性を足す
+    tracing.finish("trace_dir")                  # <run_id>.trace.json と trace.jsonl(追記)
+
+- 無効時（start していない）は span() が何もしない（オーバーヘッドはほぼゼロ）
+- 入れ子はスレッドごと。スレッドプールの中で作るスパンは parent= で親を明示する
+- *.trace.json は chrome://tracing / https://ui.perfetto.dev でそのまま開ける
+- trace.jsonl は実行をまたいで1行1スパンで追記していく（run_id で実行を区別。比較用）
+"""
+
+import os
+import json
+import time
+import threading
+import itertools
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class Span:
+    __slots__ = ("id", "parent", "name", "attrs", "start", "end", "tid")
+
+    def __init__(self, id: int, parent: int, name: str, attrs: dict, tid: int):
+        self.id = id
+        self.parent = parent
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end = 0.0
+        self.tid = tid
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+
+class _NullSpan:
+    id = 0
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.run_id = ""
+        self.run_attrs: Dict[str, object] = {}
+        self.spans: List[Span] = []
+        self.t0 = 0.0
+        self.wall0 = 0.0
+        self._ids = itertools.count(1)
+        self._tids: Dict[int, int] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    # ---------- 開始/終了 ----------
+    def start(self, run_id: str, **attrs) -> None:
+        with self._lock:
+            self.enabled = True
+            self.run_id = run_id
+            self.run_attrs = dict(attrs)
+            self.spans = []
+            self.t0 = time.perf_counter()
+            self.wall0 = time.time()
+            self._ids = itertools.count(1)
+            self._tids = {}
+            self._thread_names = {}
+
+    def stop(self) -> None:
+        self.enabled = False
+
+    # ---------- スパン ----------
+    def _stack(self) -> List[Span]:
+        st = getattr(self._local, "stack", None)
+        if st is None:
+            st = self._local.stack = []
+        return st
+
+    def _tid(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            if ident not in self._tids:
+                self._tids[ident] = len(self._tids) + 1
+                self._thread_names[self._tids[ident]] = threading.current_thread().name
+            return self._tids[ident]
+
+    @contextmanager
+    def span(self, name: str, parent=None, **attrs) -> Iterator[Span]:
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        stack = self._stack()
+        pid = parent.id if parent is not None else (stack[-1].id if stack else 0)
+        sp = Span(next(self._ids), pid, name, attrs, self._tid())
+        stack.append(sp)
+        try:
+            yield sp
+        except BaseException as e:
+            sp.attrs["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            sp.end = time.perf_counter()
+            stack.pop()
+            with self._lock:
+                self.spans.append(sp)
+
+    def annotate(self, **attrs) -> None:
+        if not self.enabled:
+            return
+        stack = self._stack()
+        if stack:
+            stack[-1].set(**attrs)
+
+    # ---------- 書き出し ----------
+    def _us(self, t: float) -> int:
+        return int(round((t - self.t0) * 1e6))
+
+    def chrome_events(self) -> List[dict]:
+        pid = os.getpid()
+        events: List[dict] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.run_id}},
+        ]
+        for tid, tname in sorted(self._thread_names.items()):
+            events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+        for sp in sorted(self.spans, key=lambda s: s.start):
+            events.append({
+                "name": sp.name,
+                "cat": sp.name.split(".")[0],
+                "ph": "X",
+                "ts": self._us(sp.start),
+                "dur": max(0, self._us(sp.end) - self._us(sp.start)),
+                "pid": pid,
+                "tid": sp.tid,
+                "args": dict(sp.attrs, span_id=sp.id, parent_id=sp.parent),
+            })
+        return events
+
+    def write_chrome(self, path: str) -> None:
+        data = {
+            "traceEvents": self.chrome_events(),
+            "displayTimeUnit": "ms",
+            "otherData": dict(self.run_attrs, run_id=self.run_id, started_at=self.wall0),
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def append_jsonl(self, path: str) -> None:
+        with open(path, "a", encoding="utf-8") as f:
+            for sp in sorted(self.spans, key=lambda s: s.start):
+                f.write(json.dumps({
+                    "run_id": self.run_id,
+                    "started_at": self.wall0,
+                    "span_id": sp.id,
+                    "parent_id": sp.parent,
+                    "name": sp.name,
+                    "start": round(sp.start - self.t0, 6),
+                    "duration": round(sp.end - sp.start, 6),
+                    "thread": sp.tid,
+                    "attrs": sp.attrs,
+                }, ensure_ascii=False) + "\n")
+
+    def finish(self, out_dir: str, formats=("chrome", "jsonl")) -> List[str]:
+        """
+        書き出して無効に戻す。書いたファイルのパスを返す
+        """
+        if not self.enabled:
+            return []
+        self.stop()
+        os.makedirs(out_dir, exist_ok=True)
+        written: List[str] = []
+        if "chrome" in formats:
+            p = os.path.join(out_dir, f"{self.run_id}.trace.json")
+            self.write_chrome(p)
+            written.append(p)
+        if "jsonl" in formats:
+            p = os.path.join(out_dir, "trace.jsonl")
+            self.append_jsonl(p)
+            written.append(p)
+        return written
+
+
+# プロセスに1つ（バッチ実行でもワーカープロセスごとに1ジョブずつなので共有で足りる）
+tracer = Tracer()
+
+
+def start(run_id: str, **attrs) -> None:
+    tracer.start(run_id, **attrs)
+
+
+def span(name: str, parent=None, **attrs):
+    return tracer.span(name, parent=parent, **attrs)
+
+
+def annotate(**attrs) -> None:
+    tracer.annotate(**attrs)
+
+
+def finish(out_dir: str, formats=("chrome", "jsonl")) -> List[str]:
+    return tracer.finish(out_dir, formats)
+
+
+def enabled() -> bool:
+    return tracer.enabled
+
+
+def current() -> Optional[Span]:
+    if not tracer.enabled:
+        return None
+    st = tracer._stack()
+    return st[-1] if st else None
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+TTS音声のディスクキャッシュ（内容アドレス方式）
+
+- キー: sha256(文テキスト / 声 / 言語コード / AudioConfig)
+- 値  : 音声バイト列 + 計測済みの長さ(秒)
+- 容量上限(バイト)を超えたら「最後に使った時刻」が古い順に削除（LRU）
+- 複数プロセス同時利用OK：書き込みは一時ファイル→os.replace、掃除はロックファイルで排他
+- 声がランダムだとヒットしないので、文ごとに決定的に声を選ぶ pick_voice(mode="hash") も用意（VOICE_MODE="hash" で選ぶ。既定は従来どおり "random"）
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from typing import List, Optional, Tuple
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2GB
+LOCK_STALE_SEC = 60.0
+
+
+def cache_key(text: str, voice_name: str, language_code: str, audio_config: str) -> str:
+    h = hashlib.sha256()
+    for part in (text, voice_name, language_code, audio_config):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def pick_voice(text: str, voices: List[str], mode: str = "random") -> str:
+    """
+    mode="random": 従来どおり毎回ランダム
+    mode="hash"  : 文テキストのハッシュで決める（同じ文は毎回同じ声 → キャッシュが効く）
+    """
+    if mode == "hash":
+        n = int(hashlib.sha1(text.encode("utf-8")).hexdigest(), 16)
+        return voices[n % len(voices)]
+    return random.choice(voices)
+
+
+class TTSCache:
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._stat_lock = threading.Lock()  # 並列TTSから呼ばれるため
+        os.makedirs(root, exist_ok=True)
+
+    # ---------- パス ----------
+    def _paths(self, key: str) -> Tuple[str, str]:
+        d = os.path.join(self.root, key[:2])
+        return os.path.join(d, key + ".audio"), os.path.join(d, key + ".json")
+
+    # ---------- 取得 ----------
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        e = self.get_entry(key)
+        return (e[0], e[1]) if e else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, float, dict]]:
+        """
+        get() と同じだが、put() で渡した extra（SSMLのタイムポイント等）も返す
+        """
+        audio_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(audio_path, "rb") as f:
+                data = f.read()
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return None
+
+        # 別プロセスの書き込み途中/掃除途中で食い違ったら miss 扱い
+        if len(data) != meta.get("size"):
+            self._count(hit=False)
+            return None
+
+        # LRU 用に「最後に使った時刻」を更新
+        try:
+            os.utime(meta_path, None)
+        except OSError:
+            pass
+
+        self._count(hit=True)
+        return data, float(meta["duration"]), meta.get("extra") or {}
+
+    def _count(self, hit: bool) -> None:
+        with self._stat_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    # ---------- 保存 ----------
+    def put(self, key: str, data: bytes, duration: float, extra: Optional[dict] = None) -> None:
+        audio_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+
+        # 音声 → メタの順で原子的に置き換え（メタがあれば音声は必ず揃っている）
+        _atomic_write(audio_path, data)
+        meta = {"size": len(data), "duration": float(duration), "created": time.time()}
+        if extra:
+            meta["extra"] = extra
+        _atomic_write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    # ---------- 容量管理 ----------
+    def _entries(self) -> List[Tuple[float, int, str, str]]:
+        out = []
+        for cur, _dirs, files in os.walk(self.root):
+            for fn in files:
+                if not fn.endswith(".json"):
+                    continue
+                meta_path = os.path.join(cur, fn)
+                audio_path = meta_path[:-5] + ".audio"
+                try:
+                    used = os.path.getmtime(meta_path)
+                    size = os.path.getsize(audio_path) + os.path.getsize(meta_path)
+                except OSError:
+                    continue
+                out.append((used, size, audio_path, meta_path))
+        return out
+
+    def evict(self) -> int:
+        """
+        容量上限を超えていれば古い順に削除。削除したバイト数を返す。
+        他プロセスが掃除中ならスキップ（次回に任せる）。
+        """
+        lock = os.path.join(self.root, ".evict.lock")
+        if not _try_lock(lock):
+            return 0
+        try:
+            entries = self._entries()
+            total = sum(e[1] for e in entries)
+            if total <= self.max_bytes:
+                return 0
+
+            freed = 0
+            entries.sort()
+            for _used, size, audio_path, meta_path in entries:
+                if total - freed <= self.max_bytes:
+                    break
+                # メタを先に消す（読み手は「メタ無し = miss」と判断する）
+                for p in (meta_path, audio_path):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+                freed += size
+            return freed
+        finally:
+            try:
+                os.remove(lock)
+            except OSError:
+                pass
+
+
+# ================== 内部ヘルパ ==================
+def _atomic_write(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{random.getrandbits(32):08x}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _try_lock(lock_path: str) -> bool:
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # 落ちたプロセスのロックが残っていたら奪う
+        try:
+            if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SEC:
+                os.remove(lock_path)
+                return _try_lock(lock_path)
+        except OSError:
+            pass
+        return False
+    os.write(fd, str(os.getpid()).encode("ascii"))
+    os.close(fd)
+    return True
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+TTS クライアントのラッパ（レート制限 / リトライ / 同時実行数の自動調整）
+
+    client = RetryingTTSClient(texttospeech.TextToSpeechClient(), req_per_sec=10, chars_per_min=150000)
+    resp = client.synthesize_speech(input=..., voice=..., audio_config=...)   # 呼び方は元のクライアントと同じ
+
+- トークンバケット: 1秒あたりのリクエスト数と、1分あたりの文字数の2つで送信を待たせる
+- リトライ: 一時的なエラー（429/RESOURCE_EXHAUSTED, 503/UNAVAILABLE, DEADLINE_EXCEEDED 等）は
+  指数バックオフ＋ジッタ（0〜上限の一様乱数）で再送。それ以外のエラーはそのまま上げる
+- AIMD（下げる専用）: スロットリングで同時に投げてよい本数を半分にし、成功が続けば少しずつ戻す（+1/本数）
+  上限は concurrency（呼び出し側のスレッド数と同じにする）。それより増やすことはしない
+  （スレッド数を超えても実際の同時数は増えず、送信の速さはトークンバケットで決まるため）
+- 逐次（workers=1）でも並列（ThreadPool から同時に呼ぶ）でも使える。カウンタは summary() で表示
+
+TTS_BACKEND=fake の FakeTextToSpeechClient(error_rate=...) と組み合わせると、エラー注入で動作確認できる
+tracing が有効なら、呼び出し元で開いているスパンに retries / wait / backoff を書き込む
+"""
+
+import time
+import random
+import threading
+from typing import Dict, Optional
+
+import tracing
+
+# リトライしてよい gRPC ステータス（HTTP コードしか無い例外は下の対応表で読み替える）
+RETRYABLE = {"RESOURCE_EXHAUSTED", "UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL", "ABORTED"}
+THROTTLE = {"RESOURCE_EXHAUSTED"}
+_HTTP_TO_STATUS = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE", 504: "DEADLINE_EXCEEDED"}
+
+
+def status_name(e: BaseException) -> Optional[str]:
+    """
+    google.api_core の例外（や fake の例外）から gRPC ステータス名を取り出す
+    """
+    gc = getattr(e, "grpc_status_code", None)
+    if gc is not None:
+        return getattr(gc, "name", str(gc))
+    code = getattr(e, "code", None)
+    if isinstance(code, int):
+        return _HTTP_TO_STATUS.get(code)
+    return None
+
+
+class TokenBucket:
+    """
+    rate 個/秒で溜まり、最大 capacity 個まで溜められるバケツ。acquire(n) は n 個取れるまで待つ
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: float = 1.0) -> float:
+        """
+        待った秒数を返す（rate <= 0 なら無制限）
+        """
+        if self.rate <= 0:
+            return 0.0
+        n = min(n, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.t) * self.rate)
+                self.t = now
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return waited
+                wait = (n - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class AIMDLimiter:
+    """
+    同時実行数の上限 limit を AIMD で動かすセマフォ
+      成功: limit += increase / limit（limit 本ぶん成功すると +increase）
+      スロットリング: limit *= decrease
+    """
+
+    def __init__(self, initial: float, minimum: float = 1.0, maximum: float = 16.0,
+                 increase: float = 1.0, decrease: float = 0.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = min(maximum, max(minimum, initial))
+        self.in_flight = 0
+        self.lowest = self.limit
+        self._cond = threading.Condition()
+
+    def acquire(self) -> float:
+        t0 = time.monotonic()
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        return time.monotonic() - t0
+
+    def release(self, throttled: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self.lowest = min(self.lowest, self.limit)
+            else:
+                self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self._cond.notify_all()
+
+
+class RetryingTTSClient:
+    def __init__(
+        self,
+        client,
+        req_per_sec: float = 10.0,
+        chars_per_min: float = 150_000,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        concurrency: int = 4,
+    ):
+        self.client = client
+        self.req_bucket = TokenBucket(req_per_sec, max(1.0, req_per_sec))
+        self.char_bucket = TokenBucket(chars_per_min / 60.0, chars_per_min)
+        # concurrency から始めて、スロットリングされたら下げ、成功が続けば concurrency まで戻す
+        self.limiter = AIMDLimiter(concurrency, 1.0, float(concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.wait_seconds = 0.0      # レート制限・同時数制限で待った時間
+        self.backoff_seconds = 0.0   # リトライ前に待った時間
+        self.errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, **kw) -> None:
+        with self._lock:
+            for k, v in kw.items():
+                setattr(self, k, getattr(self, k) + v)
+
+    @staticmethod
+    def _chars(request, kwargs) -> int:
+        inp = getattr(request, "input", None) if request is not None else kwargs.get("input")
+        return len(getattr(inp, "text", "") or getattr(inp, "ssml", "") or "")
+
+    def synthesize_speech(self, request=None, **kwargs):
+        chars = self._chars(request, kwargs)
+        attempt = 0
+        total_wait = total_backoff = 0.0
+        while True:
+            waited = self.limiter.acquire()
+            waited += self.req_bucket.acquire(1)
+            waited += self.char_bucket.acquire(chars)
+            self._count(calls=1, wait_seconds=waited)
+            total_wait += waited
+
+            throttled = False
+            try:
+                if request is not None:
+                    resp = self.client.synthesize_speech(request=request, **kwargs)
+                else:
+                    resp = self.client.synthesize_speech(**kwargs)
+                tracing.annotate(retries=attempt, wait=round(total_wait, 3), backoff=round(total_backoff, 3))
+                return resp
+            except Exception as e:
+                name = status_name(e)
+                throttled = name in THROTTLE
+                with self._lock:
+                    self.errors[name or type(e).__name__] = self.errors.get(name or type(e).__name__, 0) + 1
+                if name not in RETRYABLE or attempt >= self.max_retries:
+                    self._count(failures=1)
+                    tracing.annotate(retries=attempt, wait=round(total_wait, 3), backoff=round(total_backoff, 3))
+                    raise
+            finally:
+                self.limiter.release(throttled)
+
+            # フルジッタ: 0〜min(上限, base*2^attempt) の一様乱数
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+            attempt += 1
+            total_backoff += delay
+            self._count(retries=1, throttled=1 if throttled else 0, backoff_seconds=delay)
+            time.sleep(delay)
+
+    def summary(self) -> str:
+        with self._lock:
+            errs = ", ".join(f"{k}={v}" for k, v in sorted(self.errors.items())) or "なし"
+            return (f"TTS呼び出し {self.calls}回 / リトライ {self.retries} / スロットリング {self.throttled} / "
+                    f"失敗 {self.failures} / 待ち {self.wait_seconds:.1f}秒 + バックオフ {self.backoff_seconds:.1f}秒 / "
+                    f"同時数 {self.limiter.limit:.1f}（最小 {self.lowest_limit:.1f}） / エラー: {errs}")
+
+    @property
+    def lowest_limit(self) -> float:
+        return self.limiter.lowest
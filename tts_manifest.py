@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+文単位のマニフェスト（途中失敗からの再開・部分修正の差分合成用）
+
+<root>/<base>_<入力の絶対パスのハッシュ>/manifest.json に文ごとの
+    テキストのハッシュ / 声 / 音声ファイル / 長さ
+を記録し、音声は同じフォルダの parts/ に置く。_tts_tmp と違い失敗しても消さない。
+（別フォルダの同じ名前の txt は別のマニフェストになる。フォルダ名は manifest_name()）
+
+音声は TTS キャッシュとは別に持つ（両方有効なら同じ音声が2か所に残る）。容量の上限は無く、
+prune() で今回の台本に無い文を消すだけなので、使い終わった台本のフォルダは手で消す。
+
+再実行時は「同じテキスト × 同じ AudioConfig」の記録があれば、その声と音声をそのまま使う
+（VOICE_MODE="random" でも前回と同じ声になる）。
+台本を数行直しただけなら、変わった文と足りない文だけが合成される。
+"""
+
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+MANIFEST_VERSION = 1
+SAVE_EVERY = 20  # 何件記録するごとに manifest.json を書き出すか
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def manifest_name(input_file: str) -> str:
+    """
+    入力ファイルごとのフォルダ名（ファイル名 + 絶対パスのハッシュ）
+    """
+    base = os.path.splitext(os.path.basename(input_file))[0]
+    h = hashlib.sha1(os.path.abspath(input_file).encode("utf-8")).hexdigest()[:10]
+    return f"{base}_{h}"
+
+
+def _entry_key(text: str, config_key: str) -> str:
+    h = hashlib.sha256()
+    h.update(text.encode("utf-8"))
+    h.update(b"\x00")
+    h.update(config_key.encode("utf-8"))
+    return h.hexdigest()
+
+
+class Manifest:
+    def __init__(self, root: str, base: str):
+        self.dir = os.path.join(root, base)
+        self.parts_dir = os.path.join(self.dir, "parts")
+        self.path = os.path.join(self.dir, "manifest.json")
+        self.entries: Dict[str, dict] = {}
+        self.reused = 0
+        self.recorded = 0
+        self._dirty = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.parts_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != MANIFEST_VERSION:
+            return
+        self.entries = data.get("entries", {})
+
+    # ---------- 参照 ----------
+    def lookup(self, text: str, config_key: str) -> Optional[Tuple[str, bytes, float]]:
+        """
+        記録があれば (声, 音声バイト列, 長さ) を返す
+        """
+        e = self.lookup_entry(text, config_key)
+        return e[:3] if e else None
+
+    def lookup_entry(self, text: str, config_key: str) -> Optional[Tuple[str, bytes, float, dict]]:
+        """
+        lookup() と同じだが、record() で渡した extra も返す
+        """
+        key = _entry_key(text, config_key)
+        with self._lock:
+            e = self.entries.get(key)
+        if not e:
+            return None
+        try:
+            with open(os.path.join(self.dir, e["audio"]), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != e.get("size"):
+            return None
+        with self._lock:
+            self.reused += 1
+        return e["voice"], data, float(e["duration"]), e.get("extra") or {}
+
+    # ---------- 記録 ----------
+    def record(self, text: str, config_key: str, voice: str, data: bytes, duration: float,
+               extra: Optional[dict] = None) -> None:
+        key = _entry_key(text, config_key)
+        rel = os.path.join("parts", key + ".audio")
+        tmp = os.path.join(self.dir, rel + f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, os.path.join(self.dir, rel))
+
+        with self._lock:
+            self.entries[key] = {
+                "text_sha256": text_hash(text),
+                "voice": voice,
+                "audio": rel.replace("\\", "/"),
+                "size": len(data),
+                "duration": float(duration),
+            }
+            if extra:
+                self.entries[key]["extra"] = extra
+            self.recorded += 1
+            self._dirty += 1
+            flush = self._dirty >= SAVE_EVERY
+        if flush:
+            self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "entries": dict(self.entries)}
+            self._dirty = 0
+            tmp = self.path + f".{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+
+    # ---------- 掃除 ----------
+    def prune(self, texts: Iterable[str], config_key: str) -> int:
+        """
+        今回の台本に無い文の記録と音声を消す。消した件数を返す
+        """
+        keep = {_entry_key(t, config_key) for t in texts}
+        with self._lock:
+            drop = [k for k in self.entries if k not in keep]
+            for k in drop:
+                e = self.entries.pop(k)
+                try:
+                    os.remove(os.path.join(self.dir, e["audio"]))
+                except OSError:
+                    pass
+        self.save()
+        return len(drop)
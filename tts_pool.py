@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+TTS並列実行ヘルパ（文ごとのリクエストを同時に飛ばす）
+
+- 同時実行数は workers で上限指定（1 なら従来どおり逐次）
+- 長い文から先に投入して、最後に長文が1本だけ残る「しっぽ待ち」を減らす
+- 結果は必ず元の文順で返す（durations / partファイル / SRT の順序を崩さない）
+- 1件でも失敗したら残りをキャンセルして例外を上げる
+- iter_ordered は先頭から順に結果を流す版（先読みは window 件まで＝メモリ上限つき）
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Deque, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def longest_first(items: Sequence[str]) -> List[int]:
+    # 文字数の多い順（同じ長さなら元の順）
+    return sorted(range(len(items)), key=lambda i: (-len(items[i]), i))
+
+
+def run_ordered(
+    items: Sequence[T],
+    fn: Callable[[int, T], R],
+    workers: int = 4,
+    order: Optional[List[int]] = None,
+    on_done: Optional[Callable[[int, int], None]] = None,
+) -> List[R]:
+    """
+    fn(index, item) を最大 workers 本同時に実行し、結果を items と同じ順で返す。
+    index は 0 始まり。order で投入順を指定できる（省略時は先頭から）。
+    on_done(完了数, 総数) は完了のたびに呼ばれる（進捗表示用）。
+    """
+    total = len(items)
+    results: List[Optional[R]] = [None] * total
+    if total == 0:
+        return []
+
+    if order is None:
+        order = list(range(total))
+
+    if workers <= 1:
+        for n, i in enumerate(order, 1):
+            results[i] = fn(i, items[i])
+            if on_done:
+                on_done(n, total)
+        return results  # type: ignore[return-value]
+
+    with ThreadPoolExecutor(max_workers=min(workers, total)) as ex:
+        futs = {ex.submit(fn, i, items[i]): i for i in order}
+        done = 0
+        try:
+            for fut in as_completed(futs):
+                results[futs[fut]] = fut.result()
+                done += 1
+                if on_done:
+                    on_done(done, total)
+        except BaseException:
+            for f in futs:
+                f.cancel()
+            raise
+
+    return results  # type: ignore[return-value]
+
+
+def iter_ordered(
+    items: Sequence[T],
+    fn: Callable[[int, T], R],
+    workers: int = 4,
+    window: Optional[int] = None,
+) -> Iterator[Tuple[int, R]]:
+    """
+    fn(index, item) を並列に実行し、(index, 結果) を index 順に1件ずつ返す。
+    未消費の結果と実行中のジョブは合わせて window 件まで（既定 workers*2）。
+    途中で例外が出た／呼び出し側がやめた場合は、未着手のジョブをキャンセルする。
+    """
+    total = len(items)
+    if workers <= 1:
+        for i in range(total):
+            yield i, fn(i, items[i])
+        return
+
+    window = max(workers, window or workers * 2)
+    with ThreadPoolExecutor(max_workers=min(workers, max(1, total))) as ex:
+        pending: Deque = deque()
+        nxt = 0
+        try:
+            while nxt < total or pending:
+                while nxt < total and len(pending) < window:
+                    pending.append(ex.submit(fn, nxt, items[nxt]))
+                    nxt += 1
+                i = nxt - len(pending)
+                yield i, pending.popleft().result()
+        finally:
+            for f in pending:
+                f.cancel()
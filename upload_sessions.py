@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+resumable アップロードのセッションをディスクに残し、プロセスが落ちても続きから上げる（uploader11.py 用）
+
+セッション URI はメモリにしか無いので、再起動・コンソールを閉じる・run10.ps1 の中断で 2GB の動画が最初からになる。
+そこで mp4 ごとに小さな JSON（state_dir/<sha1(絶対パス)>.json）を置く:
+- セッション URI / 開始時刻 / サーバーが確定した位置（308 の Range。チャンクごとに更新）
+- ファイルの同一性（サイズ / mtime / 先頭 1MiB の sha1）。作り直した mp4 に古いセッションを使わない
+
+次の実行では:
+  1. 同じファイルの JSON があれば、サーバーに確定済みの範囲を問い合わせる（空の PUT + Content-Range: bytes */size）
+  2. 308 → その位置から続きを送る / 200・201 → 前回で完了していた（動画 ID を使う）
+  3. 404・410（セッション切れ。YouTube は約1週間）のときだけ新しいセッションで最初から
+  4. それ以外（完了したのに動画 ID が読めない・問い合わせ自体が失敗）はそのファイルを今回は上げず、JSON も残す
+     （サーバー側で完了しているかもしれないので、新しいセッションで上げ直すと同じ動画が2本になる）
+- 動画 ID を受け取れたら JSON を消す。ファイル1つに JSON 1つなので、並列/別プロセスのアップロードでもぶつからない
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import NamedTuple, Optional, Tuple
+
+HEAD_HASH_BYTES = 1024 * 1024
+SESSION_MAX_AGE_SEC = 6 * 24 * 3600   # これより古いセッションは問い合わせずに捨てる（YouTube 側は約1週間で切れる）
+QUERY_ATTEMPTS = 3                    # 問い合わせが 5xx/通信エラーのときの試行回数
+
+
+class FileIdentity(NamedTuple):
+    size: int
+    mtime_ns: int
+    head_sha1: str
+
+
+class SavedSession(NamedTuple):
+    uri: str
+    offset: int          # サーバーが確定した位置（次に送る最初のバイト）
+    created: float
+    identity: FileIdentity
+
+
+def file_identity(path: str) -> FileIdentity:
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        h.update(f.read(HEAD_HASH_BYTES))
+    return FileIdentity(st.st_size, st.st_mtime_ns, h.hexdigest())
+
+
+class SessionStore:
+    def __init__(self, state_dir: str):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+        self.prune()
+
+    def _path(self, file_path: str) -> str:
+        key = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.state_dir, key + ".json")
+
+    def load(self, file_path: str, identity: FileIdentity) -> Optional[SavedSession]:
+        """
+        使えるセッションを返す。ファイルが変わっていた / 古すぎるものは消して None
+        """
+        p = self._path(file_path)
+        try:
+            with open(p, encoding="utf-8") as f:
+                d = json.load(f)
+            saved = SavedSession(d["uri"], int(d["offset"]), float(d["created"]), FileIdentity(*d["identity"]))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if saved.identity != identity:
+            print("注意: mp4 が前回のアップロード時から変わっているため、保存したセッションは使いません")
+            self.remove(file_path)
+            return None
+        if time.time() - saved.created > SESSION_MAX_AGE_SEC:
+            self.remove(file_path)
+            return None
+        return saved
+
+    def save(self, file_path: str, uri: str, offset: int, identity: FileIdentity, created: float):
+        """
+        一時ファイルに書いてから置き換える（書いている途中で落ちても前の状態が残る）
+        """
+        d = {
+            "file": os.path.abspath(file_path),
+            "uri": uri,
+            "offset": offset,
+            "created": created,
+            "updated": time.time(),
+            "identity": list(identity),
+        }
+        fd, tmp = tempfile.mkstemp(prefix="session_", suffix=".tmp", dir=self.state_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(d, f, ensure_ascii=False)
+            os.replace(tmp, self._path(file_path))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+    def remove(self, file_path: str):
+        try:
+            os.remove(self._path(file_path))
+        except OSError:
+            pass
+
+    def prune(self) -> int:
+        """
+        期限切れのセッション（と書きかけの一時ファイル）を消す。消した数を返す
+        """
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.state_dir):
+            p = os.path.join(self.state_dir, name)
+            try:
+                if now - os.path.getmtime(p) > SESSION_MAX_AGE_SEC:
+                    os.remove(p)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+def query_offset(http, uri: str, size: int) -> Tuple[str, int, Optional[dict]]:
+    """
+    サーバーに確定済みの範囲を問い合わせる
+    返り値: ("active", 次に送る位置, None) / ("done", size, 動画リソース) / ("expired", 0, None) / ("unknown", 0, None)
+    "done" の動画リソースには必ず "id" がある
+    """
+    headers = {"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+    for attempt in range(QUERY_ATTEMPTS):
+        try:
+            resp, content = http.request(uri, method="PUT", headers=headers)
+        except Exception as e:
+            print(f"  セッションの問い合わせに失敗（{e}）")
+            time.sleep(2 ** attempt)
+            continue
+        if resp.status == 308:
+            rng = resp.get("range", "")
+            return "active", int(rng.split("-")[1]) + 1 if "-" in rng else 0, None
+        if resp.status in (200, 201):
+            # 完了済み。動画 ID が読めないときは "unknown"（セッションを捨てて上げ直すと同じ動画が2本になる）
+            try:
+                body = json.loads(content.decode("utf-8") if isinstance(content, bytes) else content)
+            except (ValueError, UnicodeDecodeError):
+                body = None
+            if isinstance(body, dict) and body.get("id"):
+                return "done", size, body
+            print("  セッションは完了済みですが、動画 ID を読み取れませんでした")
+            return "unknown", 0, None
+        if resp.status in (404, 410):
+            return "expired", 0, None
+        if resp.status < 500:
+            break
+        time.sleep(2 ** attempt)
+    return "unknown", 0, None
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+resumable アップロードのチャンクサイズを回線に合わせて自動調整し、速度などを記録する（uploader11.py 用）
+
+googleapiclient の既定チャンクは 100MB 固定:
+- 遅い回線では1チャンクに何分もかかり、途中で切れると最大 100MB を送り直す
+- チャンクを小さく固定すると、チャンクごとの往復（RTT）の待ちが積み重なる
+
+そこで:
+  1. アップロードに使う http を TimedHttp で包み、リクエストごとの時間を測る
+     （チャンクの PUT → 速度。本文の無い/小さいリクエスト（セッション開始・状態確認）→ RTT）
+  2. ChunkTuner が「1チャンクが target_sec 秒くらい、かつ RTT の rtt_factor 倍以上」になるサイズを決める
+     - 1回に変えるのは 1/2〜2倍まで。256KiB の倍数（resumable の決まり）で min_bytes〜max_bytes に収める
+     - エラー（5xx・通信エラー）のたびに半分にして、しばらく大きくしない（再送を安くする）
+  3. 送った量と確定した量の差を「再送バイト」として数える
+  4. 終わったら1アップロード1行の JSON（JSONL）に統計を追記する
+"""
+
+import json
+import time
+import threading
+from typing import List, Optional
+
+CHUNK_ALIGN = 256 * 1024        # resumable アップロードのチャンクはこの倍数（最後のチャンク以外）
+SMALL_REQUEST_BYTES = 64 * 1024  # これ以下の本文のリクエストは RTT の計測に使う
+BW_EWMA_ALPHA = 0.3              # 速度の移動平均の重み（新しいチャンク）
+ERROR_COOLDOWN_CHUNKS = 3        # エラーの後、この回数のチャンクはサイズを大きくしない
+
+_stats_lock = threading.Lock()
+
+
+def _align(n: float) -> int:
+    return max(CHUNK_ALIGN, int(n) // CHUNK_ALIGN * CHUNK_ALIGN)
+
+
+def _mb(n: float) -> float:
+    return n / (1024 * 1024)
+
+
+class ChunkTuner:
+    """
+    1本のアップロードのチャンクサイズを決める + 計測値を持つ（size は next_chunk の呼び出しの間だけ変わる）
+    """
+
+    def __init__(self, initial_bytes: int, min_bytes: int, max_bytes: int,
+                 target_sec: float = 8.0, rtt_factor: float = 20.0, fixed: bool = False):
+        self.min_bytes = _align(min_bytes)
+        self.max_bytes = max(self.min_bytes, _align(max_bytes))
+        self.size = min(self.max_bytes, max(self.min_bytes, _align(initial_bytes)))
+        self.target_sec = target_sec
+        self.rtt_factor = rtt_factor
+        self.fixed = fixed
+        self.bw: Optional[float] = None     # bytes/s（移動平均）
+        self.rtt: Optional[float] = None    # 秒（小さいリクエストの最小値）
+        self.sent_bytes = 0                 # PUT で送った本文の合計（失敗したチャンクも含む）
+        self.resumed_from = 0               # 前回のセッションの続きから始めたときの開始位置（この分は今回送らない）
+        self.errors = 0
+        self.cooldown = 0
+        self.chunks: List[List] = []        # [送った bytes, ミリ秒, HTTP ステータス（通信エラーは 0）]
+
+    def observe_small(self, seconds: float):
+        self.rtt = seconds if self.rtt is None else min(self.rtt, seconds)
+
+    def observe_chunk(self, sent: int, seconds: float, status: int):
+        self.sent_bytes += sent
+        self.chunks.append([sent, int(seconds * 1000), status])
+        if status not in (200, 201, 308):
+            self.errors += 1
+            self.cooldown = ERROR_COOLDOWN_CHUNKS
+            if not self.fixed:
+                self.size = max(self.min_bytes, _align(self.size / 2))
+            return
+
+        sample = sent / max(seconds, 1e-3)
+        self.bw = sample if self.bw is None else BW_EWMA_ALPHA * sample + (1 - BW_EWMA_ALPHA) * self.bw
+        if self.fixed:
+            return
+        # 1チャンクにかける時間: 再送の損を抑える target_sec と、往復の待ちを薄める RTT×rtt_factor の大きい方
+        want = self.bw * max(self.target_sec, (self.rtt or 0.0) * self.rtt_factor)
+        want = min(max(want, self.size / 2), self.size * 2)
+        if self.cooldown:
+            want = min(want, self.size)
+            self.cooldown -= 1
+        self.size = min(self.max_bytes, max(self.min_bytes, _align(want)))
+
+    def eta(self, remaining_bytes: int) -> Optional[float]:
+        if not self.bw:
+            return None
+        return remaining_bytes / self.bw
+
+    def summary(self, total_bytes: int, seconds: float) -> dict:
+        sizes = [c[0] for c in self.chunks if c[2] in (200, 201, 308)]
+        uploaded = total_bytes - self.resumed_from
+        return {
+            "size_bytes": total_bytes,
+            "resumed_from": self.resumed_from,
+            "seconds": round(seconds, 2),
+            "avg_mb_s": round(_mb(uploaded) / seconds, 3) if seconds > 0 else None,
+            "rtt_ms": round(self.rtt * 1000, 1) if self.rtt is not None else None,
+            "chunks": len(self.chunks),
+            "errors": self.errors,
+            "sent_bytes": self.sent_bytes,
+            "retried_bytes": max(0, self.sent_bytes - uploaded),
+            "chunk_min": min(sizes) if sizes else None,
+            "chunk_max": max(sizes) if sizes else None,
+            "chunk_final": self.size,
+            "adaptive": not self.fixed,
+            "chunk_log": self.chunks,
+        }
+
+
+class TimedHttp:
+    """
+    http（httplib2 互換）を包んで、request() ごとの時間を ChunkTuner に渡す
+    """
+
+    def __init__(self, http, tuner: ChunkTuner):
+        self._http = http
+        self._tuner = tuner
+
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        length = 0
+        for k, v in (headers or {}).items():
+            if k.lower() == "content-length":
+                length = int(v)
+        t0 = time.perf_counter()
+        try:
+            resp, content = self._http.request(uri, method=method, body=body, headers=headers, **kwargs)
+        except Exception:
+            if method == "PUT" and length > 0:
+                self._tuner.observe_chunk(length, time.perf_counter() - t0, 0)
+            raise
+        dt = time.perf_counter() - t0
+        if method == "PUT" and length > 0:
+            self._tuner.observe_chunk(length, dt, resp.status)
+        elif length <= SMALL_REQUEST_BYTES:
+            self._tuner.observe_small(dt)
+        return resp, content
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+
+def adaptive_media_upload(file_path: str, mimetype: str, tuner: ChunkTuner):
+    """
+    チャンクサイズを毎回 tuner から読む MediaFileUpload（resumable）
+    """
+    from googleapiclient.http import MediaFileUpload
+
+    class _AdaptiveMediaFileUpload(MediaFileUpload):
+        def chunksize(self):
+            return tuner.size
+
+    return _AdaptiveMediaFileUpload(file_path, mimetype=mimetype, chunksize=tuner.size, resumable=True)
+
+
+def format_progress(tuner: ChunkTuner, done_bytes: int, total_bytes: int) -> str:
+    """
+    進捗行の後半（速度 / 残り時間 / 今のチャンク / 再送）
+    """
+    parts = []
+    if tuner.bw:
+        parts.append(f"{_mb(tuner.bw):.2f} MB/s")
+    eta = tuner.eta(total_bytes - done_bytes)
+    if eta is not None:
+        parts.append(f"残り {int(eta) // 3600}:{int(eta) // 60 % 60:02}:{int(eta) % 60:02}")
+    parts.append(f"チャンク {_mb(tuner.size):.2f} MB")
+    parts.append(f"再送 {_mb(max(0, tuner.sent_bytes - (done_bytes - tuner.resumed_from))):.1f} MB")
+    return "  ".join(parts)
+
+
+def write_stats(path: str, record: dict):
+    """
+    1アップロード1行の JSON を追記する（並列アップロードから呼ばれてもよい）
+    """
+    if not path:
+        return
+    line = json.dumps(record, ensure_ascii=False)
+    with _stats_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
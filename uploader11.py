@@ -28,25 +28,43 @@ YouTube uploader (single file) - 完全版
     * 同フォルダ類似検索→fallback の後、today_root を再帰検索して候補提示
     * --confirm_today で候補を y/N で採用確認
     * --today_recursive はデフォルトON（無効化は --no_today_recursive）
+- ★--captions：mp4 と同名の .srt（google_txt2tts_srt_mp4_jp.py の SUBTITLE_MODE="sidecar"）を字幕トラックとして上げる
+    * 字幕の登録には youtube.force-ssl の権限が要るので、初回は再認証になる
+- ★起動を軽く：Google API / 認証ライブラリ と difflib は使う直前に import（--help / --dry_run では読み込まない）
+    * YouTube API の定義はライブラリ同梱のものを使う（static_discovery。毎回のダウンロード/解析なし）
+    * 起動時間の計測と予算チェックは bench_startup.py
+- ★バッチ：フォルダや複数の mp4 をまとめて上げる（--batch / 位置引数に複数 or フォルダ）
+    * 認証と YouTube クライアントの作成は1回だけ。接続は並列数ぶんを使い回す（keep-alive）
+    * トークンは期限の少し前にバックグラウンドで更新（長いバッチの途中で切れない）
+    * アップロード中に次のファイルの txt/タイトルを先に決めておく
+    * --jobs 本まで同時にアップロードし、最後にファイルごとの結果一覧を出す（失敗があれば終了コード 1）
+- ★チャンクサイズの自動調整（upload_tuning.py）：チャンクごとの速度と RTT を測って 1〜128MB の間で増減
+    * 進捗に MB/s・残り時間・今のチャンク・再送した量を表示
+    * 1アップロード1行の統計を upload_stats.jsonl に追記（--stats_file、"" で無効）
+    * --chunk_mb で固定サイズにもできる（比較用）
+- ★中断しても続きから（upload_sessions.py）：resumable のセッション URI と確定済みの位置をディスクに保存
+    * 落ちた/止めた後に同じ mp4 を上げると、サーバーに確定済みの範囲を問い合わせて続きから送る
+    * mp4 が作り直されていたら（サイズ/更新時刻/先頭の hash）使わない。セッション切れのときだけ最初から
+    * 保存先は --session_dir（既定 ~/.yt_upload_sessions、"" で無効）
 """
 
 import os
 import re
+import sys
 import time
 import shutil
 import argparse
-from datetime import timedelta
-from typing import Tuple, List, Optional
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Tuple, List, NamedTuple, Optional
 
-import chardet
-from difflib import SequenceMatcher
+import text_encoding
+import upload_tuning
+import upload_sessions
 
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.errors import HttpError
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
+# googleapiclient / google-auth / oauthlib は読み込みだけで重いので、使う関数の中で import する
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
 
 
 # =========================
@@ -68,6 +86,18 @@ DEFAULT_PORT = int(os.environ.get("YT_OAUTH_PORT", "8080"))
 DEFAULT_TXT_SIMILARITY = float(os.environ.get("YT_TXT_SIMILARITY", "0.90"))
 DEFAULT_DONE_DIR = os.environ.get("YT_DONE_DIR", "done")
 
+# バッチ時の同時アップロード数
+DEFAULT_UPLOAD_JOBS = int(os.environ.get("YT_UPLOAD_JOBS", "2"))
+
+# アップロードごとの統計（速度・チャンク・再送）を追記する JSONL（"" で書かない）
+DEFAULT_UPLOAD_STATS = os.environ.get("YT_UPLOAD_STATS", "upload_stats.jsonl")
+
+# 中断したアップロードを続きから再開するためのセッション保存先（"" で保存しない）
+DEFAULT_UPLOAD_SESSION_DIR = os.environ.get(
+    "YT_UPLOAD_SESSION_DIR",
+    os.path.join(os.path.expanduser("~"), ".yt_upload_sessions")
+)
+
 DEFAULT_TODAY_ROOT = os.environ.get(
     "YT_TODAY_ROOT",
     r"C:\Users\user\OneDrive\＊【エコビズ】\today"
@@ -123,7 +153,39 @@ MODE_PRESETS = {
 # 設定
 # =========================
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+CAPTION_SCOPES = SCOPES + ["https://www.googleapis.com/auth/youtube.force-ssl"]
 RETRIABLE_STATUS = {500, 502, 503, 504}
+# resumable のセッション切れ（最初からやり直す）
+SESSION_EXPIRED_STATUS = {404, 410}
+
+# バッチ中、アクセストークンの期限がこの秒数より近づいたらバックグラウンドで更新する
+TOKEN_REFRESH_MARGIN_SEC = 300
+TOKEN_CHECK_INTERVAL_SEC = 30
+
+# resumable アップロードのチャンク（自動調整の初期値・下限・上限 MB）と、1チャンクにかける目安の秒数
+# 大きすぎると切れたときの再送が高く、小さすぎるとチャンクごとの往復待ちが増える
+UPLOAD_CHUNK_INITIAL_MB = 8
+UPLOAD_CHUNK_MIN_MB = 1
+UPLOAD_CHUNK_MAX_MB = 128
+UPLOAD_CHUNK_TARGET_SEC = 8.0
+# 1チャンクの時間を RTT の何倍以上にするか（20倍 = 往復待ちが 5% 以下）
+UPLOAD_CHUNK_RTT_FACTOR = 20.0
+
+
+class UploadPlan(NamedTuple):
+    file_path: str
+    used_txt: Optional[str]
+    title: str
+    description: str
+    caption_file: Optional[str]
+
+
+class BatchResult(NamedTuple):
+    file_path: str
+    title: str
+    video_id: Optional[str]
+    seconds: float
+    error: str          # 成功/dry_run は ""
 
 
 # =========================
@@ -192,38 +254,15 @@ def normalize_stem(stem: str) -> str:
 
 
 def similarity(a: str, b: str) -> float:
+    from difflib import SequenceMatcher
     return SequenceMatcher(None, a, b).ratio()
 
 
 def read_text_lines_best_effort(txt_file: str) -> Optional[List[str]]:
+    # BOM/UTF-8 → cp932/shift_jis/euc_jp → 先頭だけ chardet（text_encoding.py、結果はキャッシュ）
     if not txt_file or not os.path.exists(txt_file):
         return None
-
-    with open(txt_file, "rb") as f:
-        raw = f.read()
-
-    enc_guess = None
-    try:
-        enc_guess = chardet.detect(raw).get("encoding")
-    except Exception:
-        pass
-
-    candidates = []
-    if enc_guess:
-        candidates.append(enc_guess)
-    candidates += ["utf-8-sig", "utf-8", "cp932", "shift_jis", "euc_jp"]
-
-    tried = set()
-    for enc in candidates:
-        if not enc or enc.lower() in tried:
-            continue
-        tried.add(enc.lower())
-        try:
-            return raw.decode(enc, errors="strict").splitlines(True)
-        except Exception:
-            pass
-
-    return None
+    return text_encoding.read_lines_strict(txt_file)
 
 
 def _looks_like_filename_title(title: str) -> bool:
@@ -419,7 +458,13 @@ def ask_yes_no(prompt: str, default_no: bool = True) -> bool:
 # =========================
 # Auth
 # =========================
-def authenticate(token_file: str, credentials_file: str, port: int) -> Optional[Credentials]:
+def authenticate(token_file: str, credentials_file: str, port: int,
+                 scopes: Optional[List[str]] = None) -> Optional["Credentials"]:
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    scopes = scopes or SCOPES
     if not credentials_file or not os.path.exists(credentials_file):
         print("エラー: credentials_file が見つかりません。")
         print(f"  現在の設定: {credentials_file}")
@@ -429,16 +474,19 @@ def authenticate(token_file: str, credentials_file: str, port: int) -> Optional[
     creds = None
     if os.path.exists(token_file):
         try:
-            creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+            creds = Credentials.from_authorized_user_file(token_file, scopes)
         except Exception:
             creds = None
+        # 保存済みトークンの権限が足りない（字幕用の force-ssl が無い等）なら取り直す
+        if creds and not creds.has_scopes(scopes):
+            creds = None
 
     if not creds or not creds.valid:
         try:
             if creds and creds.expired and creds.refresh_token:
                 creds.refresh(Request())
             else:
-                flow = InstalledAppFlow.from_client_secrets_file(credentials_file, SCOPES)
+                flow = InstalledAppFlow.from_client_secrets_file(credentials_file, scopes)
                 creds = flow.run_local_server(
                     port=port,
                     access_type="offline",
@@ -454,9 +502,134 @@ def authenticate(token_file: str, credentials_file: str, port: int) -> Optional[
     return creds
 
 
+def shared_credentials(creds: "Credentials") -> "Credentials":
+    """
+    バッチ用：TokenKeeper と各スレッドの AuthorizedHttp で共有する Credentials を作る（中身は creds の写し）
+    更新（refresh。期限切れ・401 のとき AuthorizedHttp からも呼ばれる）とヘッダへの書き込み（before_request）を
+    1つのロックで順番にする。バックグラウンドの更新の途中で、別スレッドが書きかけのトークンを読まないように
+    """
+    from google.oauth2.credentials import Credentials
+
+    lock = threading.RLock()   # before_request の中から refresh が呼ばれるので再入可
+
+    class _SharedCredentials(Credentials):
+        def refresh(self, request):
+            with lock:
+                super().refresh(request)
+
+        def before_request(self, request, method, url, headers):
+            with lock:
+                super().before_request(request, method, url, headers)
+
+    # from_authorized_user_info は token_uri を既定に戻すので使わず、状態をそのまま写す
+    shared = _SharedCredentials.__new__(_SharedCredentials)
+    shared.__dict__.update(creds.__dict__)
+    shared.lock = lock
+    return shared
+
+
+class TokenKeeper:
+    """
+    バッチ用：アクセストークン（約1時間）の期限が近づいたら、バックグラウンドで先に更新して token_file にも保存する
+    （長いアップロードの途中で期限切れ → 401 → 再送、にならないように）
+    creds は shared_credentials() で作ったもの（各スレッドの AuthorizedHttp の更新と同じロックを使う）
+    """
+
+    def __init__(self, creds: "Credentials", token_file: str,
+                 margin_sec: float = TOKEN_REFRESH_MARGIN_SEC, interval_sec: float = TOKEN_CHECK_INTERVAL_SEC):
+        self.creds = creds
+        self.token_file = token_file
+        self.margin_sec = margin_sec
+        self.interval_sec = interval_sec
+        self.refreshed = 0
+        self._lock = getattr(creds, "lock", None) or threading.RLock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="token-keeper", daemon=True)
+
+    def start(self) -> "TokenKeeper":
+        self.refresh_if_needed()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def refresh_if_needed(self) -> bool:
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            expiry = self.creds.expiry   # google-auth は naive な UTC
+            if expiry is None or not self.creds.refresh_token:
+                return False
+            left = (expiry - datetime.now(timezone.utc).replace(tzinfo=None)).total_seconds()
+            if left > self.margin_sec:
+                return False
+            try:
+                self.creds.refresh(Request())
+            except Exception as e:
+                print(f"警告: トークンの更新に失敗（次の確認で再試行）: {e}")
+                return False
+            self.refreshed += 1
+            try:
+                with open(self.token_file, "w", encoding="utf-8") as f:
+                    f.write(self.creds.to_json())
+            except OSError as e:
+                print(f"警告: token_file を保存できません: {e}")
+            return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval_sec):
+            self.refresh_if_needed()
+
+
+def youtube_client(creds: "Credentials"):
+    """
+    YouTube Data API v3 のクライアント。API 定義はライブラリ同梱の JSON を使う（ネットワークに取りに行かない）
+    """
+    from googleapiclient.discovery import build
+    try:
+        return build("youtube", "v3", credentials=creds, static_discovery=True, cache_discovery=False)
+    except TypeError as e:
+        if "static_discovery" not in str(e):
+            raise
+        # google-api-python-client 1.x には static_discovery が無い（毎回 API 定義を取りに行く）
+        print("注意: google-api-python-client が古いため API 定義を毎回取得します（pip install -U google-api-python-client）")
+        return build("youtube", "v3", credentials=creds, cache_discovery=False)
+
+
+def authorized_http(creds: "Credentials"):
+    """
+    認証付きの HTTP 接続（httplib2 はスレッドセーフでないので、並列アップロードではスレッドごとに1つ持つ）
+    同じ接続を使い回すので、2本目以降のファイルは TCP/TLS の接続からやり直さない
+    """
+    import google_auth_httplib2
+    from googleapiclient.http import build_http
+    return google_auth_httplib2.AuthorizedHttp(creds, http=build_http())
+
+
 # =========================
 # Upload
 # =========================
+def upload_caption(youtube, video_id: str, caption_file: str, language: str = "ja", name: str = "",
+                   http=None) -> bool:
+    """
+    SRT を字幕トラックとして登録する。失敗しても動画のアップロードは成功扱いのまま（False を返す）
+    """
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload
+
+    body = {"snippet": {"videoId": video_id, "language": language, "name": name, "isDraft": False}}
+    media = MediaFileUpload(caption_file, mimetype="application/octet-stream", resumable=False)
+    try:
+        youtube.captions().insert(part="snippet", body=body, media_body=media).execute(http=http)
+    except HttpError as e:
+        print(f"警告: 字幕のアップロードに失敗: {e}")
+        return False
+    print(f"字幕アップロード完了: {os.path.basename(caption_file)}（{language}）")
+    return True
+
+
 def upload_video(
     file_path: str,
     title: str,
@@ -469,12 +642,29 @@ def upload_video(
     port: int,
     show_progress: bool,
     max_retries: int = 8,
+    caption_file: Optional[str] = None,
+    caption_lang: str = "ja",
+    youtube=None,
+    http=None,
+    label: str = "",
+    chunk_mb: float = 0,
+    stats_file: str = DEFAULT_UPLOAD_STATS,
+    session_dir: str = DEFAULT_UPLOAD_SESSION_DIR,
 ) -> Optional[str]:
-    creds = authenticate(token_file, credentials_file, port)
-    if not creds:
-        return None
+    """
+    youtube と http を渡すとそれを使う（バッチ：認証・クライアント作成・接続を使い回す）。省略時は毎回認証する
+    label は進捗表示の先頭に付ける（並列アップロードでどのファイルか分かるように）
+    chunk_mb > 0 ならチャンクをその大きさに固定（0 = 自動調整）
+    session_dir にセッションを保存し、前回中断したものがあれば続きから送る（"" で無効）
+    """
+    from googleapiclient.errors import HttpError
 
-    youtube = build("youtube", "v3", credentials=creds)
+    if youtube is None:
+        creds = authenticate(token_file, credentials_file, port, CAPTION_SCOPES if caption_file else SCOPES)
+        if not creds:
+            return None
+        youtube = youtube_client(creds)
+        http = authorized_http(creds)
 
     request_body = {
         "snippet": {
@@ -486,8 +676,19 @@ def upload_video(
         "status": {"privacyStatus": privacy_status},
     }
 
-    media = MediaFileUpload(file_path, resumable=True, mimetype="video/*")
+    mb = 1024 * 1024
+    tuner = upload_tuning.ChunkTuner(
+        initial_bytes=int((chunk_mb or UPLOAD_CHUNK_INITIAL_MB) * mb),
+        min_bytes=int((chunk_mb or UPLOAD_CHUNK_MIN_MB) * mb),
+        max_bytes=int((chunk_mb or UPLOAD_CHUNK_MAX_MB) * mb),
+        target_sec=UPLOAD_CHUNK_TARGET_SEC,
+        rtt_factor=UPLOAD_CHUNK_RTT_FACTOR,
+        fixed=chunk_mb > 0,
+    )
+    timed_http = upload_tuning.TimedHttp(http, tuner)
+    media = upload_tuning.adaptive_media_upload(file_path, "video/*", tuner)
     request = youtube.videos().insert(part="snippet,status", body=request_body, media_body=media)
+    total_bytes = media.size()
 
     response = None
     retry = 0
@@ -495,45 +696,124 @@ def upload_video(
     start_time = time.time()
     last_percent = -1
 
-    print("アップロード開始（途中経過を表示します）")
+    # ---- 中断したセッションの再開 ----
+    store = upload_sessions.SessionStore(session_dir) if session_dir else None
+    identity = upload_sessions.file_identity(file_path) if store else None
+    session_created = time.time()
+    saved_state = (None, 0)
+    if store:
+        saved = store.load(file_path, identity)
+        if saved:
+            state, offset, body = upload_sessions.query_offset(timed_http, saved.uri, total_bytes)
+            if state == "active":
+                request.resumable_uri = saved.uri
+                request.resumable_progress = offset
+                tuner.resumed_from = offset
+                session_created = saved.created
+                saved_state = (saved.uri, offset)
+                print(f"{label}前回の続きから再開: {offset / mb:.1f} / {total_bytes / mb:.1f} MB"
+                      f"（{offset * 100 // max(1, total_bytes)}%。タイトル等は前回のまま）")
+            elif state == "done":
+                response = body
+                print(f"{label}前回のアップロードは完了していました")
+            elif state == "expired":
+                store.remove(file_path)
+                print(f"{label}前回のセッションは期限切れのため、最初からアップロードします")
+            else:
+                # 完了しているかもしれないので上げ直さない（同じ動画が2本になる）。セッションは残して次回また問い合わせる
+                print(f"{label}エラー: 前回のセッションの状態が分からないため、今回はアップロードしません"
+                      f"（次回もう一度確認します。最初から上げ直すなら {session_dir} の該当セッションを消してください）")
+                return None
+
+    def remember():
+        nonlocal saved_state
+        cur = (request.resumable_uri, request.resumable_progress)
+        if store is None or cur[0] is None or cur == saved_state:
+            return
+        try:
+            store.save(file_path, cur[0], cur[1], identity, session_created)
+            saved_state = cur
+        except OSError as e:
+            print(f"  {label}警告: セッションを保存できません（中断すると最初からになります）: {e}")
+
+    def record(video_id: Optional[str], error: str = "") -> dict:
+        stats = tuner.summary(total_bytes, time.time() - start_time)
+        upload_tuning.write_stats(stats_file, {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "file": os.path.abspath(file_path),
+            "video_id": video_id,
+            "error": error,
+            **stats,
+        })
+        return stats
+
+    print(f"{label}アップロード開始（途中経過を表示します）")
 
     while response is None:
         try:
-            status, response = request.next_chunk()
+            before = request.resumable_progress
+            status, response = request.next_chunk(http=timed_http)
+            if request.resumable_progress > before:
+                retry = 0   # 進んだらリトライの回数と待ち時間は最初から（長いアップロードで回数を使い切らない）
+            if response is None:
+                remember()
             if status and show_progress:
                 percent = int(status.progress() * 100)
                 if percent != last_percent:
                     elapsed = time.time() - start_time
-                    print(f"  進捗: {percent:3d}%  経過時間: {fmt_elapsed(elapsed)}")
+                    print(f"  {label}進捗: {percent:3d}%  経過時間: {fmt_elapsed(elapsed)}  "
+                          + upload_tuning.format_progress(tuner, request.resumable_progress, total_bytes))
                     last_percent = percent
 
         except HttpError as e:
             code = getattr(e.resp, "status", None)
+            if code in SESSION_EXPIRED_STATUS and request.resumable_uri and retry < max_retries:
+                # アップロード中にセッションが切れた → 新しいセッションで最初から
+                print(f"  {label}セッション切れ(Http {code})。新しいセッションで最初からアップロードします")
+                if store:
+                    store.remove(file_path)
+                request.resumable_uri = None
+                request.resumable_progress = 0
+                tuner.resumed_from = 0
+                session_created = time.time()
+                saved_state = (None, 0)
+                retry += 1
+                continue
             if code in RETRIABLE_STATUS and retry < max_retries:
                 wait = (2 ** retry) + (0.2 * retry)
                 elapsed = time.time() - start_time
-                print(f"  一時エラー(Http {code})。{wait:.1f}s 待機（経過 {fmt_elapsed(elapsed)}）")
+                print(f"  {label}一時エラー(Http {code})。{wait:.1f}s 待機（経過 {fmt_elapsed(elapsed)}）")
                 time.sleep(wait)
                 retry += 1
                 continue
-            print(f"エラー: アップロード中に問題: {e}")
+            print(f"{label}エラー: アップロード中に問題: {e}")
+            record(None, str(e))
             return None
 
         except Exception as e:
             if retry < max_retries:
                 wait = (2 ** retry) + (0.2 * retry)
                 elapsed = time.time() - start_time
-                print(f"  一時エラー({e})。{wait:.1f}s 待機（経過 {fmt_elapsed(elapsed)}）")
+                print(f"  {label}一時エラー({e})。{wait:.1f}s 待機（経過 {fmt_elapsed(elapsed)}）")
                 time.sleep(wait)
                 retry += 1
                 continue
-            print(f"エラー: アップロード中に問題: {e}")
+            print(f"{label}エラー: アップロード中に問題: {e}")
+            record(None, str(e))
             return None
 
-    total = time.time() - start_time
-    print(f"アップロード完了（総時間 {fmt_elapsed(total)}）")
+    vid = response.get("id")
+    if store and vid:
+        store.remove(file_path)   # 動画 ID を受け取るまでは消さない（次回の問い合わせで完了を確かめられるように）
+    st = record(vid)
+    rtt = f"{st['rtt_ms']:.0f} ms" if st["rtt_ms"] is not None else "-"
+    print(f"{label}アップロード完了（総時間 {fmt_elapsed(st['seconds'])} / 平均 {st['avg_mb_s'] or 0:.2f} MB/s"
+          f" / チャンク {st['chunks']} 回（最後 {st['chunk_final'] / mb:.2f} MB） / RTT {rtt}"
+          f" / 再送 {st['retried_bytes'] / mb:.1f} MB）")
 
-    return response.get("id")
+    if vid and caption_file:
+        upload_caption(youtube, vid, caption_file, caption_lang, http=http)
+    return vid
 
 
 # =========================
@@ -591,33 +871,21 @@ def resolve_mp4_path(mp4_arg: Optional[str], positional_path: Optional[str]) ->
     return latest
 
 
-def upload_single_video(
-    file_path: Optional[str],
-    category_id: str,
-    privacy_status: str,
+def resolve_upload_plan(
+    file_path: str,
     prefix: str,
+    category_id: str,
     tags: List[str],
-    token_file: str,
-    credentials_file: str,
-    port: int,
-    done_dir: str,
-    no_move: bool,
-    show_progress: bool,
     txt_similarity: float,
-    dry_run: bool,
     today_root: Optional[str],
     today_recursive: bool,
     confirm_today: bool,
-):
-    if not file_path:
-        print("エラー: mp4 が指定されていません。かつ、カレントディレクトリに mp4 が見つかりません。")
-        return
-
-    file_path = os.path.abspath(file_path)
-    if not os.path.isfile(file_path):
-        print(f"エラー: 指定された mp4 が無効です: {file_path}")
-        return
-
+    captions: bool = False,
+    caption_lang: str = "ja",
+) -> UploadPlan:
+    """
+    mp4 に使う txt を探してタイトル/説明文/字幕ファイルを決め、内容を表示する（アップロードはしない）
+    """
     fallback_title = os.path.splitext(os.path.basename(file_path))[0]
 
     # ① 同フォルダ：類似txt検索
@@ -668,10 +936,21 @@ def upload_single_video(
 
     print(f"アップロード開始: {file_path}")
     print(f"  使用txt: {used_txt if used_txt else 'なし（fallback）'}")
+    if used_txt:
+        print(f"  {text_encoding.summary()}")
     print(f"  タイトル: {title}")
     print(f"  category_id: {category_id}")
     print(f"  tags: {', '.join(tags) if tags else '（なし）'}")
 
+    caption_file = None
+    if captions:
+        cand = os.path.splitext(file_path)[0] + ".srt"
+        if os.path.exists(cand):
+            caption_file = cand
+            print(f"  字幕: {caption_file}（{caption_lang}）")
+        else:
+            print(f"  字幕: 見つかりません（{cand}）")
+
     if desc:
         print("  説明文（全文）:")
         print("  --------------------")
@@ -681,14 +960,52 @@ def upload_single_video(
     else:
         print("  説明文: （空）")
 
+    return UploadPlan(file_path, used_txt, title, desc, caption_file)
+
+
+def upload_single_video(
+    file_path: Optional[str],
+    category_id: str,
+    privacy_status: str,
+    prefix: str,
+    tags: List[str],
+    token_file: str,
+    credentials_file: str,
+    port: int,
+    done_dir: str,
+    no_move: bool,
+    show_progress: bool,
+    txt_similarity: float,
+    dry_run: bool,
+    today_root: Optional[str],
+    today_recursive: bool,
+    confirm_today: bool,
+    captions: bool = False,
+    caption_lang: str = "ja",
+    chunk_mb: float = 0,
+    stats_file: str = DEFAULT_UPLOAD_STATS,
+    session_dir: str = DEFAULT_UPLOAD_SESSION_DIR,
+):
+    if not file_path:
+        print("エラー: mp4 が指定されていません。かつ、カレントディレクトリに mp4 が見つかりません。")
+        return
+
+    file_path = os.path.abspath(file_path)
+    if not os.path.isfile(file_path):
+        print(f"エラー: 指定された mp4 が無効です: {file_path}")
+        return
+
+    plan = resolve_upload_plan(file_path, prefix, category_id, tags, txt_similarity,
+                               today_root, today_recursive, confirm_today, captions, caption_lang)
+
     if dry_run:
         print("dry_run 指定のため、アップロードは行いません。")
         return
 
     vid = upload_video(
         file_path=file_path,
-        title=title,
-        description=desc,
+        title=plan.title,
+        description=plan.description,
         category_id=category_id,
         privacy_status=privacy_status,
         tags=tags,
@@ -696,18 +1013,187 @@ def upload_single_video(
         credentials_file=credentials_file,
         port=port,
         show_progress=show_progress,
+        caption_file=plan.caption_file,
+        caption_lang=caption_lang,
+        chunk_mb=chunk_mb,
+        stats_file=stats_file,
+        session_dir=session_dir,
     )
 
     if vid:
         print(f"アップロード完了: videoId={vid}")
         print(f"URL: https://www.youtube.com/watch?v={vid}")
         if not no_move:
-            move_related_to_done(file_path, used_txt, done_dir)
+            move_related_to_done(file_path, plan.used_txt, done_dir)
             print(f"ファイル移動完了: ./{done_dir}/")
     else:
         print("アップロード失敗（ファイルは移動しません）")
 
 
+# =========================
+# Batch
+# =========================
+def collect_mp4s(paths: List[str]) -> List[str]:
+    """
+    フォルダ（直下の mp4 を古い順。done などのサブフォルダは見ない）と mp4 の指定を、重複なしの一覧にする
+    """
+    out: List[str] = []
+    seen = set()
+    for p in paths:
+        if os.path.isdir(p):
+            names = [os.path.join(p, n) for n in os.listdir(p) if n.lower().endswith(".mp4")]
+            files = sorted((f for f in names if os.path.isfile(f)), key=os.path.getmtime)
+        elif os.path.isfile(p):
+            files = [p]
+        else:
+            print(f"注意: 見つからないのでスキップ: {p}")
+            continue
+        for f in files:
+            ap = os.path.abspath(f)
+            if ap not in seen:
+                seen.add(ap)
+                out.append(ap)
+    return out
+
+
+def upload_batch(
+    paths: List[str],
+    jobs: int,
+    category_id: str,
+    privacy_status: str,
+    prefix: str,
+    tags: List[str],
+    token_file: str,
+    credentials_file: str,
+    port: int,
+    done_dir: str,
+    no_move: bool,
+    show_progress: bool,
+    txt_similarity: float,
+    dry_run: bool,
+    today_root: Optional[str],
+    today_recursive: bool,
+    confirm_today: bool,
+    captions: bool = False,
+    caption_lang: str = "ja",
+    chunk_mb: float = 0,
+    stats_file: str = DEFAULT_UPLOAD_STATS,
+    session_dir: str = DEFAULT_UPLOAD_SESSION_DIR,
+) -> List[BatchResult]:
+    """
+    複数の mp4 を1プロセスで上げる
+    - 認証・クライアント作成は1回。接続はワーカーのスレッドごとに1つ作って使い回す
+    - メタデータ（txt 探索・タイトル決定・today の y/N）はメインスレッドで順に決め、決まったものから
+      ワーカーに渡す（= 前のファイルのアップロード中に次のファイルの txt/タイトルが決まっている）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    files = collect_mp4s(paths)
+    if not files:
+        print("エラー: アップロードする mp4 がありません。")
+        return []
+    n = len(files)
+    jobs = max(1, min(jobs, n))
+    print(f"バッチ: {n} 本 / 同時 {jobs} 本" + ("（dry_run）" if dry_run else ""))
+
+    creds = None
+    youtube = None
+    keeper = None
+    local = threading.local()
+    if not dry_run:
+        creds = authenticate(token_file, credentials_file, port, CAPTION_SCOPES if captions else SCOPES)
+        if not creds:
+            return [BatchResult(f, "", None, 0.0, "認証失敗") for f in files]
+        # 全スレッドとトークン更新で1つの Credentials を使う（更新はロックで順番に）
+        creds = shared_credentials(creds)
+        youtube = youtube_client(creds)
+        keeper = TokenKeeper(creds, token_file).start()
+
+    def run(k: int, plan: UploadPlan) -> BatchResult:
+        label = f"[{k}/{n}] "
+        t0 = time.time()
+        try:
+            if getattr(local, "http", None) is None:
+                local.http = authorized_http(creds)
+            vid = upload_video(
+                file_path=plan.file_path,
+                title=plan.title,
+                description=plan.description,
+                category_id=category_id,
+                privacy_status=privacy_status,
+                tags=tags,
+                token_file=token_file,
+                credentials_file=credentials_file,
+                port=port,
+                show_progress=show_progress,
+                caption_file=plan.caption_file,
+                caption_lang=caption_lang,
+                youtube=youtube,
+                http=local.http,
+                label=label,
+                chunk_mb=chunk_mb,
+                stats_file=stats_file,
+                session_dir=session_dir,
+            )
+            if not vid:
+                return BatchResult(plan.file_path, plan.title, None, time.time() - t0, "アップロード失敗")
+            print(f"{label}アップロード完了: videoId={vid}")
+            if not no_move:
+                move_related_to_done(plan.file_path, plan.used_txt, done_dir)
+            return BatchResult(plan.file_path, plan.title, vid, time.time() - t0, "")
+        except Exception as e:
+            print(f"{label}エラー: {e}")
+            return BatchResult(plan.file_path, plan.title, None, time.time() - t0, str(e) or type(e).__name__)
+
+    results: List[BatchResult] = []
+    futures = []
+    pool = None if dry_run else ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="upload")
+    try:
+        for k, f in enumerate(files, 1):
+            print(f"---- [{k}/{n}] {os.path.basename(f)}")
+            try:
+                plan = resolve_upload_plan(f, prefix, category_id, tags, txt_similarity,
+                                           today_root, today_recursive, confirm_today, captions, caption_lang)
+            except Exception as e:
+                print(f"[{k}/{n}] エラー: メタデータを決められません: {e}")
+                results.append(BatchResult(f, "", None, 0.0, f"メタデータ: {e}"))
+                continue
+            if pool is None:
+                results.append(BatchResult(f, plan.title, None, 0.0, ""))
+            else:
+                futures.append(pool.submit(run, k, plan))
+        results.extend(fu.result() for fu in futures)
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
+        if keeper is not None:
+            keeper.stop()
+
+    order = {f: i for i, f in enumerate(files)}
+    results.sort(key=lambda r: order.get(r.file_path, 0))
+    return results
+
+
+def print_batch_summary(results: List[BatchResult], elapsed: float, dry_run: bool = False):
+    ok = sum(1 for r in results if r.video_id)
+    failed = sum(1 for r in results if r.error)
+    print("==== バッチ結果 ====")
+    for r in results:
+        if r.error:
+            mark, detail = "❌", r.error
+        elif r.video_id:
+            mark, detail = "✅", f"https://www.youtube.com/watch?v={r.video_id}"
+        else:
+            mark, detail = "--", "dry_run"
+        print(f"{mark} {fmt_elapsed(r.seconds):>8}  {os.path.basename(r.file_path)}  {detail}")
+        if r.title:
+            print(f"             {r.title}")
+    if dry_run:
+        print(f"合計 {len(results)} 本（dry_run）/ 総時間 {fmt_elapsed(elapsed)}")
+    else:
+        print(f"合計 {len(results)} 本：成功 {ok} / 失敗 {failed} / 総時間 {fmt_elapsed(elapsed)}")
+
+
 def parse_tags_csv(s: Optional[str]) -> List[str]:
     if not s:
         return []
@@ -755,7 +1241,8 @@ if __name__ == "__main__":
     )
 
     p.add_argument("--mp4", default=None, help="アップロードする mp4 のパス（位置引数より優先）")
-    p.add_argument("path", nargs="?", default=None, help="mp4 のパス（省略可。未指定なら最新mp4）")
+    p.add_argument("path", nargs="*", default=[],
+                   help="mp4 のパス（省略可。未指定なら最新mp4）。複数の mp4 やフォルダを渡すとバッチ")
 
     p.add_argument(
         "--mode",
@@ -796,12 +1283,50 @@ if __name__ == "__main__":
         help="today 再帰検索を無効化する"
     )
     p.add_argument("--confirm_today", action="store_true", help="today 候補の採用を y/N で確認する")
+    p.add_argument("--captions", action="store_true", help="mp4 と同名の .srt を字幕トラックとして上げる")
+    p.add_argument("--caption_lang", default="ja", help="字幕の言語（既定 ja）")
+    p.add_argument("--batch", action="store_true",
+                   help="バッチ：位置引数の mp4/フォルダ（省略時はカレントフォルダ）の mp4 をまとめて上げる")
+    p.add_argument("--jobs", type=int, default=DEFAULT_UPLOAD_JOBS, help="バッチの同時アップロード数")
+    p.add_argument("--chunk_mb", type=float, default=0, help="チャンクを固定する大きさ MB（0 = 自動調整）")
+    p.add_argument("--stats_file", default=DEFAULT_UPLOAD_STATS, help="アップロード統計の JSONL（\"\" で書かない）")
+    p.add_argument("--session_dir", default=DEFAULT_UPLOAD_SESSION_DIR,
+                   help="中断したアップロードを再開するためのセッション保存先（\"\" で保存しない）")
 
     args = p.parse_args()
 
     prefix, category_id, tags, txt_similarity = resolve_effective_settings(args)
 
-    mp4_path = resolve_mp4_path(args.mp4, args.path)
+    if args.batch or len(args.path) > 1 or any(os.path.isdir(x) for x in args.path):
+        t0 = time.time()
+        results = upload_batch(
+            paths=args.path or [os.getcwd()],
+            jobs=args.jobs,
+            category_id=category_id,
+            privacy_status=args.privacy_status,
+            prefix=prefix,
+            tags=tags,
+            token_file=args.token_file,
+            credentials_file=args.credentials_file,
+            port=args.port,
+            done_dir=args.done_dir,
+            no_move=args.no_move,
+            show_progress=not args.no_progress,
+            txt_similarity=txt_similarity,
+            dry_run=args.dry_run,
+            today_root=args.today_root,
+            today_recursive=args.today_recursive,
+            confirm_today=args.confirm_today,
+            captions=args.captions,
+            caption_lang=args.caption_lang,
+            chunk_mb=args.chunk_mb,
+            stats_file=args.stats_file,
+            session_dir=args.session_dir,
+        )
+        print_batch_summary(results, time.time() - t0, args.dry_run)
+        sys.exit(1 if not results or any(r.error for r in results) else 0)
+
+    mp4_path = resolve_mp4_path(args.mp4, args.path[0] if args.path else None)
     if mp4_path and not (args.mp4 or args.path):
         print(f"mp4未指定 → 最新mp4を自動選択: {mp4_path}")
 
@@ -822,4 +1347,9 @@ if __name__ == "__main__":
         today_root=args.today_root,
         today_recursive=args.today_recursive,
         confirm_today=args.confirm_today,
+        captions=args.captions,
+        caption_lang=args.caption_lang,
+        chunk_mb=args.chunk_mb,
+        stats_file=args.stats_file,
+        session_dir=args.session_dir,
     )